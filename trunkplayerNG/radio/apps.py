@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class RadioConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "radio"
+
+    def ready(self):
+        import radio.helpers.alerts
+        import radio.helpers.cache
+        import radio.helpers.fanout
+        import radio.helpers.feed
+        import radio.helpers.search
+        import radio.helpers.versions
+        import radio.helpers.visibility
@@ -0,0 +1,209 @@
+import random, time, uuid
+
+from unittest import mock
+
+import django
+
+from django.db import connection
+from django.utils import timezone
+
+from radio.benchmarks.ingest import summarize
+from radio.helpers import alerts
+from radio.helpers.notifications import _send_transmission_notifications
+from radio.models import (
+    System,
+    SystemACL,
+    TalkGroup,
+    TransmissionUnit,
+    Unit,
+    UserAlert,
+    UserProfile,
+)
+
+
+def create_alerts(config: dict, rng: random.Random) -> tuple[list, list]:
+    """
+    Creates the catalog, alerts and Transmission payloads the benchmark matches
+    """
+    name = f"bench-{uuid.uuid4()}"
+    acl = SystemACL.objects.create(name=name[:30], public=True)
+    system = System.objects.create(name=name, systemACL=acl)
+
+    talkgroups = TalkGroup.objects.bulk_create(
+        [
+            TalkGroup(
+                UUID=uuid.uuid4(),
+                system=system,
+                decimalID=decimalID,
+                alphaTag=f"TG {decimalID}",
+            )
+            for decimalID in range(config["talkgroups"])
+        ]
+    )
+    units = Unit.objects.bulk_create(
+        [
+            Unit(UUID=uuid.uuid4(), system=system, decimalID=decimalID)
+            for decimalID in range(config["units"])
+        ]
+    )
+    users = UserProfile.objects.bulk_create(
+        [UserProfile(UUID=uuid.uuid4()) for _ in range(config["users"])]
+    )
+
+    userAlerts = UserAlert.objects.bulk_create(
+        [
+            UserAlert(
+                UUID=uuid.uuid4(),
+                user=rng.choice(users),
+                name=f"Alert {index}",
+                enabled=rng.random() > 0.1,
+                emergencyOnly=rng.random() < 0.2,
+                webNotification=True,
+            )
+            for index in range(config["alerts"])
+        ],
+        batch_size=1000,
+    )
+    TalkgroupLinks = UserAlert.talkgroups.through
+    UnitLinks = UserAlert.units.through
+    TalkgroupLinks.objects.bulk_create(
+        [
+            TalkgroupLinks(useralert_id=alert.UUID, talkgroup_id=talkgroup.UUID)
+            for alert in userAlerts
+            for talkgroup in rng.sample(talkgroups, config["talkgroups_per_alert"])
+        ],
+        batch_size=1000,
+    )
+    UnitLinks.objects.bulk_create(
+        [
+            UnitLinks(useralert_id=alert.UUID, unit_id=unit.UUID)
+            for alert in userAlerts
+            for unit in rng.sample(units, config["units_per_alert"])
+        ],
+        batch_size=1000,
+    )
+
+    # Serialized the way new_transmission_dispatch hands them to the task
+    TXs = []
+    for _ in range(config["transmissions"]):
+        TXUnits = TransmissionUnit.objects.bulk_create(
+            [
+                TransmissionUnit(UUID=uuid.uuid4(), time=timezone.now(), unit=unit)
+                for unit in rng.sample(units, config["units_per_transmission"])
+            ]
+        )
+        TXs.append(
+            {
+                "UUID": str(uuid.uuid4()),
+                "talkgroup": str(rng.choice(talkgroups).UUID),
+                "units": [str(TXUnit.UUID) for TXUnit in TXUnits],
+                "emergency": rng.random() < 0.05,
+            }
+        )
+
+    return TXs, userAlerts
+
+
+def scan_matches(TX: dict) -> set:
+    """
+    The per alert queries the dispatch used to run, with units resolved correctly
+    """
+    unitUUIDs = {
+        str(UUID)
+        for UUID in TransmissionUnit.objects.filter(UUID__in=TX["units"]).values_list(
+            "unit_id", flat=True
+        )
+    }
+
+    matches = set()
+    for alert in UserAlert.objects.all():
+        if not alert.enabled or (alert.emergencyOnly and not TX["emergency"]):
+            continue
+        if alert.talkgroups.filter(UUID=TX["talkgroup"]).exists():
+            matches.add(("Talkgroup", str(alert.UUID)))
+        if unitUUIDs & {str(unit.UUID) for unit in alert.units.all()}:
+            matches.add(("Unit", str(alert.UUID)))
+    return matches
+
+
+def index_matches(TX: dict) -> set:
+    unitUUIDs = [
+        str(UUID)
+        for UUID in TransmissionUnit.objects.filter(UUID__in=TX["units"]).values_list(
+            "unit_id", flat=True
+        )
+    ]
+    return {
+        (type, alert.UUID)
+        for type, alert, _ in alerts.match_alerts(
+            TX["talkgroup"], unitUUIDs, TX["emergency"]
+        )
+    }
+
+
+def timed(func, *args) -> tuple:
+    # Counted by hand, the scan runs more queries than the capped query log holds
+    queries = 0
+
+    def count(execute, *args):
+        nonlocal queries
+        queries += 1
+        return execute(*args)
+
+    start = time.perf_counter()
+    with connection.execute_wrapper(count):
+        result = func(*args)
+    return result, (time.perf_counter() - start) * 1000, queries
+
+
+def run(config: dict) -> dict:
+    """
+    Times alert matching with the alert index against the per alert scan
+    """
+    rng = random.Random(config["seed"])
+    TXs, userAlerts = create_alerts(config, rng)
+
+    alerts.index.invalidate()
+    _, buildMs, buildQueries = timed(alerts.index.build)
+
+    elapsed, queries, notifications = [], [], 0
+    with mock.patch(
+        "radio.helpers.notifications._broadcast_user_notification"
+    ) as broadcast:
+        for TX in TXs:
+            _, ms, count = timed(_send_transmission_notifications, TX)
+            elapsed.append(ms)
+            queries.append(count)
+        notifications = broadcast.call_count
+
+    scanMs, scanQueries, agree = [], [], True
+    for TX in TXs[: config["scan_transmissions"]]:
+        expected, ms, count = timed(scan_matches, TX)
+        scanMs.append(ms)
+        scanQueries.append(count)
+        agree = agree and expected == index_matches(TX)
+
+    return {
+        "config": config,
+        "environment": {
+            "django": django.get_version(),
+            "database": connection.vendor,
+        },
+        "index": {
+            **alerts.alert_index_stats(),
+            "build_ms": round(buildMs, 3),
+            "build_queries": buildQueries,
+        },
+        "indexed": {
+            "transmissions": len(TXs),
+            "notifications": notifications,
+            "ms": summarize(elapsed),
+            "queries": summarize(queries),
+        },
+        "scan": {
+            "transmissions": len(scanMs),
+            "ms": summarize(scanMs),
+            "queries": summarize(scanQueries),
+            "same_matches": agree,
+        },
+    }
@@ -0,0 +1,226 @@
+import json, os, statistics, tempfile, time, uuid
+
+from contextlib import ExitStack
+from unittest import mock
+
+import django
+
+from django.core.files.storage import Storage
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.parsers import JSONParser
+from rest_framework.test import APIRequestFactory
+
+from radio.benchmarks.payloads import FakeRecorder
+from radio.helpers import cache, emitter, transmission
+from radio.helpers.utils import TransmissionDetails
+from radio.models import System, SystemACL, SystemRecorder, TalkGroup
+from trunkplayerNG.celery import app
+
+STAGES = ("parse", "decode", "validate", "db_write", "storage_write", "fan_out")
+
+
+class StageTimer:
+    def __init__(self) -> None:
+        """
+        Accumulates the time spent in each ingest stage of the current call
+        """
+        self.current = {}
+        self.calls = []
+
+    def wrap(self, stage: str, func):
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.current[stage] = self.current.get(stage, 0.0) + (
+                    time.perf_counter() - start
+                )
+
+        return timed
+
+    def start_call(self) -> None:
+        self.current = {}
+
+    def end_call(self) -> dict:
+        stages = {stage: self.current.get(stage, 0.0) * 1000 for stage in STAGES}
+        # Storage writes happen inside the ingest transaction (FileField.pre_save)
+        stages["db_write"] -= stages["storage_write"]
+        self.calls.append(stages)
+        return stages
+
+
+def summarize(values: list) -> dict:
+    if not values:
+        return {}
+
+    ordered = sorted(values)
+    return {
+        "mean": round(statistics.fmean(ordered), 3),
+        "p50": round(ordered[int(len(ordered) * 0.50)], 3),
+        "p95": round(ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)], 3),
+        "p99": round(ordered[min(int(len(ordered) * 0.99), len(ordered) - 1)], 3),
+        "max": round(ordered[-1], 3),
+    }
+
+
+def create_fixtures(config: dict) -> SystemRecorder:
+    """
+    Creates the system, recorder, talkgroups and ACL the benchmark posts to
+    """
+    name = f"bench-{uuid.uuid4()}"
+    acl = SystemACL.objects.create(name=name[:30], public=True)
+    system = System.objects.create(name=name, systemACL=acl)
+    recorder = SystemRecorder.objects.create(
+        system=system, name=name[:30], enabled=True
+    )
+
+    if config["acl"] == "none":
+        return recorder
+
+    # The ACL lists are padded with talkgroups the fake recorder never posts to
+    decimalIDs = list(range(1000, 1000 + config["talkgroups"]))
+    padding = range(100000, 100000 + config["acl_size"])
+    TGs = TalkGroup.objects.bulk_create(
+        [
+            TalkGroup(UUID=uuid.uuid4(), system=system, decimalID=decimalID)
+            for decimalID in [*decimalIDs, *padding]
+        ]
+    )
+
+    if config["acl"] == "allow":
+        recorder.talkgroupsAllowed.add(*TGs)
+    else:
+        recorder.talkgroupsDenyed.add(*TGs[len(decimalIDs) :])
+
+    return recorder
+
+
+def run(config: dict) -> dict:
+    """
+    Drives TransmissionCreate in process and returns the JSON report
+    """
+    from radio.views import TransmissionCreate
+
+    timer = StageTimer()
+    factory = APIRequestFactory()
+    view = TransmissionCreate.as_view()
+
+    with ExitStack() as stack:
+        stack.enter_context(override_settings(ASYNC_INGEST=False))
+        if not config["keep_storage"]:
+            stack.enter_context(
+                override_settings(
+                    DEFAULT_FILE_STORAGE="django.core.files.storage.FileSystemStorage",
+                    MEDIA_ROOT=stack.enter_context(tempfile.TemporaryDirectory()),
+                )
+            )
+
+        # Celery runs inline and socket.io emits go to an in-memory broker
+        # The settings use the CELERY_ namespace, so the overrides need that prefix.
+        # Eager tasks still borrow a producer, an in-memory broker satisfies it
+        stack.callback(
+            app.conf.update,
+            CELERY_TASK_ALWAYS_EAGER=app.conf.task_always_eager,
+            CELERY_BROKER_URL=app.conf.broker_url,
+        )
+        app.conf.update(
+            CELERY_TASK_ALWAYS_EAGER=True, CELERY_BROKER_URL="memory://localhost/"
+        )
+        stack.enter_context(
+            mock.patch.object(
+                emitter,
+                "_emitter",
+                emitter.EmitterManager("memory://localhost/", emitter._stats),
+            )
+        )
+        stack.enter_context(mock.patch.object(emitter, "_emitter_pid", os.getpid()))
+
+        for target, stage, attribute in (
+            (JSONParser, "parse", "parse"),
+            (transmission.base64, "decode", "b64decode"),
+            (TransmissionDetails, "validate", "validate_upload"),
+            (transmission, "db_write", "ingest_transmissions"),
+            (Storage, "storage_write", "save"),
+            (transmission, "fan_out", "forward_new_transmission"),
+        ):
+            stack.enter_context(
+                mock.patch.object(
+                    target, attribute, timer.wrap(stage, getattr(target, attribute))
+                )
+            )
+        stack.enter_context(
+            mock.patch(
+                "radio.views.new_transmission_dispatch",
+                timer.wrap("fan_out", transmission.new_transmission_dispatch),
+            )
+        )
+
+        for resolution_cache in (
+            cache.recorders,
+            cache.systems,
+            cache.talkgroups,
+            cache.recorder_policies,
+        ):
+            resolution_cache.invalidate()
+
+        recorder = create_fixtures(config)
+        generator = FakeRecorder(
+            str(recorder.forwarderWebhookUUID),
+            units=config["units"],
+            freqs=config["freqs"],
+            talkgroups=config["talkgroups"],
+            unitPool=config["unit_pool"],
+            audioBytes=config["audio_bytes"],
+            seed=config["seed"],
+        )
+
+        latencies = []
+        queries = []
+        failures = 0
+        started = None
+        for index in range(config["warmup"] + config["calls"]):
+            if index == config["warmup"]:
+                timer.calls = []
+                started = time.perf_counter()
+
+            request = factory.post(
+                "/api/radio/transmission/create",
+                json.dumps(generator.payload()),
+                content_type="application/json",
+            )
+
+            timer.start_call()
+            start = time.perf_counter()
+            with CaptureQueriesContext(connection) as context:
+                response = view(request)
+            elapsed = (time.perf_counter() - start) * 1000
+            timer.end_call()
+
+            if index < config["warmup"]:
+                continue
+
+            failures += response.status_code != 200
+            latencies.append(elapsed)
+            queries.append(len(context.captured_queries))
+
+        wall = time.perf_counter() - started
+
+    return {
+        "config": config,
+        "environment": {
+            "django": django.get_version(),
+            "database": connection.vendor,
+        },
+        "calls": config["calls"],
+        "failures": failures,
+        "throughput_per_s": round(config["calls"] / wall, 2),
+        "latency_ms": summarize(latencies),
+        "stages_ms": {
+            stage: summarize([call[stage] for call in timer.calls]) for stage in STAGES
+        },
+        "queries_per_call": summarize(queries),
+        "emitter": emitter.emitter_stats(),
+    }
@@ -0,0 +1,75 @@
+import base64, random, time
+
+
+class FakeRecorder:
+    def __init__(
+        self,
+        recorderUUID: str,
+        units: int = 5,
+        freqs: int = 3,
+        talkgroups: int = 100,
+        unitPool: int = 5000,
+        audioBytes: int = 16000,
+        seed: int = 0,
+    ) -> None:
+        """
+        Synthesizes trunk-recorder /transmission/create payloads
+        """
+        self.recorderUUID = recorderUUID
+        self.units = units
+        self.freqs = freqs
+        self.talkgroups = talkgroups
+        self.unitPool = max(unitPool, units)
+        self.random = random.Random(seed)
+        self.audio = base64.b64encode(self.random.randbytes(audioBytes)).decode()
+        self.clock = int(time.time())
+
+    def talkgroup_ids(self) -> range:
+        return range(1000, 1000 + self.talkgroups)
+
+    def payload(self) -> dict:
+        # Every call gets a new start time so none of them are deduplicated
+        self.clock += 1
+        start = self.clock
+        length = self.random.randint(1, 30)
+
+        return {
+            "recorder": self.recorderUUID,
+            "name": f"{start}-call.m4a",
+            "audioFile": self.audio,
+            "json": {
+                "freq": 851000000 + self.random.randrange(0, 10000000, 12500),
+                "start_time": start,
+                "stop_time": start + length,
+                "emergency": 0,
+                "encrypted": 0,
+                "call_length": length,
+                "talkgroup": self.random.choice(self.talkgroup_ids()),
+                "talkgroup_tag": "-",
+                "audio_type": "digital",
+                "freqList": [
+                    {
+                        "freq": 851000000,
+                        "time": start + index,
+                        "pos": float(index),
+                        "len": 1.0,
+                        "error_count": 0,
+                        "spike_count": 0,
+                    }
+                    for index in range(self.freqs)
+                ],
+                "srcList": [
+                    {
+                        "src": src,
+                        "time": start + index,
+                        "pos": float(index),
+                        "emergency": 0,
+                        "signal_system": "",
+                        "tag": "",
+                    }
+                    for index, src in enumerate(
+                        self.random.sample(range(1, self.unitPool + 1), self.units)
+                    )
+                ],
+            },
+        }
@@ -0,0 +1,147 @@
+import time, uuid
+
+import django
+
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from radio.benchmarks.ingest import summarize
+from radio.models import (
+    Agency,
+    City,
+    System,
+    SystemACL,
+    TalkGroup,
+    TalkGroupACL,
+    Unit,
+    UserProfile,
+)
+from users.models import CustomUser
+
+
+def create_catalog(config: dict) -> list:
+    """
+    Creates a statewide style catalog and users that share one ACL scope
+    """
+    name = f"bench-{uuid.uuid4()}"
+    acl = SystemACL.objects.create(name=name[:30], public=False)
+    system = System.objects.create(
+        name=name, systemACL=acl, enableTalkGroupACLs=config["talkgroup_acls"]
+    )
+
+    cities = City.objects.bulk_create(
+        [City(UUID=uuid.uuid4(), name=f"City {i}") for i in range(20)]
+    )
+    agencies = Agency.objects.bulk_create(
+        [Agency(UUID=uuid.uuid4(), name=f"Agency {i}") for i in range(50)]
+    )
+    for index, agency in enumerate(agencies):
+        agency.city.add(cities[index % len(cities)])
+
+    talkgroups = TalkGroup.objects.bulk_create(
+        [
+            TalkGroup(
+                UUID=uuid.uuid4(),
+                system=system,
+                decimalID=decimalID,
+                alphaTag=f"TG {decimalID}"[:30],
+            )
+            for decimalID in range(config["talkgroups"])
+        ]
+    )
+    Through = TalkGroup.agency.through
+    Through.objects.bulk_create(
+        [
+            Through(talkgroup_id=talkgroup.UUID, agency_id=agencies[index % 50].UUID)
+            for index, talkgroup in enumerate(talkgroups)
+        ]
+    )
+    Unit.objects.bulk_create(
+        [
+            Unit(UUID=uuid.uuid4(), system=system, decimalID=decimalID)
+            for decimalID in range(config["units"])
+        ]
+    )
+
+    talkgroupACL = TalkGroupACL.objects.create(name=name[:30])
+    talkgroupACL.allowedTalkgroups.add(*talkgroups)
+
+    users = []
+    for index in range(config["users"]):
+        user = CustomUser.objects.create_user(
+            email=f"{index}-{name}@example.com", password=name
+        )
+        user.refresh_from_db()
+        if user.userProfile is None:
+            user.userProfile = UserProfile.objects.create(UUID=uuid.uuid4())
+            user.save()
+        acl.users.add(user.userProfile)
+        talkgroupACL.users.add(user.userProfile)
+        users.append(user)
+
+    return users
+
+
+def run(config: dict) -> dict:
+    """
+    Times the catalog endpoints with an empty and with a warm response cache
+    """
+    from radio.views import AgencyList, SystemList, TalkGroupList, UnitList
+
+    factory = APIRequestFactory()
+    users = create_catalog(config)
+    endpoints = {
+        "talkgroup/list": (TalkGroupList.as_view(), config["talkgroups"]),
+        "unit/list": (UnitList.as_view(), config["units"]),
+        "agency/list": (AgencyList.as_view(), 50),
+        "system/list": (SystemList.as_view(), 10),
+    }
+
+    def call(view, limit: int, user) -> tuple:
+        request = factory.get(f"/?limit={limit}")
+        force_authenticate(request, user=user)
+        # The query log is capped, a full one would make every count read 0
+        connection.queries_log.clear()
+        start = time.perf_counter()
+        with CaptureQueriesContext(connection) as context:
+            response = view(request)
+            response.render()
+        elapsed = (time.perf_counter() - start) * 1000
+        return elapsed, len(context.captured_queries), response.get("X-Cache")
+
+    report = {}
+    for endpoint, (view, limit) in endpoints.items():
+        cold, warm, coldQueries, warmQueries, hits = [], [], [], [], 0
+        for _ in range(config["rounds"]):
+            caches["responses"].clear()
+            elapsed, queries, state = call(view, limit, users[0])
+            cold.append(elapsed)
+            coldQueries.append(queries)
+
+            # Every other user shares the first user's ACL scope
+            for user in users:
+                elapsed, queries, state = call(view, limit, user)
+                warm.append(elapsed)
+                warmQueries.append(queries)
+                hits += state == "HIT"
+
+        report[endpoint] = {
+            "rows": limit,
+            "cold_ms": summarize(cold),
+            "warm_ms": summarize(warm),
+            "cold_queries": summarize(coldQueries),
+            "warm_queries": summarize(warmQueries),
+            "warm_hit_ratio": round(hits / len(warm), 3),
+        }
+
+    return {
+        "config": config,
+        "environment": {
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "cache": caches["responses"].__class__.__name__,
+        },
+        "endpoints": report,
+    }
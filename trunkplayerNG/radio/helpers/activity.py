@@ -0,0 +1,269 @@
+import logging
+
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from radio.models import TalkGroupActivity, Transmission, UnitActivity
+
+if settings.SEND_TELEMETRY:
+    from sentry_sdk import capture_exception
+
+logger = logging.getLogger(__name__)
+
+RESOLUTIONS = {"minute": 60, "hour": 3600, "day": 86400}
+COUNTERS = ("calls", "airtime", "emergencies", "encrypted")
+
+# Buckets returned when no range is given, and the most one query may span
+DEFAULT_BUCKETS = {60: 60, 3600: 24, 86400: 30}
+MAX_BUCKETS = 1500
+
+
+def activity_enabled() -> bool:
+    return settings.ACTIVITY_ROLLUPS
+
+
+def bucket_start(moment: datetime, resolution: int) -> datetime:
+    """
+    Start of the UTC aligned bucket holding moment
+    """
+    seconds = int(moment.timestamp()) // resolution * resolution
+    return datetime.fromtimestamp(seconds, tz=dt_timezone.utc)
+
+
+def activity_rows(TXs: list, TXUnits: list) -> tuple[list, list]:
+    """
+    Builds the unsaved rollup rows of a batch of Transmissions
+
+    TXUnits holds the Unit UUIDs heard on each Transmission. One row per
+    (talkgroup or unit, resolution, bucket), so a batch adds few rows
+    """
+    talkgroups = defaultdict(lambda: [0, 0.0, 0, 0])
+    units = defaultdict(lambda: [0, 0.0, 0, 0])
+
+    for TX, unitUUIDs in zip(TXs, TXUnits):
+        TX: Transmission
+        increment = (1, TX.length or 0.0, int(TX.emergency), int(TX.encrypted))
+        for resolution in RESOLUTIONS.values():
+            bucket = bucket_start(TX.startTime, resolution)
+            keys = [(talkgroups, TX.talkgroup_id)]
+            keys += [(units, unitUUID) for unitUUID in unitUUIDs]
+            for counters, UUID in keys:
+                totals = counters[(TX.system_id, UUID, resolution, bucket)]
+                for index, value in enumerate(increment):
+                    totals[index] += value
+
+    def build(model, field: str, counters: dict) -> list:
+        return [
+            model(
+                system_id=systemUUID,
+                resolution=resolution,
+                bucket=bucket,
+                **{f"{field}_id": UUID},
+                **dict(zip(COUNTERS, totals)),
+            )
+            for (systemUUID, UUID, resolution, bucket), totals in counters.items()
+        ]
+
+    return (
+        build(TalkGroupActivity, "talkgroup", talkgroups),
+        build(UnitActivity, "unit", units),
+    )
+
+
+def record_activity(TXs: list, TXUnits: list) -> None:
+    """
+    Appends the counters of a batch of new Transmissions
+    """
+    talkgroupRows, unitRows = activity_rows(TXs, TXUnits)
+    TalkGroupActivity.objects.bulk_create(talkgroupRows)
+    UnitActivity.objects.bulk_create(unitRows)
+
+
+def rebuild_activity(batch_size: int = 1000) -> int:
+    """
+    Recounts the rollups from stored Transmissions, returns Transmissions counted
+    """
+    TalkGroupActivity.objects.all().delete()
+    UnitActivity.objects.all().delete()
+
+    # iterator() skips prefetch_related, so walk the table in pk ordered batches
+    counted = 0
+    TXs = Transmission.objects.prefetch_related("units").order_by("pk")
+    batch = list(TXs[:batch_size])
+    while batch:
+        record_activity(
+            batch, [{TXUnit.unit_id for TXUnit in TX.units.all()} for TX in batch]
+        )
+        counted += len(batch)
+        batch = list(TXs.filter(pk__gt=batch[-1].pk)[:batch_size])
+
+    return counted
+
+
+def _compact(model, field: str, resolution: int, batch_size: int = 100) -> int:
+    """
+    Merges the rows of every (talkgroup or unit, bucket) that gained appended
+    rows into one row
+
+    Only those keys' rows are locked and summed in Python, so each appended row
+    is counted by exactly one compaction even if two run at once
+    """
+    pending = defaultdict(set)
+    for bucket, UUID in (
+        model.objects.filter(compacted=False, resolution=resolution)
+        .values_list("bucket", f"{field}_id")
+        .distinct()
+    ):
+        pending[bucket].add(UUID)
+
+    # A transaction per batch of buckets keeps the locks and the OR'd filter small
+    buckets = sorted(pending)
+    merged = 0
+    for start in range(0, len(buckets), batch_size):
+        keys = Q()
+        for bucket in buckets[start : start + batch_size]:
+            keys |= Q(bucket=bucket, **{f"{field}_id__in": pending[bucket]})
+        merged += _merge(model, field, resolution, keys)
+
+    return merged
+
+
+def _merge(model, field: str, resolution: int, keys: Q) -> int:
+    with transaction.atomic():
+        rows = list(
+            model.objects.select_for_update()
+            .filter(keys, resolution=resolution)
+            .values_list("pk", "system_id", f"{field}_id", "bucket", *COUNTERS)
+        )
+
+        merged = defaultdict(lambda: [0, 0.0, 0, 0])
+        for pk, systemUUID, UUID, bucket, *counters in rows:
+            totals = merged[(systemUUID, UUID, bucket)]
+            for index, value in enumerate(counters):
+                totals[index] += value
+
+        pks = [row[0] for row in rows]
+        for start in range(0, len(pks), 1000):
+            model.objects.filter(pk__in=pks[start : start + 1000]).delete()
+
+        model.objects.bulk_create(
+            [
+                model(
+                    system_id=systemUUID,
+                    resolution=resolution,
+                    bucket=bucket,
+                    compacted=True,
+                    **{f"{field}_id": UUID},
+                    **dict(zip(COUNTERS, totals)),
+                )
+                for (systemUUID, UUID, bucket), totals in merged.items()
+            ],
+            batch_size=1000,
+        )
+
+    return len(rows)
+
+
+def _compact_activity() -> None:
+    """
+    Merges appended rollup rows and drops minute/hour rows past retention
+    """
+    retention = {
+        RESOLUTIONS["minute"]: timedelta(
+            hours=settings.ACTIVITY_MINUTE_RETENTION_HOURS
+        ),
+        RESOLUTIONS["hour"]: timedelta(days=settings.ACTIVITY_HOUR_RETENTION_DAYS),
+    }
+
+    for model, field in ((TalkGroupActivity, "talkgroup"), (UnitActivity, "unit")):
+        for resolution in RESOLUTIONS.values():
+            try:
+                merged = _compact(model, field, resolution)
+                if resolution in retention:
+                    model.objects.filter(
+                        resolution=resolution,
+                        bucket__lt=timezone.now() - retention[resolution],
+                    ).delete()
+                logger.debug(
+                    f"[+] COMPACTED {merged} {model.__name__} ROWS AT {resolution}s"
+                )
+            except Exception as e:
+                if settings.SEND_TELEMETRY:
+                    capture_exception(e)
+                logger.error(
+                    f"[!] ERROR COMPACTING {model.__name__} AT {resolution}s - {str(e)}"
+                )
+
+
+def activity_window(resolution: int, after: datetime = None, before: datetime = None):
+    """
+    Bucket aligned (after, before) of a query, the latest DEFAULT_BUCKETS by default
+    """
+    if before is None:
+        before = timezone.now()
+    try:
+        before = bucket_start(before, resolution) + timedelta(seconds=resolution)
+        if after is None:
+            after = before - timedelta(seconds=resolution * DEFAULT_BUCKETS[resolution])
+        after = bucket_start(after, resolution)
+    except (OverflowError, OSError):
+        # Within a bucket of datetime.min or datetime.max
+        raise ValueError("Out of range")
+
+    if after >= before:
+        raise ValueError("after must be earlier than before")
+    if (before - after).total_seconds() / resolution > MAX_BUCKETS:
+        raise ValueError(f"Spans more than {MAX_BUCKETS} buckets, use a coarser one")
+    return after, before
+
+
+def _totals() -> dict:
+    # Annotations cannot reuse the model's field names
+    return {f"total_{counter}": Sum(counter) for counter in COUNTERS}
+
+
+def _counters(row: dict) -> dict:
+    return {
+        "calls": row["total_calls"],
+        "airtime": round(row["total_airtime"], 2),
+        "emergencies": row["total_emergencies"],
+        "encrypted": row["total_encrypted"],
+    }
+
+
+def activity_series(rows, resolution: int, after: datetime, before: datetime) -> list:
+    """
+    Per bucket totals of a rollup queryset, oldest bucket first
+    """
+    rows = rows.filter(resolution=resolution, bucket__gte=after, bucket__lt=before)
+    return [
+        {"bucket": row["bucket"], **_counters(row)}
+        for row in rows.values("bucket").annotate(**_totals()).order_by("bucket")
+    ]
+
+
+def busiest_talkgroups(
+    rows, resolution: int, after: datetime, before: datetime, limit: int
+) -> list:
+    """
+    Talkgroups of a TalkGroupActivity queryset with the most calls in the range
+    """
+    rows = rows.filter(resolution=resolution, bucket__gte=after, bucket__lt=before)
+    return [
+        {
+            "talkgroup": str(row["talkgroup"]),
+            "decimalID": row["talkgroup__decimalID"],
+            "alphaTag": row["talkgroup__alphaTag"],
+            **_counters(row),
+        }
+        for row in rows.values(
+            "talkgroup", "talkgroup__decimalID", "talkgroup__alphaTag"
+        )
+        .annotate(**_totals())
+        .order_by("-total_calls")[:limit]
+    ]
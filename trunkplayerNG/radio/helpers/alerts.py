@@ -0,0 +1,189 @@
+import logging, os, threading, time
+
+from collections import defaultdict
+from typing import NamedTuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import signals
+
+from radio.models import UserAlert
+from .versions import bump_version, get_versions
+
+
+logger = logging.getLogger(__name__)
+
+# Not a model counter, bumped below on every UserAlert save, delete and link change
+ALERT_VERSIONS = ["UserAlert"]
+
+
+class AlertDescriptor(NamedTuple):
+    """
+    What the notification dispatch needs of an enabled UserAlert
+    """
+
+    UUID: str
+    name: str
+    user: str
+    webNotification: bool
+    appRiseNotification: bool
+    appRiseURLs: str
+    emergencyOnly: bool
+    title: str
+    body: str
+
+
+class AlertIndex:
+    """
+    Enabled UserAlerts keyed by the talkgroup and unit UUIDs they watch
+
+    Matching a Transmission is a dict probe per talkgroup/unit instead of a scan
+    of every alert. Alert edits in this process mark the index stale, edits in
+    other processes are seen through the UserAlert ModelVersion counter, checked
+    at most every ALERT_INDEX_CHECK_SECONDS
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.versions = None
+        self.stale = True
+        self.builtAt = None
+        self.checkedAt = 0.0
+        self.rebuilds = 0
+        self.alerts = 0
+        # Swapped as one tuple so a probe never sees half of a rebuild
+        self.snapshot = ({}, {})
+
+    def build(self) -> None:
+        """
+        Reads every enabled UserAlert and its links in three queries
+        """
+        # Read before the rows, so an edit racing the build forces another one
+        self.stale = False
+        versions = get_versions(ALERT_VERSIONS)
+
+        alerts = {}
+        for alertUUID, name, userUUID, *fields in UserAlert.objects.filter(
+            enabled=True
+        ).values_list(
+            "UUID",
+            "name",
+            "user_id",
+            "webNotification",
+            "appRiseNotification",
+            "appRiseURLs",
+            "emergencyOnly",
+            "title",
+            "body",
+        ):
+            alerts[alertUUID] = AlertDescriptor(
+                str(alertUUID), name, str(userUUID), *fields
+            )
+
+        def link(through, field: str) -> dict:
+            index = defaultdict(list)
+            for alertUUID, UUID in through.objects.filter(
+                useralert__enabled=True
+            ).values_list("useralert_id", field):
+                # Missing if the alert was created after the first query
+                if alertUUID in alerts:
+                    index[str(UUID)].append(alerts[alertUUID])
+            return dict(index)
+
+        snapshot = (
+            link(UserAlert.talkgroups.through, "talkgroup_id"),
+            link(UserAlert.units.through, "unit_id"),
+        )
+
+        with self.lock:
+            self.snapshot = snapshot
+            self.alerts = len(alerts)
+            self.versions = versions
+            self.builtAt = time.time()
+            self.checkedAt = time.monotonic()
+            self.rebuilds += 1
+
+        logger.debug(f"[+] BUILT ALERT INDEX FOR {len(alerts)} ALERTS")
+
+    def refresh(self) -> None:
+        """
+        Rebuilds the index on first use and after alert edits
+        """
+        if self.stale or self.versions is None:
+            self.build()
+        elif time.monotonic() - self.checkedAt > settings.ALERT_INDEX_CHECK_SECONDS:
+            self.checkedAt = time.monotonic()
+            if get_versions(ALERT_VERSIONS) != self.versions:
+                self.build()
+
+    def invalidate(self) -> None:
+        self.stale = True
+
+    def watches_units(self) -> bool:
+        self.refresh()
+        return bool(self.snapshot[1])
+
+    def match(self, talkgroupUUID: str, unitUUIDs: list, emergency: bool) -> list:
+        """
+        Alerts a Transmission triggers, as (type, alert, matched unit UUIDs)
+
+        An alert watching both the talkgroup and some units yields one match of
+        each type, unit matches keep the order of unitUUIDs
+        """
+        self.refresh()
+        byTalkgroup, byUnit = self.snapshot
+
+        matches = [
+            ("Talkgroup", alert, [])
+            for alert in byTalkgroup.get(str(talkgroupUUID), ())
+            if emergency or not alert.emergencyOnly
+        ]
+
+        unitMatches = {}
+        for unitUUID in unitUUIDs:
+            for alert in byUnit.get(str(unitUUID), ()):
+                if emergency or not alert.emergencyOnly:
+                    unitMatches.setdefault(alert.UUID, (alert, []))[1].append(
+                        str(unitUUID)
+                    )
+        matches += [("Unit", alert, units) for alert, units in unitMatches.values()]
+
+        return matches
+
+    def as_dict(self) -> dict:
+        with self.lock:
+            byTalkgroup, byUnit = self.snapshot
+            return {
+                "pid": os.getpid(),
+                "builtAt": self.builtAt,
+                "rebuilds": self.rebuilds,
+                "versions": self.versions,
+                "alerts": self.alerts,
+                "talkgroups": len(byTalkgroup),
+                "units": len(byUnit),
+            }
+
+
+index = AlertIndex()
+
+
+def match_alerts(talkgroupUUID: str, unitUUIDs: list, emergency: bool) -> list:
+    return index.match(talkgroupUUID, unitUUIDs, emergency)
+
+
+def alert_index_stats() -> dict:
+    return index.as_dict()
+
+
+def _alerts_changed(sender, **kwargs):
+    if kwargs.get("action", "post_").startswith("post_"):
+        bump_version(ALERT_VERSIONS[0])
+        transaction.on_commit(index.invalidate)
+
+
+signals.post_save.connect(_alerts_changed, sender=UserAlert, weak=False)
+signals.post_delete.connect(_alerts_changed, sender=UserAlert, weak=False)
+signals.m2m_changed.connect(
+    _alerts_changed, sender=UserAlert.talkgroups.through, weak=False
+)
+signals.m2m_changed.connect(_alerts_changed, sender=UserAlert.units.through, weak=False)
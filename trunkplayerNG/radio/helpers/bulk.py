@@ -0,0 +1,252 @@
+import base64, json, logging, os, tarfile, zipfile
+
+from django.conf import settings
+from django.core.files.base import ContentFile, File
+
+from .cache import get_recorder, get_recorder_policy
+from .ingest import (
+    DuplicateTransmission,
+    find_duplicates,
+    ingest_transmissions,
+    natural_key,
+)
+from .transmission import (
+    audio_file_name,
+    forward_new_transmission,
+    new_transmission_dispatch,
+    spool_transmission_handler,
+    transmission_uuid,
+)
+from .utils import TransmissionDetails
+from radio.models import System, SystemRecorder, Transmission
+
+
+if settings.SEND_TELEMETRY:
+    from sentry_sdk import capture_exception
+
+logger = logging.getLogger(__name__)
+
+
+def archive_items(archive: File):
+    """
+    Yields {name, json, audioFile} for each <call>.json/<call>.<audio> pair of a tar or zip
+
+    Member sizes are checked against BULK_ARCHIVE_MAX_MEMBER_BYTES and
+    BULK_ARCHIVE_MAX_BYTES before anything is read, and audio is handed on as a
+    stream of the member so it goes to storage without being held in memory
+    """
+    if zipfile.is_zipfile(archive):
+        archive.seek(0)
+        bundle = zipfile.ZipFile(archive)
+        members = {
+            member.filename: (member, member.file_size)
+            for member in bundle.infolist()
+            if not member.is_dir()
+        }
+        open_member = bundle.open
+    else:
+        archive.seek(0)
+        bundle = tarfile.open(fileobj=archive, mode="r:*")
+        members = {
+            member.name: (member, member.size)
+            for member in bundle.getmembers()
+            if member.isfile()
+        }
+        open_member = bundle.extractfile
+
+    # The declared sizes can be trusted, zipfile stops decompressing at the
+    # size in the header and a tar member is exactly its size
+    total = 0
+    for name, (member, size) in members.items():
+        if size > settings.BULK_ARCHIVE_MAX_MEMBER_BYTES:
+            raise ValueError(
+                f"{name} is over {settings.BULK_ARCHIVE_MAX_MEMBER_BYTES} bytes"
+            )
+        total += size
+    if total > settings.BULK_ARCHIVE_MAX_BYTES:
+        raise ValueError(f"Archive is over {settings.BULK_ARCHIVE_MAX_BYTES} bytes")
+
+    audio = {}
+    for name in members:
+        stem, extension = os.path.splitext(name)
+        if extension != ".json":
+            audio[stem] = name
+
+    for name, (member, size) in members.items():
+        stem, extension = os.path.splitext(name)
+        if extension != ".json":
+            continue
+
+        item = {"name": os.path.basename(name), "json": open_member(member).read()}
+        if stem in audio:
+            audioMember, audioSize = members[audio[stem]]
+            item["name"] = os.path.basename(audio[stem])
+            item["audioFile"] = File(open_member(audioMember), name=item["name"])
+            item["audioFile"].size = audioSize
+        yield item
+
+
+def _bulk_item(system: System, item) -> tuple:
+    """
+    Decodes one bulk item into (UUID, TransmissionDetails, audio file, json)
+    """
+    if isinstance(item, (bytes, str)):
+        item = json.loads(item)
+
+    jsonx = item["json"]
+    if isinstance(jsonx, (bytes, str)):
+        jsonx = json.loads(jsonx)
+    jsonx["system"] = str(system.UUID)
+
+    if not item.get("audioFile"):
+        raise ValueError("audioFile is required")
+
+    audioFile = item["audioFile"]
+    if isinstance(audioFile, str):
+        audioFile = ContentFile(
+            base64.b64decode(audioFile), name=audio_file_name(item["name"])
+        )
+    else:
+        audioFile.name = audio_file_name(audioFile.name)
+
+    return (
+        transmission_uuid(item.get("UUID")),
+        TransmissionDetails(jsonx),
+        audioFile,
+        jsonx,
+    )
+
+
+def _ingest_chunk(recorder: SystemRecorder, recorderUUID: str, chunk: list) -> list:
+    """
+    Stores a chunk in one transaction, retrying item by item if the chunk fails
+    """
+    results = []
+    existing = find_duplicates(recorder, [payload[1] for index, payload in chunk])
+    taken = {
+        str(UUID)
+        for UUID in Transmission.objects.filter(
+            UUID__in=[payload[0] for index, payload in chunk]
+        ).values_list("UUID", flat=True)
+    }
+
+    # A repeat of an earlier item in this chunk is answered with that item's
+    # UUID once it is stored, and retried on its own if the chunk fails
+    fresh = []
+    owners = {}
+    repeats = []
+    for index, payload in chunk:
+        key = natural_key(payload[1])
+        if key in existing or payload[0] in taken:
+            results.append(
+                {
+                    "index": index,
+                    "success": True,
+                    "UUID": str(existing.get(key, payload[0])),
+                    "duplicate": True,
+                }
+            )
+        elif key in owners or payload[0] in owners:
+            repeats.append((index, payload, owners.get(key, owners.get(payload[0]))))
+        else:
+            owners[key] = owners[payload[0]] = len(fresh)
+            fresh.append((index, payload))
+    chunk = fresh
+
+    if not chunk:
+        return results
+
+    try:
+        TXs = ingest_transmissions(recorder, [payload[:3] for index, payload in chunk])
+    except Exception as e:
+        if len(chunk) == 1 and not repeats:
+            if settings.SEND_TELEMETRY:
+                capture_exception(e)
+            index, payload = chunk[0]
+            return results + [{"index": index, "success": False, "error": str(e)}]
+
+        logger.warning(f"[!] BULK CHUNK FAILED, RETRYING ITEMS - {str(e)}")
+        # Repeats go after their owners, so they see what was stored
+        for index, payload in chunk + [repeat[:2] for repeat in repeats]:
+            results += _ingest_chunk(recorder, recorderUUID, [(index, payload)])
+        return results
+
+    for (index, payload), TX in zip(chunk, TXs):
+        TX: Transmission
+        forward_new_transmission(TX, recorderUUID, payload[3])
+        new_transmission_dispatch(TX)
+        results.append({"index": index, "success": True, "UUID": str(TX.UUID)})
+    for index, payload, owner in repeats:
+        results.append(
+            {
+                "index": index,
+                "success": True,
+                "UUID": str(TXs[owner].UUID),
+                "duplicate": True,
+            }
+        )
+    return results
+
+
+def _spool_item(recorderUUID: str, index: int, payload: tuple) -> dict:
+    """
+    Queues one bulk item for the ingest workers
+    """
+    UUID, details, audioFile, jsonx = payload
+    try:
+        UUID = spool_transmission_handler(recorderUUID, jsonx, audioFile, UUID)
+    except DuplicateTransmission as e:
+        return {"index": index, "success": True, "UUID": e.UUID, "duplicate": True}
+    except Exception as e:
+        if settings.SEND_TELEMETRY:
+            capture_exception(e)
+        return {"index": index, "success": False, "error": str(e)}
+
+    return {"index": index, "success": True, "UUID": UUID, "queued": True}
+
+
+def bulk_transmission_handler(recorderUUID: str, items) -> list:
+    """
+    Stores a replayed backlog for one recorder in chunks, returns per item results
+
+    With ASYNC_INGEST each item is queued for the ingest workers instead
+    """
+    recorder: SystemRecorder = get_recorder(recorderUUID)
+    system: System = recorder.system
+    policy = get_recorder_policy(recorder)
+
+    results = []
+    chunk = []
+    for index, item in enumerate(items):
+        try:
+            payload = _bulk_item(system, item)
+        except Exception as e:
+            results.append({"index": index, "success": False, "error": str(e)})
+            continue
+
+        if not policy.allows(system.pk, payload[1].talkgroup):
+            results.append(
+                {
+                    "index": index,
+                    "success": False,
+                    "error": "Not allowed to post this talkgroup",
+                }
+            )
+            continue
+
+        if settings.ASYNC_INGEST:
+            results.append(_spool_item(recorderUUID, index, payload))
+            continue
+
+        chunk.append((index, payload))
+        if len(chunk) >= settings.BULK_INGEST_CHUNK_SIZE:
+            results += _ingest_chunk(recorder, recorderUUID, chunk)
+            chunk = []
+
+    if chunk:
+        results += _ingest_chunk(recorder, recorderUUID, chunk)
+
+    logger.info(
+        f"[+] BULK INGESTED {sum(result['success'] for result in results)}/{len(results)} TRANSMISSIONS FROM {recorder}"
+    )
+    return sorted(results, key=lambda result: result["index"])
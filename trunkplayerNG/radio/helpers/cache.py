@@ -0,0 +1,187 @@
+import logging, threading, time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import signals
+from django.dispatch import receiver
+
+from radio.models import System, SystemRecorder, TalkGroup
+from .policy import RecorderPolicy
+from .versions import get_versions
+
+
+logger = logging.getLogger(__name__)
+
+
+class ResolutionCache:
+    def __init__(self, name: str, versions: list = None) -> None:
+        """
+        Process local TTL cache for rows that rarely change
+
+        With versions, edits made in other processes are seen through those
+        ModelVersion counters, checked at most every RESOLUTION_CACHE_CHECK_SECONDS
+        """
+        self.name = name
+        self.versions = versions
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+        # Bumped by every invalidate, a load that raced one is not stored
+        self._generation = 0
+        self._seen = None
+        self._checkedAt = float("-inf")
+
+    def _check_versions(self) -> None:
+        if not self.versions:
+            return
+
+        now = time.monotonic()
+        if now - self._checkedAt < settings.RESOLUTION_CACHE_CHECK_SECONDS:
+            return
+        self._checkedAt = now
+
+        versions = get_versions(self.versions)
+        if versions != self._seen:
+            self.invalidate()
+            self._seen = versions
+
+    def get(self, key, loader):
+        """
+        Returns the cached value for key, calling loader() on a miss or expiry
+        """
+        self._check_versions()
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[1] > now:
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            generation = self._generation
+
+        value = loader()
+        if value is None:
+            # Unknown keys are not remembered so bogus lookups cannot fill the cache
+            return value
+
+        # Rows read inside a transaction are only remembered once it commits
+        transaction.on_commit(lambda: self._store(key, value, now, generation))
+        return value
+
+    def _store(self, key, value, now: float, generation: int) -> None:
+        with self._lock:
+            # The row may have changed since it was read
+            if generation != self._generation:
+                return
+            self._entries[key] = (value, now + settings.RESOLUTION_CACHE_TTL)
+
+    def invalidate(self, key=None) -> None:
+        """
+        Drops one key or, with no key, the whole cache
+        """
+        with self._lock:
+            self._generation += 1
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+# A disabled or rotated recorder has to stop posting everywhere, not after the TTL
+recorders = ResolutionCache("recorders", ["SystemRecorder", "System"])
+systems = ResolutionCache("systems", ["System"])
+talkgroups = ResolutionCache("talkgroups", ["TalkGroup"])
+recorder_policies = ResolutionCache(
+    "recorder_policies", ["SystemRecorder", "TalkGroup"]
+)
+
+
+def get_recorder(webhookUUID: str) -> SystemRecorder:
+    """
+    Resolves a SystemRecorder (with its System) by forwarderWebhookUUID
+    """
+    return recorders.get(
+        str(webhookUUID),
+        lambda: SystemRecorder.objects.select_related("system")
+        .filter(forwarderWebhookUUID=webhookUUID)
+        .first(),
+    )
+
+
+def get_system(UUID: str) -> System:
+    """
+    Resolves a System by UUID
+    """
+    return systems.get(str(UUID), lambda: System.objects.filter(UUID=UUID).first())
+
+
+def get_talkgroup(system: System, decimalID: int) -> TalkGroup:
+    """
+    Resolves a TalkGroup by (system, decimalID)
+    """
+    return talkgroups.get(
+        (system.pk, int(decimalID)),
+        lambda: TalkGroup.objects.filter(system=system, decimalID=decimalID).first(),
+    )
+
+
+def get_recorder_policy(recorder: SystemRecorder) -> RecorderPolicy:
+    """
+    Resolves the compiled talkgroup policy of a SystemRecorder
+    """
+    return recorder_policies.get(recorder.pk, lambda: RecorderPolicy.compile(recorder))
+
+
+def resolution_cache_stats() -> dict:
+    return {
+        cache.name: cache.stats()
+        for cache in (recorders, systems, talkgroups, recorder_policies)
+    }
+
+
+@receiver(signals.post_save, sender=System)
+@receiver(signals.post_delete, sender=System)
+def invalidate_system(sender, instance, *args, **kwargs):
+    systems.invalidate(str(instance.pk))
+    recorders.invalidate()
+
+
+@receiver(signals.post_save, sender=SystemRecorder)
+@receiver(signals.post_delete, sender=SystemRecorder)
+def invalidate_recorder(sender, instance, *args, **kwargs):
+    # The webhook UUID may have been rotated, so drop every recorder key
+    recorders.invalidate()
+    recorder_policies.invalidate(instance.pk)
+
+
+@receiver(signals.post_save, sender=TalkGroup)
+@receiver(signals.post_delete, sender=TalkGroup)
+def invalidate_talkgroup(sender, instance, created=False, *args, **kwargs):
+    # An edit may have changed the decimalID, so only new rows drop a single key
+    # and policies keyed on (system, decimalID) have to be rebuilt
+    if created:
+        talkgroups.invalidate((instance.system_id, instance.decimalID))
+    else:
+        talkgroups.invalidate()
+        recorder_policies.invalidate()
+
+
+@receiver(signals.m2m_changed, sender=SystemRecorder.talkgroupsAllowed.through)
+@receiver(signals.m2m_changed, sender=SystemRecorder.talkgroupsDenyed.through)
+def invalidate_recorder_policy(sender, instance, action, reverse, *args, **kwargs):
+    if not action.startswith("post_"):
+        return
+
+    if reverse:
+        recorder_policies.invalidate()
+    else:
+        recorder_policies.invalidate(instance.pk)
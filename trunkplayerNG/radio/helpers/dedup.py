@@ -0,0 +1,93 @@
+import logging
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count
+
+
+logger = logging.getLogger(__name__)
+
+# Does not import radio.models so migrations can call it with historical models
+
+
+def merge_duplicate_groups(model, fields: list, preference=None) -> int:
+    """
+    Merges every group of rows sharing fields into one, returns rows removed
+
+    preference sorts each group, the first row is kept (default lowest pk)
+    """
+    groups = (
+        model.objects.values(*fields).annotate(copies=Count("pk")).filter(copies__gt=1)
+    )
+
+    removed = 0
+    for key in groups.iterator():
+        del key["copies"]
+        keep, *duplicates = sorted(
+            model.objects.filter(**key), key=preference or (lambda row: str(row.pk))
+        )
+        merge_duplicates(model, keep, duplicates)
+        removed += len(duplicates)
+
+    return removed
+
+
+def unit_preference(unit) -> tuple:
+    """
+    Keeps a described Unit over the bare rows auto created by ingest
+    """
+    return not unit.description, str(unit.pk)
+
+
+def merge_duplicates(model, keep, duplicates: list) -> None:
+    """
+    Repoints every FK and M2M row from duplicates to keep, then deletes duplicates
+    """
+    for relation in model._meta.related_objects:
+        if relation.many_to_many:
+            _merge_m2m(relation, keep, duplicates)
+        elif relation.one_to_many or relation.one_to_one:
+            _merge_fk(relation, keep, duplicates)
+
+    model.objects.filter(pk__in=[duplicate.pk for duplicate in duplicates]).delete()
+
+
+def _merge_fk(relation, keep, duplicates: list) -> None:
+    field = relation.field.name
+    rows = relation.related_model.objects.filter(**{f"{field}__in": duplicates})
+
+    try:
+        with transaction.atomic():
+            rows.update(**{field: keep})
+        return
+    except IntegrityError:
+        pass
+
+    # Rows that collide with a unique constraint once repointed are copies of
+    # a row already attached to keep
+    for row in rows:
+        try:
+            with transaction.atomic():
+                relation.related_model.objects.filter(pk=row.pk).update(**{field: keep})
+        except IntegrityError:
+            logger.warning(
+                f"[!] DROPPING DUPLICATE {relation.related_model.__name__} {row.pk}"
+            )
+            row.delete()
+
+
+def _merge_m2m(relation, keep, duplicates: list) -> None:
+    through = relation.through
+    owner = relation.field.m2m_field_name()
+    target = relation.field.m2m_reverse_field_name()
+
+    linked = set(
+        through.objects.filter(**{target: keep}).values_list(f"{owner}_id", flat=True)
+    )
+    for row in through.objects.filter(**{f"{target}__in": duplicates}):
+        ownerID = getattr(row, f"{owner}_id")
+        if ownerID in linked:
+            row.delete()
+        else:
+            setattr(row, target, keep)
+            row.save()
+            linked.add(ownerID)
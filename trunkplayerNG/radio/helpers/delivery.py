@@ -0,0 +1,294 @@
+import logging, os, threading, time
+
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+import apprise
+
+from celery.signals import worker_process_shutdown, worker_shutdown
+from django.conf import settings
+
+from .fanout import FanoutStats
+
+if settings.SEND_TELEMETRY:
+    from sentry_sdk import capture_exception
+
+logger = logging.getLogger(__name__)
+
+# Parsed Apprise clients kept per process, least recently used dropped first
+MAX_CLIENTS = 1000
+# Hits listed in a digest body before the rest are only counted
+DIGEST_LINES = 10
+
+
+class DeliveryStats:
+    """
+    Apprise delivery counters of this process, latency over the last samples
+    """
+
+    def __init__(self, samples: int = 1000) -> None:
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.digests = 0
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self.deliveryMs = deque(maxlen=samples)
+
+    def record_hit(self) -> None:
+        with self.lock:
+            self.hits += 1
+
+    def record_drop(self, hits: int) -> None:
+        with self.lock:
+            self.dropped += hits
+
+    def record_delivery(self, sent: bool, deliveryMs: float) -> None:
+        with self.lock:
+            self.digests += 1
+            if sent:
+                self.sent += 1
+            else:
+                self.failed += 1
+            self.deliveryMs.append(deliveryMs)
+
+    def as_dict(self) -> dict:
+        with self.lock:
+            return {
+                "pid": os.getpid(),
+                "hits": self.hits,
+                "digests": self.digests,
+                "sent": self.sent,
+                "failed": self.failed,
+                "dropped": self.dropped,
+                "deliveryMs": FanoutStats.percentiles(self.deliveryMs),
+            }
+
+
+class Digest:
+    """
+    Hits of one (user, alert) waiting out the coalescing window
+    """
+
+    def __init__(self, appRiseURLs: str, dueAt: float = None) -> None:
+        self.appRiseURLs = appRiseURLs
+        self.dueAt = dueAt
+        self.hits = []
+
+    def message(self) -> tuple[str, str]:
+        """
+        The title and body sent for the collected hits
+        """
+        title, body = self.hits[0][1], self.hits[0][2]
+        if len(self.hits) == 1:
+            return title, body
+
+        # Lead with an emergency if there was one
+        for _, hitTitle, _, emergency in self.hits:
+            if emergency:
+                title = hitTitle
+                break
+
+        lines = [hitBody for _, _, hitBody, _ in self.hits[:DIGEST_LINES]]
+        if len(self.hits) > DIGEST_LINES:
+            lines.append(f"... and {len(self.hits) - DIGEST_LINES} more")
+        return f"{title} ({len(self.hits)} hits)", "\n".join(lines)
+
+
+class NotificationDispatcher:
+    """
+    Coalesces Apprise notifications per (user, alert) and sends them from a pool
+
+    The first hit of a key opens a digest that later hits join, one flusher
+    thread hands it to the pool once NOTIFICATION_COALESCE_SECONDS have passed.
+    At most NOTIFICATION_QUEUE_SIZE digests wait for or sit in the pool, digests
+    past that are dropped and counted rather than delaying the rest
+
+    Open digests and queued sends only live in this process's memory. A clean
+    worker shutdown flushes them, a crash or kill loses those hits
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Condition()
+        self.pid = None
+        self.stats = DeliveryStats()
+        self._reset()
+
+    def _reset(self) -> None:
+        self.pending = {}
+        # Every window is the same length, so arrival order is due order
+        self.due = deque()
+        self.clients = OrderedDict()
+        self.inflight = 0
+        self.pool = None
+
+    def _start(self) -> None:
+        # Keyed on the pid, a forked worker does not inherit the parent's threads
+        if self.pid == os.getpid():
+            return
+
+        if self.pid is not None:
+            self.stats = DeliveryStats()
+        self._reset()
+        self.pool = ThreadPoolExecutor(
+            max_workers=settings.NOTIFICATION_WORKERS,
+            thread_name_prefix="apprise",
+        )
+        threading.Thread(
+            target=self._flush_due, name="apprise-flusher", daemon=True
+        ).start()
+        self.pid = os.getpid()
+
+    def submit(
+        self, key: tuple, appRiseURLs: str, title: str, body: str, emergency: bool
+    ):
+        """
+        Queues one alert hit for delivery
+        """
+        self.stats.record_hit()
+        hit = (time.monotonic(), title, body, emergency)
+
+        with self.lock:
+            self._start()
+            if settings.NOTIFICATION_COALESCE_SECONDS <= 0:
+                digest = Digest(appRiseURLs)
+                digest.hits.append(hit)
+                self._deliver(key, digest)
+                return
+
+            digest = self.pending.get(key)
+            if digest is None or digest.appRiseURLs != appRiseURLs:
+                if digest is not None:
+                    # The URLs were edited mid window, send what was collected
+                    self._deliver(key, self.pending.pop(key))
+                dueAt = time.monotonic() + settings.NOTIFICATION_COALESCE_SECONDS
+                digest = self.pending[key] = Digest(appRiseURLs, dueAt)
+                self.due.append((dueAt, key))
+                self.lock.notify()
+            digest.hits.append(hit)
+
+    def _flush_due(self) -> None:
+        while True:
+            try:
+                with self.lock:
+                    if not self.due:
+                        self.lock.wait()
+                        continue
+
+                    dueAt, key = self.due[0]
+                    wait = dueAt - time.monotonic()
+                    if wait > 0:
+                        self.lock.wait(wait)
+                        continue
+
+                    self.due.popleft()
+                    digest = self.pending.get(key)
+                    # A digest flushed early leaves its entry behind
+                    if digest is not None and digest.dueAt == dueAt:
+                        self._deliver(key, self.pending.pop(key))
+            except Exception as e:
+                # The only flusher of this process, it must outlive one bad digest
+                if settings.SEND_TELEMETRY:
+                    capture_exception(e)
+                logger.error(f"[!] FAILED FLUSHING APPRISE DIGESTS - {str(e)}")
+
+    def _deliver(self, key: tuple, digest: Digest) -> None:
+        # Called holding the lock
+        if self.inflight >= settings.NOTIFICATION_QUEUE_SIZE:
+            self.stats.record_drop(len(digest.hits))
+            logger.warning(
+                f"[!] DROPPED APPRISE DIGEST OF {len(digest.hits)} HITS FOR {key[0]}"
+            )
+            return
+
+        # Counted once queued, a submit that raises must not leak a slot
+        self.pool.submit(self._send, key, digest)
+        self.inflight += 1
+
+    def _client(self, key: tuple, appRiseURLs: str) -> apprise.Apprise:
+        with self.lock:
+            client = self.clients.get(key)
+            if client is not None and client[0] == appRiseURLs:
+                self.clients.move_to_end(key)
+                return client[1]
+
+        apobj = apprise.Apprise()
+        for URL in appRiseURLs.split(","):
+            if URL.strip():
+                apobj.add(URL.strip())
+
+        with self.lock:
+            self.clients[key] = (appRiseURLs, apobj)
+            self.clients.move_to_end(key)
+            while len(self.clients) > MAX_CLIENTS:
+                self.clients.popitem(last=False)
+        return apobj
+
+    def _send(self, key: tuple, digest: Digest) -> None:
+        sent = False
+        try:
+            title, body = digest.message()
+            logging.debug(
+                f"[+] BROADCASTING {len(digest.hits)} HITS TO APPRISE {key[0]}"
+            )
+            sent = self._client(key, digest.appRiseURLs).notify(body=body, title=title)
+        except Exception as e:
+            if settings.SEND_TELEMETRY:
+                capture_exception(e)
+            logger.error(f"[!] FAILED SENDING APPRISE DIGEST FOR {key[0]} - {str(e)}")
+        finally:
+            with self.lock:
+                self.inflight -= 1
+            self.stats.record_delivery(
+                bool(sent), (time.monotonic() - digest.hits[0][0]) * 1000
+            )
+
+    def flush(self) -> None:
+        """
+        Sends every open digest now and waits for the pool to finish
+        """
+        with self.lock:
+            if self.pid != os.getpid():
+                return
+            for key in list(self.pending):
+                self._deliver(key, self.pending.pop(key))
+            # Swapped before waiting, so hits arriving meanwhile go to the new pool
+            pool = self.pool
+            self.pool = ThreadPoolExecutor(
+                max_workers=settings.NOTIFICATION_WORKERS,
+                thread_name_prefix="apprise",
+            )
+
+        pool.shutdown(wait=True)
+
+    def as_dict(self) -> dict:
+        with self.lock:
+            pending = len(self.pending)
+            inflight = self.inflight
+            clients = len(self.clients)
+        return {
+            **self.stats.as_dict(),
+            "pending": pending,
+            "inflight": inflight,
+            "clients": clients,
+        }
+
+
+dispatcher = NotificationDispatcher()
+
+
+def dispatch_apprise(
+    user: str, alert: str, appRiseURLs: str, title: str, body: str, emergency: bool
+) -> None:
+    dispatcher.submit((str(user), str(alert)), appRiseURLs, title, body, emergency)
+
+
+def delivery_stats() -> dict:
+    return dispatcher.as_dict()
+
+
+@worker_shutdown.connect
+@worker_process_shutdown.connect
+def flush_notifications(**kwargs):
+    # Open digests only live in this process
+    dispatcher.flush()
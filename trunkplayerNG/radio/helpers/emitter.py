@@ -0,0 +1,158 @@
+import json, logging, os, threading, time
+
+import socketio
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from kombu.pools import producers
+
+if settings.SEND_TELEMETRY:
+    from sentry_sdk import capture_exception
+
+logger = logging.getLogger(__name__)
+
+
+class EmitterStats:
+    """
+    Health counters of the emitter of this process
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.published = 0
+        self.failed = 0
+        self.reconnects = 0
+        self.publishMs = 0.0
+        self.lastError = None
+        self.lastErrorAt = None
+        self.lastPublishAt = None
+
+    def record_publish(self, elapsed: float) -> None:
+        with self.lock:
+            self.published += 1
+            self.publishMs += elapsed
+            self.lastPublishAt = time.time()
+
+    def record_failure(self, error: Exception) -> None:
+        with self.lock:
+            self.failed += 1
+            self.lastError = str(error)
+            self.lastErrorAt = time.time()
+
+    def record_reconnect(self, error: Exception, interval: float) -> None:
+        with self.lock:
+            self.reconnects += 1
+            self.lastError = str(error)
+            self.lastErrorAt = time.time()
+        logger.warning(f"[!] SOCKET EMITTER RECONNECTING IN {interval}s - {error}")
+
+    def as_dict(self) -> dict:
+        with self.lock:
+            return {
+                "pid": os.getpid(),
+                "published": self.published,
+                "failed": self.failed,
+                "reconnects": self.reconnects,
+                "avgPublishMs": (
+                    round(self.publishMs / self.published, 3)
+                    if self.published
+                    else None
+                ),
+                "lastError": self.lastError,
+                "lastErrorAt": self.lastErrorAt,
+                "lastPublishAt": self.lastPublishAt,
+            }
+
+
+class EmitterJSON:
+    """
+    json module for socket.io payloads that still hold UUIDs or datetimes
+
+    Eager tasks hand over serializer output without the broker's JSON round trip
+    """
+
+    loads = staticmethod(json.loads)
+
+    @staticmethod
+    def dumps(*args, **kwargs):
+        return json.dumps(*args, cls=DjangoJSONEncoder, **kwargs)
+
+
+class EmitterManager(socketio.KombuManager):
+    """
+    Write-only KombuManager that publishes through the kombu producer pool
+
+    The stock manager shares one connection per manager and gives up after a
+    single retry without telling the caller. Pooled producers are safe to use
+    from concurrent greenlets, kombu reconnects per retry_policy and a publish
+    that still fails raises so the task sees it.
+    """
+
+    def __init__(self, url: str, stats: EmitterStats) -> None:
+        super().__init__(url, write_only=True, json=EmitterJSON)
+        self.stats = stats
+
+    def _publish(self, data):
+        start = time.perf_counter()
+        exchange = self._exchange()
+        try:
+            with producers[self.publisher_connection].acquire(
+                block=True, timeout=settings.SOCKETIO_EMIT_TIMEOUT
+            ) as producer:
+                producer.publish(
+                    self.json.dumps(data),
+                    exchange=exchange,
+                    declare=[exchange],
+                    retry=True,
+                    retry_policy={
+                        "max_retries": settings.SOCKETIO_EMIT_RETRIES,
+                        "errback": self.stats.record_reconnect,
+                    },
+                )
+        except Exception as e:
+            self.stats.record_failure(e)
+            raise
+
+        self.stats.record_publish((time.perf_counter() - start) * 1000)
+
+
+_stats = EmitterStats()
+_emitter = None
+_emitter_pid = None
+_lock = threading.Lock()
+
+
+def get_emitter() -> EmitterManager:
+    """
+    The process wide emitter, built on first use
+
+    Keyed on the pid so a forked Celery worker never reuses the parent's
+    broker connection
+    """
+    global _emitter, _emitter_pid, _stats
+
+    if _emitter is None or _emitter_pid != os.getpid():
+        with _lock:
+            if _emitter is None or _emitter_pid != os.getpid():
+                if _emitter_pid is not None:
+                    _stats = EmitterStats()
+                _emitter = EmitterManager(settings.CELERY_BROKER_URL, _stats)
+                _emitter_pid = os.getpid()
+                logger.debug(f"[+] SOCKET EMITTER CREATED IN {_emitter_pid}")
+    return _emitter
+
+
+def emit(event: str, data, room: str) -> None:
+    """
+    Sends a socket.io event to a room through the shared emitter
+    """
+    try:
+        get_emitter().emit(event, data, room=room)
+    except Exception as e:
+        if settings.SEND_TELEMETRY:
+            capture_exception(e)
+        raise
+
+
+def emitter_stats() -> dict:
+    return _stats.as_dict()
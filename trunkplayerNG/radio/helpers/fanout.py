@@ -0,0 +1,254 @@
+import logging, os, threading, time
+
+from collections import defaultdict, deque
+
+from celery.signals import worker_init, worker_process_init
+from django.conf import settings
+from django.db import transaction
+from django.db.models import signals
+
+from radio.models import ScanList, Scanner
+from .emitter import emit
+from .versions import get_versions
+
+
+logger = logging.getLogger(__name__)
+
+# Bumped by radio.helpers.versions on every ScanList/Scanner save, delete and
+# link change, in whichever process made it
+ROUTING_VERSIONS = ["ScanList", "Scanner"]
+
+
+class FanoutStats:
+    """
+    Per transmission fan-out latency of this process, over the last samples
+    """
+
+    def __init__(self, samples: int = 1000) -> None:
+        self.lock = threading.Lock()
+        self.transmissions = 0
+        self.emits = 0
+        self.failed = 0
+        self.fanoutMs = deque(maxlen=samples)
+        self.queuedMs = deque(maxlen=samples)
+
+    def record(self, emits: int, failed: int, fanoutMs: float, queuedMs) -> None:
+        with self.lock:
+            self.transmissions += 1
+            self.emits += emits
+            self.failed += failed
+            self.fanoutMs.append(fanoutMs)
+            if queuedMs is not None:
+                self.queuedMs.append(queuedMs)
+
+    @staticmethod
+    def percentiles(samples) -> dict:
+        if not samples:
+            return {"p50": None, "p95": None, "max": None}
+        ordered = sorted(samples)
+        return {
+            "p50": round(ordered[len(ordered) // 2], 3),
+            "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+            "max": round(ordered[-1], 3),
+        }
+
+    def as_dict(self) -> dict:
+        with self.lock:
+            return {
+                "pid": os.getpid(),
+                "transmissions": self.transmissions,
+                "emits": self.emits,
+                "failed": self.failed,
+                "fanoutMs": self.percentiles(self.fanoutMs),
+                "queuedMs": self.percentiles(self.queuedMs),
+            }
+
+
+stats = FanoutStats()
+
+
+class RoutingIndex:
+    """
+    In memory talkgroup -> rooms map of the live fan-out
+
+    ScanList/Scanner link edits in this process mark the index stale once they
+    commit. ScanLists and Scanners are edited by the web workers while Celery
+    does the fan-out, so the index also rebuilds when their ModelVersion counters
+    move, checked at most every ROUTING_INDEX_CHECK_SECONDS
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.versions = None
+        self.stale = True
+        self.builtAt = None
+        self.checkedAt = 0.0
+        self.rebuilds = 0
+        self.scanlists = 0
+        self.scanners = 0
+        self.routes = {}
+
+    def build(self) -> None:
+        """
+        Reads every ScanList and Scanner link, two queries
+        """
+        # Read before the links, so an edit racing the build forces another one
+        self.stale = False
+        versions = get_versions(ROUTING_VERSIONS)
+
+        ScanListTalkgroups = ScanList.talkgroups.through.objects.values_list(
+            "scanlist_id", "talkgroup_id"
+        )
+        ScannerScanlists = Scanner.scanlists.through.objects.values_list(
+            "scanner_id", "scanlist_id"
+        )
+
+        talkgroupScanlists = defaultdict(set)
+        for scanlistUUID, talkgroupUUID in ScanListTalkgroups:
+            talkgroupScanlists[str(talkgroupUUID)].add(str(scanlistUUID))
+        scanlistScanners = defaultdict(set)
+        for scannerUUID, scanlistUUID in ScannerScanlists:
+            scanlistScanners[str(scanlistUUID)].add(str(scannerUUID))
+
+        routes = {}
+        for talkgroupUUID, scanlists in talkgroupScanlists.items():
+            scanners = set().union(
+                *(scanlistScanners.get(UUID, ()) for UUID in scanlists)
+            )
+            routes[talkgroupUUID] = (f"tx_{talkgroupUUID}",) + tuple(
+                sorted(f"tx_{UUID}" for UUID in scanlists | scanners)
+            )
+
+        with self.lock:
+            self.routes = routes
+            self.scanlists = len(set().union(*talkgroupScanlists.values()))
+            self.scanners = len(set().union(*scanlistScanners.values()))
+            self.versions = versions
+            self.builtAt = time.time()
+            self.checkedAt = time.monotonic()
+            self.rebuilds += 1
+
+        logger.debug(f"[+] BUILT ROUTING INDEX FOR {len(routes)} TALKGROUPS")
+
+    def refresh(self) -> None:
+        """
+        Rebuilds the index on first use and after ScanList/Scanner edits
+        """
+        if self.stale or self.versions is None:
+            self.build()
+        elif time.monotonic() - self.checkedAt > settings.ROUTING_INDEX_CHECK_SECONDS:
+            self.checkedAt = time.monotonic()
+            if get_versions(ROUTING_VERSIONS) != self.versions:
+                self.build()
+
+    def invalidate(self) -> None:
+        self.stale = True
+
+    def rooms(self, talkgroupUUID: str) -> tuple:
+        """
+        Rooms a talkgroup's Transmissions go to: its own, its scanlists' and the
+        scanners holding those scanlists
+        """
+        self.refresh()
+        talkgroupUUID = str(talkgroupUUID)
+        return self.routes.get(talkgroupUUID) or (f"tx_{talkgroupUUID}",)
+
+    def summary(self) -> dict:
+        with self.lock:
+            return {
+                "pid": os.getpid(),
+                "builtAt": self.builtAt,
+                "rebuilds": self.rebuilds,
+                "versions": self.versions,
+                "talkgroups": len(self.routes),
+                "scanlists": self.scanlists,
+                "scanners": self.scanners,
+            }
+
+    def as_dict(self, talkgroupUUID: str = None) -> dict:
+        if talkgroupUUID is not None:
+            routes = {str(talkgroupUUID): self.rooms(talkgroupUUID)}
+        else:
+            self.refresh()
+            routes = dict(self.routes)
+        return {
+            **self.summary(),
+            "routes": {UUID: list(rooms) for UUID, rooms in routes.items()},
+        }
+
+
+routing = RoutingIndex()
+
+
+def talkgroup_rooms(talkgroupUUID: str) -> tuple:
+    return routing.rooms(talkgroupUUID)
+
+
+def fan_out_transmission(data: dict, queued_at: float = None) -> int:
+    """
+    Emits a new Transmission to every room of its talkgroup, returns rooms sent
+
+    The event name is the room name, which is what the web client listens on
+    """
+    start = time.time()
+    failed = 0
+    error = None
+
+    roomNames = talkgroup_rooms(data["talkgroup"])
+    for room in roomNames:
+        try:
+            emit(room, data, room=room)
+        except Exception as e:
+            # One failed publish must not starve the remaining rooms
+            failed += 1
+            error = e
+            logger.error(f"[!] FAILED BROADCASTING {data['UUID']} TO {room}")
+
+    elapsed = (time.time() - start) * 1000
+    stats.record(
+        len(roomNames),
+        failed,
+        elapsed,
+        (start - queued_at) * 1000 if queued_at else None,
+    )
+    if failed == len(roomNames):
+        raise error
+
+    logger.debug(
+        f"[+] FANNED OUT {data['UUID']} TO {len(roomNames)} ROOMS IN {elapsed:.1f}ms"
+    )
+    return len(roomNames) - failed
+
+
+def fanout_stats() -> dict:
+    return {**stats.as_dict(), "routing": routing.summary()}
+
+
+def routing_index(talkgroupUUID: str = None) -> dict:
+    return routing.as_dict(talkgroupUUID)
+
+
+def _routing_changed(sender, **kwargs):
+    # Versions are bumped by radio.helpers.versions, this only skips the wait
+    if kwargs.get("action", "post_").startswith("post_"):
+        transaction.on_commit(routing.invalidate)
+
+
+signals.post_delete.connect(_routing_changed, sender=ScanList, weak=False)
+signals.post_delete.connect(_routing_changed, sender=Scanner, weak=False)
+signals.m2m_changed.connect(
+    _routing_changed, sender=ScanList.talkgroups.through, weak=False
+)
+signals.m2m_changed.connect(
+    _routing_changed, sender=Scanner.scanlists.through, weak=False
+)
+
+
+@worker_init.connect
+@worker_process_init.connect
+def build_routing_index(**kwargs):
+    try:
+        routing.build()
+    except Exception as e:
+        # The first fan-out builds it instead
+        logger.error(f"[!] FAILED BUILDING ROUTING INDEX - {str(e)}")
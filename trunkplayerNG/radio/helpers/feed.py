@@ -0,0 +1,192 @@
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import signals
+from django.dispatch import receiver
+
+from radio.models import TalkGroup, Transmission, TransmissionFeed, Unit
+from radio.serializers import (
+    TalkGroupSerializer,
+    TransmissionFreqSerializer,
+    TransmissionUnitSerializer,
+)
+
+
+logger = logging.getLogger(__name__)
+
+# Units and frequencys of a Transmission are listed in this order, feed or not
+SRC_ORDER = ("time", "pos")
+
+
+def feed_enabled() -> bool:
+    return settings.TRANSMISSION_FEED
+
+
+def _as_stored(instance):
+    # Payload values (ISO strings, floats for integers) as a database read returns
+    for field in instance._meta.concrete_fields:
+        if not field.is_relation:
+            value = field.to_python(getattr(instance, field.attname))
+            setattr(instance, field.attname, value)
+    return instance
+
+
+def talkgroup_data(talkgroup: TalkGroup) -> dict:
+    return TalkGroupSerializer(talkgroup).data
+
+
+def _in_src_order(instances) -> list:
+    return sorted(
+        map(_as_stored, instances),
+        key=lambda instance: tuple(getattr(instance, name) for name in SRC_ORDER),
+    )
+
+
+def units_data(TXUnits) -> list:
+    return TransmissionUnitSerializer(_in_src_order(TXUnits), many=True).data
+
+
+def frequencys_data(TXFreqs) -> list:
+    return TransmissionFreqSerializer(_in_src_order(TXFreqs), many=True).data
+
+
+def feed_row(
+    TX: Transmission, talkgroup: dict, units: list, frequencys: list
+) -> TransmissionFeed:
+    """
+    Builds the unsaved TransmissionFeed row of a Transmission
+    """
+    return TransmissionFeed(
+        transmission_id=TX.UUID,
+        system_id=TX.system_id,
+        recorder_id=TX.recorder_id,
+        talkgroup_id=TX.talkgroup_id,
+        talkgroupData=talkgroup,
+        startTime=TX.startTime,
+        endTime=TX.endTime,
+        audioFile=TX.audioFile.name,
+        units=units,
+        frequencys=frequencys,
+        encrypted=TX.encrypted,
+        frequency=TX.frequency,
+        length=TX.length,
+        locked=TX.locked,
+        transcript=TX.transcript,
+    )
+
+
+def write_feed(TXs, batch_size: int = 1000) -> int:
+    """
+    Rewrites the TransmissionFeed rows of a Transmission queryset, returns rows written
+    """
+    from radio.helpers.utils import transmission_queryset
+
+    # iterator() skips prefetch_related, so walk the table in pk ordered batches
+    written = 0
+    TXs = transmission_queryset().filter(pk__in=TXs.values("pk")).order_by("pk")
+    batch = list(TXs[:batch_size])
+    while batch:
+        with transaction.atomic():
+            TransmissionFeed.objects.filter(transmission__in=batch).delete()
+            TransmissionFeed.objects.bulk_create(
+                [
+                    feed_row(
+                        TX,
+                        talkgroup_data(TX.talkgroup),
+                        units_data(TX.units.all()),
+                        frequencys_data(TX.frequencys.all()),
+                    )
+                    for TX in batch
+                ]
+            )
+        written += len(batch)
+        batch = list(TXs.filter(pk__gt=batch[-1].pk)[:batch_size])
+
+    return written
+
+
+def rebuild_feed(batch_size: int = 1000, missing_only: bool = False) -> int:
+    """
+    Writes the TransmissionFeed rows of stored Transmissions, returns rows written
+    """
+    TXs = Transmission.objects.all()
+    if missing_only:
+        TXs = TXs.filter(feed__isnull=True)
+    else:
+        TransmissionFeed.objects.all().delete()
+
+    return write_feed(TXs, batch_size)
+
+
+@receiver(signals.post_save, sender=Transmission)
+def transmission_saved(sender, instance, created, **kwargs):
+    # Ingest bulk inserts (no signal) and writes its own rows, this covers edits
+    if not feed_enabled() or created:
+        return
+
+    TransmissionFeed.objects.filter(transmission=instance).update(
+        startTime=instance.startTime,
+        endTime=instance.endTime,
+        audioFile=instance.audioFile.name,
+        encrypted=instance.encrypted,
+        frequency=instance.frequency,
+        length=instance.length,
+        locked=instance.locked,
+        transcript=instance.transcript,
+    )
+
+
+def _refresh_talkgroups(talkgroups) -> None:
+    for talkgroup in talkgroups:
+        TransmissionFeed.objects.filter(talkgroup=talkgroup).update(
+            talkgroupData=talkgroup_data(talkgroup)
+        )
+
+
+@receiver(signals.post_save, sender=TalkGroup)
+def talkgroup_saved(sender, instance, created, **kwargs):
+    if not feed_enabled() or created:
+        return
+
+    _refresh_talkgroups([instance])
+
+
+@receiver(signals.m2m_changed, sender=TalkGroup.agency.through)
+def talkgroup_agency_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not feed_enabled():
+        return
+
+    # A cleared agency no longer knows its talkgroups afterwards
+    if reverse and action == "pre_clear":
+        instance._feedTalkgroups = list(instance.talkgroup_set.all())
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+
+    if not reverse:
+        _refresh_talkgroups([instance])
+    elif action == "post_clear":
+        _refresh_talkgroups(getattr(instance, "_feedTalkgroups", []))
+    else:
+        _refresh_talkgroups(TalkGroup.objects.filter(pk__in=pk_set))
+
+
+@receiver(signals.pre_save, sender=Unit)
+def unit_saving(sender, instance, **kwargs):
+    if not feed_enabled() or instance._state.adding:
+        return
+
+    instance._feedDecimalID = (
+        Unit.objects.filter(pk=instance.pk).values_list("decimalID", flat=True).first()
+    )
+
+
+@receiver(signals.post_save, sender=Unit)
+def unit_saved(sender, instance, created, **kwargs):
+    # Feed rows list units by decimalID, so only a renumbered unit touches them
+    previous = getattr(instance, "_feedDecimalID", None)
+    if created or previous is None or previous == instance.decimalID:
+        return
+
+    TXs = Transmission.objects.filter(units__unit=instance, feed__isnull=False)
+    transaction.on_commit(lambda: write_feed(TXs))
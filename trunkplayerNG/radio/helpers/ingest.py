@@ -0,0 +1,188 @@
+import logging
+import uuid
+
+from django.db import transaction
+
+from radio.helpers.activity import activity_enabled, record_activity
+from radio.helpers.feed import (
+    feed_enabled,
+    feed_row,
+    frequencys_data,
+    talkgroup_data,
+    units_data,
+)
+from radio.helpers.search import catalog_tokens
+from radio.helpers.utils import TransmissionDetails
+from radio.helpers.versions import bump_version
+from radio.models import (
+    CatalogToken,
+    System,
+    SystemRecorder,
+    Transmission,
+    TransmissionFeed,
+    TransmissionFreq,
+    TransmissionUnit,
+    Unit,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class DuplicateTransmission(Exception):
+    def __init__(self, UUID) -> None:
+        """
+        Raised when a Transmission with the same natural key is already stored
+        """
+        super().__init__(f"Duplicate of transmission {UUID}")
+        self.UUID = str(UUID)
+
+
+def natural_key(details: TransmissionDetails) -> tuple:
+    """
+    (talkgroup decimalID, startTime) of a payload, unique per recorder
+    """
+    return int(details.talkgroup), details.start_time
+
+
+def find_duplicates(recorder: SystemRecorder, payloads: list) -> dict:
+    """
+    Maps the natural keys of a batch of TransmissionDetails to stored UUIDs
+    """
+    if not payloads:
+        return {}
+
+    TXs = Transmission.objects.filter(
+        system=recorder.system,
+        recorder=recorder,
+        startTime__in={details.start_time for details in payloads},
+        talkgroup__decimalID__in={int(details.talkgroup) for details in payloads},
+    ).values_list("talkgroup__decimalID", "startTime", "UUID")
+
+    return {(decimalID, startTime): UUID for decimalID, startTime, UUID in TXs}
+
+
+def _resolve_units(system: System, decimalIDs: set) -> dict:
+    """
+    Resolves all units of a batch in one query, upserting the missing ones
+    """
+    if not decimalIDs:
+        return {}
+
+    units = {
+        unit.decimalID: unit
+        for unit in Unit.objects.filter(system=system, decimalID__in=decimalIDs)
+    }
+
+    missing = decimalIDs - units.keys()
+    if missing:
+        # A concurrent ingest may insert the same units, so read back what won
+        NewUnits = [
+            Unit(UUID=uuid.uuid4(), system=system, decimalID=decimalID)
+            for decimalID in missing
+        ]
+        Unit.objects.bulk_create(NewUnits, ignore_conflicts=True)
+        NewUUIDs = {unit.UUID for unit in NewUnits}
+        stored = list(Unit.objects.filter(system=system, decimalID__in=missing))
+        units.update({unit.decimalID: unit for unit in stored})
+
+        # The bulk insert skips post_save, so index and announce the units this
+        # batch created, if it lost every race there is nothing new
+        created = [unit for unit in stored if unit.UUID in NewUUIDs]
+        if created:
+            bump_version("Unit")
+            CatalogToken.objects.bulk_create(
+                [row for unit in created for row in catalog_tokens(unit)]
+            )
+
+    return units
+
+
+def ingest_transmissions(recorder: SystemRecorder, payloads: list) -> list:
+    """
+    Stores a batch of (UUID, TransmissionDetails, audio file) in a single transaction
+    """
+    system: System = recorder.system
+
+    TXs = []
+    TXUnits = []
+    TXFreqs = []
+    UnitLinks = []
+    FreqLinks = []
+    FeedRelated = []
+    ActivityUnits = []
+
+    try:
+        with transaction.atomic():
+            units = _resolve_units(
+                system,
+                {
+                    int(src.src)
+                    for UUID, details, audioFile in payloads
+                    for src in details.srcList
+                },
+            )
+
+            for UUID, details, audioFile in payloads:
+                details: TransmissionDetails
+                talkgroup = details._get_talkgroup(system)
+                TX: Transmission = details._build(UUID, recorder, talkgroup, audioFile)
+                TXs.append(TX)
+
+                ActivityUnits.append(
+                    {units[int(src.src)].UUID for src in details.srcList}
+                )
+
+                start = len(TXUnits), len(TXFreqs)
+                for src in details.srcList:
+                    TXUnit = src._build(units[int(src.src)])
+                    TXUnits.append(TXUnit)
+                    UnitLinks.append(
+                        Transmission.units.through(
+                            transmission_id=TX.UUID, transmissionunit_id=TXUnit.UUID
+                        )
+                    )
+
+                for freq in details.freqList:
+                    TXFreq = freq._build()
+                    TXFreqs.append(TXFreq)
+                    FreqLinks.append(
+                        Transmission.frequencys.through(
+                            transmission_id=TX.UUID, transmissionfreq_id=TXFreq.UUID
+                        )
+                    )
+                FeedRelated.append((TXUnits[start[0] :], TXFreqs[start[1] :]))
+
+            TransmissionUnit.objects.bulk_create(TXUnits)
+            TransmissionFreq.objects.bulk_create(TXFreqs)
+            Transmission.objects.bulk_create(TXs)
+            Transmission.units.through.objects.bulk_create(UnitLinks)
+            Transmission.frequencys.through.objects.bulk_create(FreqLinks)
+
+            if feed_enabled():
+                # Built after the insert, FileField.pre_save settles the audio name
+                talkgroups = {
+                    TX.talkgroup_id: talkgroup_data(TX.talkgroup) for TX in TXs
+                }
+                TransmissionFeed.objects.bulk_create(
+                    [
+                        feed_row(
+                            TX,
+                            talkgroups[TX.talkgroup_id],
+                            units_data(TXUnitsOf),
+                            frequencys_data(TXFreqsOf),
+                        )
+                        for TX, (TXUnitsOf, TXFreqsOf) in zip(TXs, FeedRelated)
+                    ]
+                )
+
+            if activity_enabled():
+                record_activity(TXs, ActivityUnits)
+    except Exception:
+        # Audio written by this call is orphaned by the rollback
+        for TX, (UUID, details, audioFile) in zip(TXs, payloads):
+            if not isinstance(audioFile, str) and TX.audioFile._committed:
+                TX.audioFile.delete(save=False)
+        raise
+
+    logger.debug(f"[+] INGESTED {len(TXs)} TRANSMISSION(S) FROM {recorder}")
+    return TXs
@@ -0,0 +1,33 @@
+from radio.models import SystemRecorder
+
+
+class RecorderPolicy:
+    __slots__ = ("allowed", "denied")
+
+    def __init__(self, allowed: frozenset, denied: frozenset) -> None:
+        """
+        Compiled talkgroup allow/deny lists of a SystemRecorder
+        """
+        self.allowed = allowed
+        self.denied = denied
+
+    @classmethod
+    def compile(cls, recorder: SystemRecorder) -> "RecorderPolicy":
+        """
+        Builds the policy from the recorder M2Ms, two queries
+        """
+        return cls(
+            frozenset(recorder.talkgroupsAllowed.values_list("system_id", "decimalID")),
+            frozenset(recorder.talkgroupsDenyed.values_list("system_id", "decimalID")),
+        )
+
+    def allows(self, systemUUID, decimalID: int) -> bool:
+        """
+        Denied wins, a non empty allow list is exclusive, otherwise allow
+        """
+        key = (systemUUID, int(decimalID))
+        if key in self.denied:
+            return False
+        if self.allowed:
+            return key in self.allowed
+        return True
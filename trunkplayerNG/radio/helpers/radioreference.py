@@ -74,17 +74,29 @@ class RR:
                 UUID = uuid.uuid5(
                     uuid.NAMESPACE_DNS, f"{SystemUUID}+{str(talkgroup['tgDec'])}"
                 )
-                tgX, created = TalkGroup.objects.get_or_create(
-                    UUID=UUID,
-                    system=system,
-                    decimalID=int(talkgroup["tgDec"]),
-                    alphaTag=talkgroup["tgAlpha"],
-                    description=talkgroup["tgDescr"][:250],
-                    encrypted=Encrypted,
-                    mode=Mode,
-                )
+                details = {
+                    "alphaTag": talkgroup["tgAlpha"],
+                    "description": talkgroup["tgDescr"][:250],
+                    "encrypted": Encrypted,
+                    "mode": Mode,
+                }
+
+                # Talkgroups auto created by ingest keep their UUID and get the RR details
+                tgX = TalkGroup.objects.filter(
+                    system=system, decimalID=int(talkgroup["tgDec"])
+                ).first()
+                if tgX:
+                    for field, value in details.items():
+                        setattr(tgX, field, value)
+                    tgX.save()
+                else:
+                    tgX = TalkGroup.objects.create(
+                        UUID=UUID,
+                        system=system,
+                        decimalID=int(talkgroup["tgDec"]),
+                        **details,
+                    )
 
-                tgX.save()
                 TalkGroups.append(tgX)
                 logger.info(
                     f"[+] IMPORTED TALKGROUP - [{str(talkgroup['tgDec'])}] {str(talkgroup['tgAlpha'])}"
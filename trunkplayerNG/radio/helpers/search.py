@@ -0,0 +1,152 @@
+import logging, re
+
+from django.db.models import Count, signals
+from django.dispatch import receiver
+
+from radio.models import CatalogToken, TalkGroup, Transmission, TranscriptToken, Unit
+
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"\w+")
+MAX_TOKEN_LENGTH = 64
+
+
+def tokenize(*texts) -> list:
+    """
+    Distinct lowercase word tokens of texts, in first seen order
+    """
+    tokens = {}
+    for text in texts:
+        if text:
+            for token in TOKEN_PATTERN.findall(str(text).lower()):
+                tokens[token[:MAX_TOKEN_LENGTH]] = None
+    return list(tokens)
+
+
+def transcript_tokens(TX: Transmission) -> list:
+    """
+    Builds the unsaved TranscriptToken rows of a Transmission
+    """
+    return [
+        TranscriptToken(
+            token=token,
+            transmission_id=TX.UUID,
+            system_id=TX.system_id,
+            talkgroup_id=TX.talkgroup_id,
+            startTime=TX.startTime,
+        )
+        for token in tokenize(TX.transcript)
+    ]
+
+
+def catalog_tokens(instance) -> list:
+    """
+    Builds the unsaved CatalogToken rows of a TalkGroup or Unit
+    """
+    if isinstance(instance, TalkGroup):
+        return [
+            CatalogToken(token=token, talkgroup_id=instance.UUID)
+            for token in tokenize(
+                instance.decimalID, instance.alphaTag, instance.description
+            )
+        ]
+
+    return [
+        CatalogToken(token=token, unit_id=instance.UUID)
+        for token in tokenize(instance.decimalID, instance.description)
+    ]
+
+
+def index_transmission(TX: Transmission) -> None:
+    TranscriptToken.objects.filter(transmission_id=TX.UUID).delete()
+    TranscriptToken.objects.bulk_create(transcript_tokens(TX), ignore_conflicts=True)
+
+
+def index_catalog(instance) -> None:
+    if isinstance(instance, TalkGroup):
+        CatalogToken.objects.filter(talkgroup_id=instance.UUID).delete()
+    else:
+        CatalogToken.objects.filter(unit_id=instance.UUID).delete()
+    CatalogToken.objects.bulk_create(catalog_tokens(instance))
+
+
+def rebuild_search_index(batch_size: int = 1000) -> tuple[int, int]:
+    """
+    Rebuilds both token tables, returns (transcripts indexed, catalog rows indexed)
+    """
+    TranscriptToken.objects.all().delete()
+    CatalogToken.objects.all().delete()
+
+    # Walk the table in pk ordered batches so memory stays flat
+    transcripts = 0
+    TXs = (
+        Transmission.objects.exclude(transcript__isnull=True)
+        .exclude(transcript="")
+        .only("UUID", "system", "talkgroup", "startTime", "transcript")
+        .order_by("pk")
+    )
+    batch = list(TXs[:batch_size])
+    while batch:
+        TranscriptToken.objects.bulk_create(
+            [row for TX in batch for row in transcript_tokens(TX)],
+            ignore_conflicts=True,
+        )
+        transcripts += len(batch)
+        batch = list(TXs.filter(pk__gt=batch[-1].pk)[:batch_size])
+
+    catalog = 0
+    for model in (TalkGroup, Unit):
+        for instance in model.objects.iterator(chunk_size=batch_size):
+            CatalogToken.objects.bulk_create(catalog_tokens(instance))
+            catalog += 1
+
+    return transcripts, catalog
+
+
+def transcript_matches(query: str, after=None, before=None):
+    """
+    Queryset of the Transmission UUIDs whose transcript holds every token of query
+    """
+    tokens = tokenize(query)
+    rows = TranscriptToken.objects.filter(token__in=tokens)
+    if after:
+        rows = rows.filter(startTime__gt=after)
+    if before:
+        rows = rows.filter(startTime__lt=before)
+
+    # Tokens are distinct per Transmission, so a full match has one row per token
+    if len(tokens) > 1:
+        rows = (
+            rows.values("transmission")
+            .annotate(matched=Count("token"))
+            .filter(matched=len(tokens))
+        )
+    return rows.values("transmission")
+
+
+def catalog_filter(queryset, query: str, field: str):
+    """
+    Narrows a TalkGroup or Unit queryset to rows matching every token of query
+
+    Tokens match as prefixes, so partial words work as the user types
+    """
+    for token in tokenize(query):
+        queryset = queryset.filter(
+            UUID__in=CatalogToken.objects.filter(token__startswith=token).values(field)
+        )
+    return queryset
+
+
+@receiver(signals.post_save, sender=Transmission)
+def transmission_saved(sender, instance, created, **kwargs):
+    # Ingest bulk inserts (no signal) without transcripts, this covers edits
+    if created and not instance.transcript:
+        return
+    index_transmission(instance)
+
+
+@receiver(signals.post_save, sender=TalkGroup)
+@receiver(signals.post_save, sender=Unit)
+def catalog_saved(sender, instance, created, **kwargs):
+    index_catalog(instance)
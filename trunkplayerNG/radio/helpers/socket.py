@@ -30,14 +30,17 @@ logger = logging.getLogger(__name__)
 
 @sio.event
 def tx_request(sid, message):
-    from radio.helpers.utils import user_allowed_to_access_transmission, UUIDEncoder
-    from radio.models import Transmission
+    from radio.helpers.utils import (
+        transmission_queryset,
+        user_allowed_to_access_transmission,
+        UUIDEncoder,
+    )
     from radio.serializers import TransmissionListSerializer
 
     try:
         session = sio.get_session(sid)
         User = session["user"]
-        TX = Transmission.objects.get(UUID=message["UUID"])
+        TX = transmission_queryset().get(UUID=message["UUID"])
 
         if user_allowed_to_access_transmission(TX, User.userProfile.UUID):
             resp = TransmissionListSerializer(TX)
@@ -0,0 +1,63 @@
+import logging, time
+
+from django.conf import settings
+
+from radio.helpers.alerts import alert_index_stats
+from radio.helpers.cache import resolution_cache_stats
+from radio.helpers.delivery import delivery_stats
+from radio.helpers.emitter import emitter_stats
+from radio.helpers.fanout import fanout_stats
+
+if settings.SEND_TELEMETRY:
+    from sentry_sdk import capture_exception
+
+logger = logging.getLogger(__name__)
+
+_worker_stats = {}
+_worker_stats_checked = float("-inf")
+
+
+def process_stats() -> dict:
+    """
+    Ingest and delivery counters of this process
+    """
+    return {
+        "resolutionCache": resolution_cache_stats(),
+        "socketEmitter": emitter_stats(),
+        "fanout": fanout_stats(),
+        "alertIndex": alert_index_stats(),
+        "appriseDelivery": delivery_stats(),
+    }
+
+
+def worker_stats() -> dict:
+    """
+    process_stats() of every celery worker by hostname, cached for
+    INGEST_BACKLOG_CACHE_SECONDS
+
+    Workers answer the radio_stats remote control command from the process that
+    runs their tasks (gevent pool), so the counters are the ones tasks update
+    """
+    from trunkplayerNG.celery import app
+
+    global _worker_stats, _worker_stats_checked
+
+    age = time.monotonic() - _worker_stats_checked
+    if age < settings.INGEST_BACKLOG_CACHE_SECONDS:
+        return _worker_stats
+
+    try:
+        replies = app.control.broadcast(
+            "radio_stats", reply=True, timeout=settings.WORKER_STATS_TIMEOUT
+        )
+        _worker_stats = {
+            hostname: stats for reply in replies for hostname, stats in reply.items()
+        }
+    except Exception as e:
+        if settings.SEND_TELEMETRY:
+            capture_exception(e)
+        logger.warning(f"[!] UNABLE TO READ WORKER STATS - {str(e)}")
+        _worker_stats = {}
+
+    _worker_stats_checked = time.monotonic()
+    return _worker_stats
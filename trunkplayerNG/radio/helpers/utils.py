@@ -2,21 +2,39 @@ import uuid, logging, json
 
 from django.utils import timezone
 from django.conf import settings
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import Prefetch, Q
 
 from uuid import UUID
 
 from radio.models import (
     System,
-    SystemACL,
     SystemRecorder,
     TalkGroup,
     TalkGroupACL,
     Transmission,
+    TransmissionFeed,
     TransmissionFreq,
     Unit,
     TransmissionUnit,
     UserProfile,
+    UserVisibility,
+)
+
+from radio.helpers.cache import (
+    get_recorder,
+    get_recorder_policy,
+    get_system,
+    get_talkgroup,
+)
+from radio.helpers.feed import SRC_ORDER, feed_enabled
+from radio.helpers.search import index_catalog
+from radio.helpers.versions import bump_version
+from radio.helpers.visibility import (
+    refresh_talkgroup_visibility,
+    user_can_view,
+    visible_systems,
+    visible_talkgroups,
 )
 
 if settings.SEND_TELEMETRY:
@@ -42,7 +60,9 @@ class TransmissionSrc:
         self.emergency = payload.get("emergency") in ("true", "1", "t")
         self.signal_system = payload.get("signal_system")
         self.tag = payload.get("tag")
-        self.time = timezone.datetime.fromtimestamp(payload.get("time")).isoformat()
+        self.time = timezone.datetime.fromtimestamp(
+            payload.get("time"), tz=timezone.utc
+        ).isoformat()
 
     def _to_json(self) -> dict:
         """
@@ -58,15 +78,11 @@ class TransmissionSrc:
         }
         return payload
 
-    def _create(self, system) -> str:
+    def _build(self, unit: Unit) -> TransmissionUnit:
         """
-        Creates a new Transmission Unit
+        Builds an unsaved Transmission Unit for bulk creation
         """
-        unit, created = Unit.objects.get_or_create(
-            system=system, decimalID=int(self.src)
-        )
-        unit.save()
-        TXS = TransmissionUnit(
+        return TransmissionUnit(
             UUID=uuid.uuid4(),
             unit=unit,
             time=self.time,
@@ -75,8 +91,6 @@ class TransmissionSrc:
             signal_system=self.signal_system,
             tag=self.tag,
         )
-        TXS.save()
-        return str(TXS.UUID)
 
 
 class TransmissionFrequency:
@@ -89,7 +103,9 @@ class TransmissionFrequency:
         self.len = payload.get("len")
         self.error_count = payload.get("error_count")
         self.spike_count = payload.get("spike_count")
-        self.time = timezone.datetime.fromtimestamp(payload.get("time"))
+        self.time = timezone.datetime.fromtimestamp(
+            payload.get("time"), tz=timezone.utc
+        )
 
     def _to_json(self) -> dict:
         """
@@ -107,11 +123,11 @@ class TransmissionFrequency:
 
         return payload
 
-    def _create(self) -> str:
+    def _build(self) -> TransmissionFreq:
         """
-        Create a Transission Freq
+        Builds an unsaved Transission Freq for bulk creation
         """
-        TF = TransmissionFreq(
+        return TransmissionFreq(
             UUID=uuid.uuid4(),
             time=self.time,
             freq=self.freq,
@@ -120,8 +136,6 @@ class TransmissionFrequency:
             error_count=self.error_count,
             spike_count=self.spike_count,
         )
-        TF.save()
-        return str(TF.UUID)
 
 
 class TransmissionDetails:
@@ -137,160 +151,160 @@ class TransmissionDetails:
         self.source = payload.get("source")
 
         self.start_time = timezone.datetime.fromtimestamp(
-            payload.get("start_time")
-        ).isoformat()
+            payload.get("start_time"), tz=timezone.utc
+        )
         self.stop_time = timezone.datetime.fromtimestamp(
-            payload.get("stop_time")
-        ).isoformat()
+            payload.get("stop_time"), tz=timezone.utc
+        )
 
         self.emergency = payload.get("emergency") in ("true", "1", "t")
         self.encrypted = payload.get("encrypted") in ("true", "1", "t")
 
-        if "freqList" in payload:
-            self.freqList = [
-                TransmissionFrequency(freq) for freq in payload["freqList"]
-            ]
+        self.freqList = [
+            TransmissionFrequency(freq) for freq in payload.get("freqList", [])
+        ]
+        self.srcList = [TransmissionSrc(src) for src in payload.get("srcList", [])]
 
-        if "srcList" in payload:
-            self.srcList = [TransmissionSrc(src) for src in payload["srcList"]]
-
-    def _to_json(self) -> dict:
+    def _get_talkgroup(self, system: System) -> TalkGroup:
         """
-        Convert Transmission Details object to dict
+        Gets or creates the Talkgroup for the Transmission
         """
-        system: System = System.objects.get(UUID=self.system)
+        Talkgroup = get_talkgroup(system, self.talkgroup)
+        if Talkgroup:
+            return Talkgroup
 
         if self.talkgroup_tag == "-":
             alphatag = self.talkgroup
         else:
             alphatag = self.talkgroup_tag
 
-        if TalkGroup.objects.filter(decimalID=self.talkgroup, system=system):
-            Talkgroup = TalkGroup.objects.get(decimalID=self.talkgroup, system=system)
-            created = False
-        else:
-            Talkgroup, created = TalkGroup.objects.get_or_create(
-                decimalID=self.talkgroup, system=system, alphaTag=alphatag
+        # Concurrent ingest of a new talkgroup resolves to whichever insert won
+        NewTalkgroup = TalkGroup(
+            UUID=uuid.uuid4(),
+            system=system,
+            decimalID=self.talkgroup,
+            alphaTag=alphatag,
+        )
+        TalkGroup.objects.bulk_create([NewTalkgroup], ignore_conflicts=True)
+        Talkgroup = TalkGroup.objects.get(system=system, decimalID=self.talkgroup)
+
+        if Talkgroup.UUID == NewTalkgroup.UUID:
+            ACLTalkgroups = TalkGroupACL.allowedTalkgroups.through
+            ACLTalkgroups.objects.bulk_create(
+                [
+                    ACLTalkgroups(talkgroupacl_id=aclUUID, talkgroup_id=Talkgroup.UUID)
+                    for aclUUID in TalkGroupACL.objects.filter(
+                        defaultNewTalkgroups=True
+                    ).values_list("UUID", flat=True)
+                ]
             )
-            Talkgroup.save()
-
-        if created:
-            for acl in TalkGroupACL.objects.filter(defaultNewTalkgroups=True):
-                acl: TalkGroupACL
-                acl.allowedTalkgroups.add(Talkgroup)
-                acl.save()
-
-        payload = {
-            "startTime": self.start_time,
-            "endTime": self.stop_time,
-            "talkgroup": str(Talkgroup.UUID),
-            "encrypted": self.encrypted,
-            "emergency": self.emergency,
-            "units": [],
-            "frequencys": [],
-            "frequency": self.freq,
-            "length": self.call_length,
-        }
-
-        payload["units"] = [unit._create(system) for unit in self.srcList]
-        payload["frequencys"] = [Freq._create() for Freq in self.freqList]
-
-        return payload
+            # The bulk insert skips post_save and m2m_changed. The refresh locks
+            # the talkgroup, so it runs after the ingest transaction commits
+            bump_version("TalkGroup")
+            transaction.on_commit(lambda: refresh_talkgroup_visibility(Talkgroup))
+            index_catalog(Talkgroup)
+
+        return Talkgroup
+
+    def _build(
+        self,
+        UUID: str,
+        recorder: SystemRecorder,
+        talkgroup: TalkGroup,
+        audioFile,
+    ) -> Transmission:
+        """
+        Builds an unsaved Transmission for bulk creation
+        """
+        return Transmission(
+            UUID=UUID,
+            system=recorder.system,
+            recorder=recorder,
+            startTime=self.start_time,
+            endTime=self.stop_time,
+            audioFile=audioFile,
+            talkgroup=talkgroup,
+            encrypted=self.encrypted,
+            emergency=self.emergency,
+            frequency=self.freq,
+            length=self.call_length,
+        )
 
     def validate_upload(self, recorderUUID: str) -> bool:
         """
         Validate that user is allowed to post TG
         """
-        system: System = System.objects.get(UUID=self.system)
-        recorder: SystemRecorder = SystemRecorder.objects.get(
-            forwarderWebhookUUID=recorderUUID
-        )
-
-        if (
-            len(recorder.talkgroupsAllowed.all()) > 0
-            and len(recorder.talkgroupsDenyed.all()) == 0
-        ):
-            talkgroup = TalkGroup.objects.filter(UUID=self.talkgroup)
-            if talkgroup in recorder.talkgroupsAllowed.all():
-                return True
-            else:
-                return False
-        elif (
-            len(recorder.talkgroupsAllowed.all()) == 0
-            and len(recorder.talkgroupsDenyed.all()) > 0
-        ):
-            talkgroup = TalkGroup.objects.filter(UUID=self.talkgroup)
-            if talkgroup in recorder.talkgroupsDenyed.all():
-                return False
-            else:
-                return True
-        elif (
-            len(recorder.talkgroupsAllowed.all()) > 0
-            and len(recorder.talkgroupsDenyed.all()) > 0
-        ):
-            talkgroup = TalkGroup.objects.filter(UUID=self.talkgroup)
-            if talkgroup in recorder.talkgroupsDenyed.all():
-                return False
-            else:
-                if talkgroup in recorder.talkgroupsAllowed.all():
-                    return True
-                else:
-                    return False
-        elif (
-            len(recorder.talkgroupsAllowed.all()) == 0
-            and len(recorder.talkgroupsDenyed.all()) == 0
-        ):
-            return True
+        system: System = get_system(self.system)
+        recorder: SystemRecorder = get_recorder(recorderUUID)
+        return get_recorder_policy(recorder).allows(system.pk, self.talkgroup)
 
 
 def get_user_allowed_systems(UserUUID: str) -> tuple[list, list]:
-    userACLs = SystemACL.objects.filter(Q(users__UUID=UserUUID) | Q(public=True))
-    Systems = System.objects.filter(systemACL__in=userACLs)
+    Systems = visible_systems(UserUUID)
     systemUUIDs = list(Systems.values_list("UUID", flat=True))
     return systemUUIDs, Systems
 
 
 def get_user_allowed_talkgroups(System: System, UserUUID: str) -> list:
-    if not System.enableTalkGroupACLs:
-        return TalkGroup.objects.filter(system=System)
+    return visible_talkgroups(UserUUID).filter(system=System)
+
+
+def transmission_queryset():
+    """
+    Transmissions with everything the Transmission serializers touch loaded up front
+    """
+    units = TransmissionUnit.objects.select_related("unit").order_by(*SRC_ORDER)
+    frequencys = TransmissionFreq.objects.order_by(*SRC_ORDER)
+    return Transmission.objects.select_related(
+        "talkgroup", "system", "recorder"
+    ).prefetch_related(
+        "talkgroup__agency",
+        Prefetch("units", queryset=units),
+        Prefetch("frequencys", queryset=frequencys),
+    )
 
-    ACLs = TalkGroupACL.objects.filter(users__UUID=UserUUID)
-    Allowed = list(ACLs.values_list("allowedTalkgroups__UUID", flat=True))
-    AllowedTalkgropups = TalkGroup.objects.filter(UUID__in=Allowed)
 
-    return AllowedTalkgropups
+def transmission_list_queryset():
+    """
+    Source of the transmission list endpoints, TransmissionFeed when enabled
+    """
+    if feed_enabled():
+        return TransmissionFeed.objects.all()
+    return transmission_queryset()
 
 
-def user_allowed_to_access_transmission(
-    Transmission: Transmission, UserUUID: str
-) -> list:
-    allowed_tgs = get_user_allowed_talkgroups(Transmission.system, UserUUID=UserUUID)
+def visible_transmissions(user: UserProfile, queryset=None):
+    """
+    Lazy queryset of the Transmissions a user may see, ACLs applied in SQL
 
-    if Transmission.talkgroup in allowed_tgs:
-        return True
+    queryset may also be TransmissionFeed rows, they share system and talkgroup
+    """
+    if queryset is None:
+        queryset = transmission_queryset()
 
-    return False
+    if user.siteAdmin:
+        return queryset
 
+    rows = UserVisibility.objects.filter(user=user)
+    return queryset.filter(
+        Q(system__in=rows.filter(allTalkgroups=True).values("system"))
+        | Q(talkgroup__in=rows.filter(talkgroup__isnull=False).values("talkgroup"))
+    )
 
-def get_user_allowed_download_talkgroups(System: System, UserUUID: str) -> list:
-    if not System.enableTalkGroupACLs:
-        return TalkGroup.objects.filter(system=System)
 
-    ACLs = TalkGroupACL.objects.filter(users__UUID=UserUUID, downloadAllowed=True)
-    Allowed = list(ACLs.values_list("allowedTalkgroups__UUID", flat=True))
-    AllowedTalkgropups = TalkGroup.objects.filter(UUID__in=Allowed)
+def user_allowed_to_access_transmission(
+    Transmission: Transmission, UserUUID: str
+) -> bool:
+    return user_can_view(UserUUID, Transmission.system_id, Transmission.talkgroup_id)
+
 
-    return AllowedTalkgropups
+def get_user_allowed_download_talkgroups(System: System, UserUUID: str) -> list:
+    return visible_talkgroups(UserUUID, download=True).filter(system=System)
 
 
 def user_allowed_to_download_transmission(
     Transmission: Transmission, UserUUID: str
-) -> list:
-    allowed_tgs = get_user_allowed_download_talkgroups(
-        Transmission.system, UserUUID=UserUUID
+) -> bool:
+    return user_can_view(
+        UserUUID, Transmission.system_id, Transmission.talkgroup_id, download=True
     )
-
-    if Transmission.talkgroup in allowed_tgs:
-        return True
-
-    return False
@@ -0,0 +1,95 @@
+import logging
+
+from django.db import transaction
+from django.db.models import F, signals
+
+from radio.models import (
+    Agency,
+    City,
+    ModelVersion,
+    ScanList,
+    Scanner,
+    System,
+    SystemACL,
+    SystemRecorder,
+    TalkGroup,
+    TalkGroupACL,
+    Unit,
+)
+
+
+logger = logging.getLogger(__name__)
+
+# Models whose saves, deletes and M2M changes bump their counter
+TRACKED_MODELS = (
+    Agency,
+    City,
+    ScanList,
+    Scanner,
+    System,
+    SystemACL,
+    SystemRecorder,
+    TalkGroup,
+    TalkGroupACL,
+    Unit,
+)
+
+# Not a model, bumped by radio.helpers.visibility whenever ACL results change
+VISIBILITY = "UserVisibility"
+
+
+def get_versions(names: list) -> dict:
+    """
+    Current counter of each name, 0 for names never bumped
+    """
+    versions = dict.fromkeys(names, 0)
+    versions.update(
+        ModelVersion.objects.filter(name__in=names).values_list("name", "version")
+    )
+    return versions
+
+
+def bump_version(name: str) -> None:
+    """
+    Increments the counter of name once the current transaction commits
+
+    After commit, so a reader can never pair an old snapshot with the new version
+    and the counter row is not locked for the length of the writer's transaction
+    """
+    transaction.on_commit(lambda: _bump(name))
+
+
+def _bump(name: str) -> None:
+    if ModelVersion.objects.filter(name=name).update(version=F("version") + 1):
+        return
+
+    ModelVersion.objects.bulk_create(
+        [ModelVersion(name=name, version=0)], ignore_conflicts=True
+    )
+    ModelVersion.objects.filter(name=name).update(version=F("version") + 1)
+
+
+def _changed(sender, **kwargs):
+    bump_version(sender.__name__)
+
+
+def _m2m_changed(sender, action, **kwargs):
+    if action.startswith("post_"):
+        for model in _m2m_owners[sender]:
+            bump_version(model.__name__)
+
+
+# Through model -> tracked models on either side of it
+_m2m_owners = {}
+
+for model in TRACKED_MODELS:
+    signals.post_save.connect(_changed, sender=model, weak=False)
+    signals.post_delete.connect(_changed, sender=model, weak=False)
+
+    for field in model._meta.many_to_many:
+        _m2m_owners.setdefault(field.remote_field.through, set()).add(model)
+        if field.related_model in TRACKED_MODELS:
+            _m2m_owners[field.remote_field.through].add(field.related_model)
+
+for through in _m2m_owners:
+    signals.m2m_changed.connect(_m2m_changed, sender=through, weak=False)
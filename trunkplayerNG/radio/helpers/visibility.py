@@ -0,0 +1,387 @@
+import hashlib, logging
+
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Q, signals
+from django.dispatch import receiver
+
+from radio.helpers.versions import VISIBILITY, bump_version
+from radio.models import (
+    System,
+    SystemACL,
+    TalkGroup,
+    TalkGroupACL,
+    UserProfile,
+    UserVisibility,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+def user_can_view(
+    UserUUID: str, systemUUID: str, talkgroupUUID: str, download: bool = False
+) -> bool:
+    """
+    Single indexed lookup of whether a user may see (or download) a talkgroup
+    """
+    rows = UserVisibility.objects.filter(user_id=UserUUID, system_id=systemUUID).filter(
+        Q(talkgroup__isnull=True, allTalkgroups=True) | Q(talkgroup_id=talkgroupUUID)
+    )
+    if download:
+        rows = rows.filter(download=True)
+    return rows.exists()
+
+
+def visible_systems(UserUUID: str):
+    """
+    Queryset of the Systems a user may see
+    """
+    return System.objects.filter(
+        UUID__in=UserVisibility.objects.filter(
+            user_id=UserUUID, talkgroup__isnull=True
+        ).values("system")
+    )
+
+
+def unrestricted_systems(UserUUID: str):
+    """
+    Queryset of the Systems a user may see every talkgroup of
+    """
+    return System.objects.filter(
+        UUID__in=UserVisibility.objects.filter(
+            user_id=UserUUID, talkgroup__isnull=True, allTalkgroups=True
+        ).values("system")
+    )
+
+
+def visible_talkgroups(UserUUID: str, download: bool = False):
+    """
+    Queryset of the TalkGroups a user may see (or download)
+    """
+    rows = UserVisibility.objects.filter(user_id=UserUUID)
+    if download:
+        rows = rows.filter(download=True)
+
+    return TalkGroup.objects.filter(
+        Q(system__in=rows.filter(allTalkgroups=True).values("system"))
+        | Q(UUID__in=rows.filter(talkgroup__isnull=False).values("talkgroup"))
+    )
+
+
+def acl_scope(user: UserProfile, version: int) -> str:
+    """
+    Hash shared by every user holding the same ACLs, they see exactly the same rows
+
+    version is the current UserVisibility counter, memberships only change with it
+    """
+    if user is None:
+        return "anonymous"
+    if user.siteAdmin:
+        return "admin"
+
+    key = f"acl-scope:{user.UUID}:{version}"
+    scope = caches["responses"].get(key)
+    if scope is None:
+        systemACLs = user.systemacl_set.values_list("UUID", flat=True)
+        talkgroupACLs = user.talkgroupacl_set.values_list("UUID", flat=True)
+        ACLs = sorted(
+            [
+                *(f"s:{UUID}" for UUID in systemACLs),
+                *(f"t:{UUID}" for UUID in talkgroupACLs),
+            ]
+        )
+        scope = hashlib.sha1("|".join(ACLs).encode()).hexdigest()
+        caches["responses"].set(key, scope, settings.RESPONSE_CACHE_TIMEOUT)
+
+    return scope
+
+
+def visibility_rows(userUUIDs: list = None, systemUUIDs: list = None) -> list:
+    """
+    Computes the UserVisibility rows of userUUIDs on systemUUIDs (every one when None)
+    """
+    systems = System.objects.all()
+    if systemUUIDs is not None:
+        systems = systems.filter(UUID__in=systemUUIDs)
+    systems = list(systems.values_list("UUID", "systemACL_id", "enableTalkGroupACLs"))
+    publicACLs = set(
+        SystemACL.objects.filter(public=True).values_list("UUID", flat=True)
+    )
+
+    if userUUIDs is None and systemUUIDs is not None:
+        # Only members of the systems' ACLs can see them, unless one is public
+        ACLs = {aclUUID for _, aclUUID, _ in systems}
+        if not ACLs & publicACLs:
+            userUUIDs = SystemACL.users.through.objects.filter(
+                systemacl_id__in=ACLs
+            ).values_list("userprofile_id", flat=True)
+
+    def scoped(queryset, field: str):
+        if userUUIDs is None:
+            return queryset
+        return queryset.filter(**{f"{field}__in": userUUIDs})
+
+    users = list(scoped(UserProfile.objects, "UUID").values_list("UUID", flat=True))
+    if not users or not systems:
+        return []
+
+    systemACLs = defaultdict(set)
+    for aclUUID, userUUID in scoped(
+        SystemACL.users.through.objects, "userprofile_id"
+    ).values_list("systemacl_id", "userprofile_id"):
+        systemACLs[userUUID].add(aclUUID)
+
+    talkgroupACLs = defaultdict(set)
+    for aclUUID, userUUID in scoped(
+        TalkGroupACL.users.through.objects, "userprofile_id"
+    ).values_list("talkgroupacl_id", "userprofile_id"):
+        talkgroupACLs[userUUID].add(aclUUID)
+
+    downloadAllowed = dict(TalkGroupACL.objects.values_list("UUID", "downloadAllowed"))
+    aclTalkgroups = defaultdict(list)
+    links = TalkGroupACL.allowedTalkgroups.through.objects.filter(
+        talkgroupacl_id__in=set().union(*talkgroupACLs.values())
+    )
+    if systemUUIDs is not None:
+        links = links.filter(talkgroup__system_id__in=systemUUIDs)
+    for aclUUID, talkgroupUUID, systemUUID in links.values_list(
+        "talkgroupacl_id", "talkgroup_id", "talkgroup__system_id"
+    ):
+        aclTalkgroups[aclUUID].append((talkgroupUUID, systemUUID))
+
+    rows = []
+    for user in users:
+        ACLs = publicACLs | systemACLs[user]
+        # System UUID -> talkgroup ACLs enabled, for the systems the user can see
+        seen = {}
+        for systemUUID, aclUUID, enableTalkGroupACLs in systems:
+            if aclUUID in ACLs:
+                seen[systemUUID] = enableTalkGroupACLs
+                rows.append(
+                    UserVisibility(
+                        user_id=user,
+                        system_id=systemUUID,
+                        allTalkgroups=not enableTalkGroupACLs,
+                        download=not enableTalkGroupACLs,
+                    )
+                )
+
+        talkgroups = {}
+        for aclUUID in talkgroupACLs[user]:
+            for talkgroupUUID, systemUUID in aclTalkgroups[aclUUID]:
+                if not seen.get(systemUUID):
+                    continue
+                download = talkgroups.get(talkgroupUUID, (None, False))[1]
+                talkgroups[talkgroupUUID] = (
+                    systemUUID,
+                    download or downloadAllowed[aclUUID],
+                )
+
+        for talkgroupUUID, (systemUUID, download) in talkgroups.items():
+            rows.append(
+                UserVisibility(
+                    user_id=user,
+                    system_id=systemUUID,
+                    talkgroup_id=talkgroupUUID,
+                    download=download,
+                )
+            )
+
+    return rows
+
+
+def rebuild_visibility(userUUIDs: list = None, systemUUIDs: list = None) -> int:
+    """
+    Replaces the UserVisibility rows of userUUIDs on systemUUIDs (every one when None)
+
+    Computed while holding the row locks of those systems or users, so two
+    rebuilds of the same rows queue up instead of inserting them twice
+    """
+    if userUUIDs is not None:
+        userUUIDs = list(userUUIDs)
+        if not userUUIDs:
+            return 0
+    if systemUUIDs is not None:
+        systemUUIDs = list(systemUUIDs)
+        if not systemUUIDs:
+            return 0
+
+    with transaction.atomic():
+        if systemUUIDs is not None:
+            locked = System.objects.filter(UUID__in=systemUUIDs)
+        elif userUUIDs is not None:
+            locked = UserProfile.objects.filter(UUID__in=userUUIDs)
+        else:
+            locked = UserProfile.objects.all()
+        list(locked.select_for_update().order_by("UUID").values_list("UUID"))
+
+        rows = visibility_rows(userUUIDs, systemUUIDs)
+        existing = UserVisibility.objects.all()
+        if userUUIDs is not None:
+            existing = existing.filter(user_id__in=userUUIDs)
+        if systemUUIDs is not None:
+            existing = existing.filter(system_id__in=systemUUIDs)
+        existing.delete()
+        # A rebuild scoped the other way may have written some of them already
+        UserVisibility.objects.bulk_create(rows, batch_size=1000, ignore_conflicts=True)
+
+    bump_version(VISIBILITY)
+
+    return len(rows)
+
+
+def refresh_talkgroup_visibility(talkgroup: TalkGroup) -> None:
+    """
+    Recomputes the rows of one talkgroup, cheaper than a user rebuild
+
+    Used where talkgroup ACL links are written without m2m_changed (ingest)
+    """
+    with transaction.atomic():
+        list(
+            TalkGroup.objects.select_for_update()
+            .filter(UUID=talkgroup.UUID)
+            .values_list("UUID")
+        )
+        UserVisibility.objects.filter(talkgroup=talkgroup).delete()
+        bump_version(VISIBILITY)
+
+        if not System.objects.filter(
+            UUID=talkgroup.system_id, enableTalkGroupACLs=True
+        ).exists():
+            return
+
+        # Users that can see the system, system rows are kept current by the rebuilds
+        seen = UserVisibility.objects.filter(
+            system_id=talkgroup.system_id, talkgroup__isnull=True
+        ).values("user")
+
+        download = defaultdict(bool)
+        for userUUID, downloadAllowed in TalkGroupACL.users.through.objects.filter(
+            talkgroupacl__allowedTalkgroups=talkgroup, userprofile_id__in=seen
+        ).values_list("userprofile_id", "talkgroupacl__downloadAllowed"):
+            download[userUUID] |= downloadAllowed
+
+        UserVisibility.objects.bulk_create(
+            [
+                UserVisibility(
+                    user_id=userUUID,
+                    system_id=talkgroup.system_id,
+                    talkgroup=talkgroup,
+                    download=downloadAllowed,
+                )
+                for userUUID, downloadAllowed in download.items()
+            ],
+            ignore_conflicts=True,
+        )
+
+
+def _users_changed(instance, action: str, reverse: bool, pk_set) -> None:
+    if reverse:
+        if action.startswith("post_"):
+            rebuild_visibility([instance.pk])
+        return
+
+    if action == "pre_clear":
+        # pk_set is not sent for clear, remember who is about to lose access
+        instance._visibilityUsers = list(instance.users.values_list("UUID", flat=True))
+    elif action == "post_clear":
+        rebuild_visibility(getattr(instance, "_visibilityUsers", None))
+    elif action.startswith("post_"):
+        rebuild_visibility(pk_set)
+
+
+@receiver(signals.m2m_changed, sender=SystemACL.users.through)
+@receiver(signals.m2m_changed, sender=TalkGroupACL.users.through)
+def acl_users_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    _users_changed(instance, action, reverse, pk_set)
+
+
+@receiver(signals.m2m_changed, sender=TalkGroupACL.allowedTalkgroups.through)
+def talkgroup_acl_talkgroups_changed(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    if not action.startswith("post_"):
+        return
+
+    if reverse:
+        refresh_talkgroup_visibility(instance)
+    else:
+        rebuild_visibility(instance.users.values_list("UUID", flat=True))
+
+
+@receiver(signals.post_save, sender=TalkGroupACL)
+def talkgroup_acl_saved(sender, instance, created, **kwargs):
+    if not created:
+        rebuild_visibility(instance.users.values_list("UUID", flat=True))
+
+
+@receiver(signals.pre_delete, sender=TalkGroupACL)
+def talkgroup_acl_deleting(sender, instance, **kwargs):
+    instance._visibilityUsers = list(instance.users.values_list("UUID", flat=True))
+
+
+@receiver(signals.post_delete, sender=TalkGroupACL)
+def talkgroup_acl_deleted(sender, instance, **kwargs):
+    rebuild_visibility(getattr(instance, "_visibilityUsers", []))
+
+
+# Fields whose edits change what users can see
+ACL_FIELDS = {
+    System: ("systemACL_id", "enableTalkGroupACLs"),
+    SystemACL: ("public",),
+    TalkGroup: ("system_id",),
+}
+
+
+@receiver(signals.pre_save, sender=System)
+@receiver(signals.pre_save, sender=SystemACL)
+@receiver(signals.pre_save, sender=TalkGroup)
+def acl_fields_saving(sender, instance, **kwargs):
+    instance._visibilityFields = None
+    if not instance._state.adding:
+        instance._visibilityFields = (
+            sender.objects.filter(pk=instance.pk)
+            .values_list(*ACL_FIELDS[sender])
+            .first()
+        )
+
+
+def _acl_fields_changed(instance) -> bool:
+    fields = tuple(getattr(instance, field) for field in ACL_FIELDS[type(instance)])
+    return getattr(instance, "_visibilityFields", None) != fields
+
+
+@receiver(signals.post_save, sender=System)
+def system_saved(sender, instance, created, **kwargs):
+    # Only the rows of this system depend on its ACL settings
+    if created or _acl_fields_changed(instance):
+        rebuild_visibility(systemUUIDs=[instance.pk])
+
+
+@receiver(signals.post_save, sender=SystemACL)
+def system_acl_saved(sender, instance, created, **kwargs):
+    # public reaches every user of the systems behind this ACL
+    if not created and _acl_fields_changed(instance):
+        rebuild_visibility(
+            systemUUIDs=System.objects.filter(systemACL=instance).values_list(
+                "UUID", flat=True
+            )
+        )
+
+
+@receiver(signals.post_save, sender=TalkGroup)
+def talkgroup_saved(sender, instance, created, **kwargs):
+    # New talkgroups have no ACL links yet, only a move to another system matters
+    if not created and _acl_fields_changed(instance):
+        refresh_talkgroup_visibility(instance)
+
+
+@receiver(signals.post_save, sender=UserProfile)
+def user_profile_saved(sender, instance, created, **kwargs):
+    # New users see every public system straight away
+    if created:
+        rebuild_visibility([instance.pk])
@@ -0,0 +1,57 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from radio.benchmarks.alerts import run
+
+
+class Command(BaseCommand):
+    help = "Benchmarks UserAlert matching against a throwaway test database"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--alerts", type=int, default=10000)
+        parser.add_argument("--users", type=int, default=2000)
+        parser.add_argument("--talkgroups", type=int, default=5000)
+        parser.add_argument("--units", type=int, default=20000)
+        parser.add_argument("--talkgroups-per-alert", type=int, default=5)
+        parser.add_argument("--units-per-alert", type=int, default=3)
+        parser.add_argument("--transmissions", type=int, default=1000)
+        parser.add_argument("--units-per-transmission", type=int, default=4)
+        parser.add_argument(
+            "--scan-transmissions",
+            type=int,
+            default=3,
+            help="Transmissions also matched with the old per alert scan",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", help="Write the JSON report to this file")
+
+    def handle(self, *args, **options):
+        config = {
+            "alerts": options["alerts"],
+            "users": options["users"],
+            "talkgroups": options["talkgroups"],
+            "units": options["units"],
+            "talkgroups_per_alert": options["talkgroups_per_alert"],
+            "units_per_alert": options["units_per_alert"],
+            "transmissions": options["transmissions"],
+            "units_per_transmission": options["units_per_transmission"],
+            "scan_transmissions": options["scan_transmissions"],
+            "seed": options["seed"],
+        }
+
+        databaseName = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            report = run(config)
+        finally:
+            connection.creation.destroy_test_db(databaseName, verbosity=0)
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                file.write(output)
+            self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+        else:
+            self.stdout.write(output)
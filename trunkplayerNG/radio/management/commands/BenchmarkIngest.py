@@ -0,0 +1,67 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from radio.benchmarks.ingest import run
+
+
+class Command(BaseCommand):
+    help = "Benchmarks TransmissionCreate against a throwaway test database"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--calls", type=int, default=500)
+        parser.add_argument("--warmup", type=int, default=20)
+        parser.add_argument("--units", type=int, default=5)
+        parser.add_argument("--freqs", type=int, default=3)
+        parser.add_argument("--talkgroups", type=int, default=100)
+        parser.add_argument("--unit-pool", type=int, default=5000)
+        parser.add_argument("--audio-bytes", type=int, default=16000)
+        parser.add_argument("--acl", choices=["none", "allow", "deny"], default="none")
+        parser.add_argument(
+            "--acl-size",
+            type=int,
+            default=100,
+            help="Extra talkgroups padded into the allow/deny list",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--keep-storage",
+            action="store_true",
+            help="Write audio to the configured storage instead of a temp dir",
+        )
+        parser.add_argument("--output", help="Write the JSON report to this file")
+
+    def handle(self, *args, **options):
+        config = {
+            key: options[key]
+            for key in (
+                "calls",
+                "warmup",
+                "units",
+                "freqs",
+                "talkgroups",
+                "unit_pool",
+                "audio_bytes",
+                "acl",
+                "acl_size",
+                "seed",
+                "keep_storage",
+            )
+        }
+
+        # Runs against a test copy of the configured database (SQLite, MySQL, ...)
+        databaseName = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            report = run(config)
+        finally:
+            connection.creation.destroy_test_db(databaseName, verbosity=0)
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                file.write(output)
+            self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+        else:
+            self.stdout.write(output)
@@ -0,0 +1,74 @@
+import random, time, uuid
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from radio.helpers.cache import get_recorder_policy
+from radio.helpers.utils import TransmissionDetails
+from radio.models import System, SystemACL, SystemRecorder, TalkGroup
+
+
+class Command(BaseCommand):
+    help = "Times recorder talkgroup validation against growing allow/deny lists"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes", type=int, nargs="+", default=[0, 10, 100, 1000, 10000]
+        )
+        parser.add_argument("--checks", type=int, default=10000)
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{'list size':>10} {'compile ms':>12} {'check us':>10} {'allowed':>8}"
+        )
+
+        # Everything is created inside a transaction that is always rolled back
+        with transaction.atomic():
+            for size in options["sizes"]:
+                compile_ms, check_us, allowed = self.run(size, options["checks"])
+                self.stdout.write(
+                    f"{size:>10} {compile_ms:>12.2f} {check_us:>10.3f} {allowed:>8}"
+                )
+            transaction.set_rollback(True)
+
+    def run(self, size: int, checks: int) -> tuple[float, float, int]:
+        name = f"bench-{uuid.uuid4()}"
+        acl = SystemACL.objects.create(name=name[:30])
+        system = System.objects.create(name=name, systemACL=acl)
+        recorder = SystemRecorder.objects.create(system=system, name=name[:30])
+
+        TGs = TalkGroup.objects.bulk_create(
+            [
+                TalkGroup(UUID=uuid.uuid4(), system=system, decimalID=decimalID)
+                for decimalID in range(size * 2)
+            ]
+        )
+        recorder.talkgroupsAllowed.add(*TGs[:size])
+        recorder.talkgroupsDenyed.add(*TGs[size:])
+
+        start = time.perf_counter()
+        get_recorder_policy(recorder)
+        compile_ms = (time.perf_counter() - start) * 1000
+
+        details = [
+            TransmissionDetails(
+                {
+                    "system": str(system.UUID),
+                    "talkgroup": decimalID,
+                    "start_time": 0,
+                    "stop_time": 0,
+                }
+            )
+            for decimalID in random.Random(size).choices(
+                range(max(size * 2, 1)), k=1000
+            )
+        ]
+
+        allowed = 0
+        webhookUUID = str(recorder.forwarderWebhookUUID)
+        start = time.perf_counter()
+        for i in range(checks):
+            allowed += details[i % len(details)].validate_upload(webhookUUID)
+        check_us = (time.perf_counter() - start) * 1000000 / checks
+
+        return compile_ms, check_us, allowed
@@ -0,0 +1,46 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from radio.benchmarks.responses import run
+
+
+class Command(BaseCommand):
+    help = "Benchmarks cold vs warm catalog responses against a throwaway test database"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--talkgroups", type=int, default=5000)
+        parser.add_argument("--units", type=int, default=5000)
+        parser.add_argument("--users", type=int, default=5)
+        parser.add_argument("--rounds", type=int, default=5)
+        parser.add_argument(
+            "--talkgroup-acls",
+            action="store_true",
+            help="Enable talkgroup ACLs on the benchmark system",
+        )
+        parser.add_argument("--output", help="Write the JSON report to this file")
+
+    def handle(self, *args, **options):
+        config = {
+            "talkgroups": options["talkgroups"],
+            "units": options["units"],
+            "users": options["users"],
+            "rounds": options["rounds"],
+            "talkgroup_acls": options["talkgroup_acls"],
+        }
+
+        databaseName = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            report = run(config)
+        finally:
+            connection.creation.destroy_test_db(databaseName, verbosity=0)
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                file.write(output)
+            self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+        else:
+            self.stdout.write(output)
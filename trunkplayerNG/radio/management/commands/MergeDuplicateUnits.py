@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from radio.helpers.dedup import merge_duplicate_groups, unit_preference
+from radio.models import Unit
+
+
+class Command(BaseCommand):
+    help = "Merges Units sharing a (system, decimalID) into a single row"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report how many duplicate Units exist",
+        )
+
+    def handle(self, *args, **options):
+        groups = (
+            Unit.objects.values("system", "decimalID")
+            .annotate(copies=Count("UUID"))
+            .filter(copies__gt=1)
+        )
+        duplicates = sum(group["copies"] - 1 for group in groups)
+
+        if options["dry_run"] or not duplicates:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"{duplicates} duplicate Units in {len(groups)} groups"
+                )
+            )
+            return
+
+        with transaction.atomic():
+            removed = merge_duplicate_groups(
+                Unit, ["system", "decimalID"], unit_preference
+            )
+
+        self.stdout.write(self.style.SUCCESS(f"Merged {removed} duplicate Units"))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from radio.helpers.activity import _compact_activity, rebuild_activity
+
+
+class Command(BaseCommand):
+    help = "Recounts the talkgroup and unit activity rollups from Transmissions"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            counted = rebuild_activity(batch_size=options["batch_size"])
+        _compact_activity()
+
+        self.stdout.write(self.style.SUCCESS(f"Counted {counted} Transmissions"))
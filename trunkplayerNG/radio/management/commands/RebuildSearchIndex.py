@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from radio.helpers.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the transcript and talkgroup/unit search token tables"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            transcripts, catalog = rebuild_search_index(
+                batch_size=options["batch_size"]
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Indexed {transcripts} transcripts and {catalog} talkgroups/units"
+            )
+        )
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from radio.helpers.feed import rebuild_feed
+
+
+class Command(BaseCommand):
+    help = "Backfills the denormalized TransmissionFeed table from Transmissions"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--missing",
+            action="store_true",
+            help="Only add rows for Transmissions without one instead of rebuilding",
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            rows = rebuild_feed(
+                batch_size=options["batch_size"], missing_only=options["missing"]
+            )
+
+        self.stdout.write(self.style.SUCCESS(f"Wrote {rows} TransmissionFeed rows"))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from radio.helpers.visibility import rebuild_visibility
+
+
+class Command(BaseCommand):
+    help = "Recomputes the materialized System/TalkGroup ACLs of every user"
+
+    def handle(self, *args, **options):
+        rows = rebuild_visibility()
+        self.stdout.write(self.style.SUCCESS(f"Wrote {rows} visibility rows"))
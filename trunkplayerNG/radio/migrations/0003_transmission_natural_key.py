@@ -0,0 +1,65 @@
+# Generated by Django 3.2.25 on 2026-10-18 08:05
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def remove_duplicate_transmissions(apps, schema_editor):
+    Transmission = apps.get_model("radio", "Transmission")
+    Incident = apps.get_model("radio", "Incident")
+
+    duplicates = (
+        Transmission.objects.values("system", "talkgroup", "startTime", "recorder")
+        .annotate(copies=Count("UUID"))
+        .filter(copies__gt=1)
+    )
+
+    for key in duplicates.iterator():
+        del key["copies"]
+        keep, *extra = Transmission.objects.filter(**key).order_by("UUID")
+
+        for TX in extra:
+            for incident in Incident.objects.filter(transmission=TX):
+                incident.transmission.add(keep)
+            TX.units.all().delete()
+            TX.frequencys.all().delete()
+            if TX.audioFile and TX.audioFile.name != keep.audioFile.name:
+                TX.audioFile.delete(save=False)
+            TX.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('radio', '0002_alter_talkgroup_mode'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='systemacl',
+            name='users',
+            field=models.ManyToManyField(blank=True, to='radio.UserProfile'),
+        ),
+        migrations.AlterField(
+            model_name='transmission',
+            name='frequencys',
+            field=models.ManyToManyField(blank=True, to='radio.TransmissionFreq'),
+        ),
+        migrations.AlterField(
+            model_name='transmission',
+            name='length',
+            field=models.FloatField(default=0.0, null=True),
+        ),
+        migrations.AlterField(
+            model_name='transmission',
+            name='units',
+            field=models.ManyToManyField(blank=True, to='radio.TransmissionUnit'),
+        ),
+        migrations.RunPython(
+            remove_duplicate_transmissions, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name='transmission',
+            constraint=models.UniqueConstraint(fields=('system', 'talkgroup', 'startTime', 'recorder'), name='unique_transmission_natural_key'),
+        ),
+    ]
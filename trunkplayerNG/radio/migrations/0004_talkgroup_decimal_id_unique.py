@@ -0,0 +1,110 @@
+# Generated by Django 3.2.25 on 2026-10-18 08:07
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+# Self contained, migrations only see the historical models
+
+
+def merge_fk(relation, keep, duplicates):
+    field = relation.field.name
+    relation.related_model.objects.filter(**{f"{field}__in": duplicates}).update(
+        **{field: keep}
+    )
+
+
+def merge_transmissions(apps, keep, duplicates):
+    """
+    Repoints the Transmissions of duplicates to keep
+
+    One that would repeat a Transmission already on keep (the 0003 natural key)
+    is folded into it the way 0003 folds duplicates, its audio file is removed
+    """
+    Transmission = apps.get_model("radio", "Transmission")
+    Incident = apps.get_model("radio", "Incident")
+
+    for TX in Transmission.objects.filter(talkgroup__in=duplicates).order_by("UUID"):
+        existing = Transmission.objects.filter(
+            system=TX.system_id,
+            talkgroup=keep,
+            startTime=TX.startTime,
+            recorder=TX.recorder_id,
+        ).first()
+        if existing is None:
+            Transmission.objects.filter(pk=TX.pk).update(talkgroup=keep)
+            continue
+
+        print(f"\n  Folding Transmission {TX.UUID} into {existing.UUID}", end="")
+        for incident in Incident.objects.filter(transmission=TX):
+            incident.transmission.add(existing)
+        TX.units.all().delete()
+        TX.frequencys.all().delete()
+        if TX.audioFile and TX.audioFile.name != existing.audioFile.name:
+            TX.audioFile.delete(save=False)
+        TX.delete()
+
+
+def merge_m2m(relation, keep, duplicates):
+    through = relation.through
+    owner = relation.field.m2m_field_name()
+    target = relation.field.m2m_reverse_field_name()
+
+    linked = set(
+        through.objects.filter(**{target: keep}).values_list(f"{owner}_id", flat=True)
+    )
+    for row in through.objects.filter(**{f"{target}__in": duplicates}):
+        ownerID = getattr(row, f"{owner}_id")
+        if ownerID in linked:
+            row.delete()
+        else:
+            setattr(row, target, keep)
+            row.save()
+            linked.add(ownerID)
+
+
+def merge_duplicate_talkgroups(apps, schema_editor):
+    TalkGroup = apps.get_model("radio", "TalkGroup")
+
+    groups = (
+        TalkGroup.objects.values("system", "decimalID")
+        .annotate(copies=Count("UUID"))
+        .filter(copies__gt=1)
+    )
+
+    for key in groups.iterator():
+        del key["copies"]
+        # Prefer the imported row (it has a description) over auto created copies
+        keep, *duplicates = sorted(
+            TalkGroup.objects.filter(**key),
+            key=lambda talkgroup: (not talkgroup.description, str(talkgroup.UUID)),
+        )
+
+        # Repoint every FK and M2M row to keep, then drop the copies
+        merge_transmissions(apps, keep, duplicates)
+        for relation in TalkGroup._meta.related_objects:
+            if relation.related_model._meta.model_name == "transmission":
+                continue
+            if relation.many_to_many:
+                merge_m2m(relation, keep, duplicates)
+            elif relation.one_to_many or relation.one_to_one:
+                merge_fk(relation, keep, duplicates)
+
+        TalkGroup.objects.filter(
+            UUID__in=[duplicate.UUID for duplicate in duplicates]
+        ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('radio', '0003_transmission_natural_key'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_talkgroups, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='talkgroup',
+            constraint=models.UniqueConstraint(fields=('system', 'decimalID'), name='unique_talkgroup_decimal_id'),
+        ),
+    ]
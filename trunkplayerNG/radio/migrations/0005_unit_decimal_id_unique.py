@@ -0,0 +1,27 @@
+# Generated by Django 3.2.25 on 2026-10-18 08:08
+
+from django.db import migrations, models
+
+from radio.helpers.dedup import merge_duplicate_groups, unit_preference
+
+
+def merge_duplicate_units(apps, schema_editor):
+    # Same merge as manage.py MergeDuplicateUnits, on the historical Unit
+    merge_duplicate_groups(
+        apps.get_model("radio", "Unit"), ["system", "decimalID"], unit_preference
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('radio', '0004_talkgroup_decimal_id_unique'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_units, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='unit',
+            constraint=models.UniqueConstraint(fields=('system', 'decimalID'), name='unique_unit_decimal_id'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.25 on 2026-10-18 08:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('radio', '0005_unit_decimal_id_unique'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transmission',
+            index=models.Index(fields=['startTime', 'UUID'], name='transmission_feed_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 3.2.25 on 2026-10-18 08:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('radio', '0006_transmission_feed_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='transmissionfreq',
+            name='time',
+            field=models.DateTimeField(db_index=True),
+        ),
+        migrations.AddIndex(
+            model_name='transmission',
+            index=models.Index(fields=['talkgroup', '-startTime', '-UUID'], name='tx_talkgroup_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transmission',
+            index=models.Index(fields=['system', '-startTime', '-UUID'], name='tx_system_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transmission',
+            index=models.Index(fields=['system', 'emergency', '-startTime'], name='tx_system_emergency_idx'),
+        ),
+    ]
@@ -0,0 +1,110 @@
+# Generated by Django 3.2.25 on 2026-10-18 08:19
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+from collections import defaultdict
+
+
+# Self contained, migrations only see the historical models
+
+
+def build_user_visibility(apps, schema_editor):
+    UserProfile = apps.get_model("radio", "UserProfile")
+    System = apps.get_model("radio", "System")
+    SystemACL = apps.get_model("radio", "SystemACL")
+    TalkGroupACL = apps.get_model("radio", "TalkGroupACL")
+    UserVisibility = apps.get_model("radio", "UserVisibility")
+
+    systems = list(
+        System.objects.values_list("UUID", "systemACL_id", "enableTalkGroupACLs")
+    )
+    publicACLs = set(
+        SystemACL.objects.filter(public=True).values_list("UUID", flat=True)
+    )
+
+    systemACLs = defaultdict(set)
+    for aclUUID, userUUID in SystemACL.users.through.objects.values_list(
+        "systemacl_id", "userprofile_id"
+    ):
+        systemACLs[userUUID].add(aclUUID)
+
+    talkgroupACLs = defaultdict(set)
+    for aclUUID, userUUID in TalkGroupACL.users.through.objects.values_list(
+        "talkgroupacl_id", "userprofile_id"
+    ):
+        talkgroupACLs[userUUID].add(aclUUID)
+
+    downloadAllowed = dict(TalkGroupACL.objects.values_list("UUID", "downloadAllowed"))
+    aclTalkgroups = defaultdict(list)
+    links = TalkGroupACL.allowedTalkgroups.through.objects.values_list(
+        "talkgroupacl_id", "talkgroup_id", "talkgroup__system_id"
+    )
+    for aclUUID, talkgroupUUID, systemUUID in links:
+        aclTalkgroups[aclUUID].append((talkgroupUUID, systemUUID))
+
+    rows = []
+    for user in UserProfile.objects.values_list("UUID", flat=True):
+        ACLs = publicACLs | systemACLs[user]
+        # System UUID -> talkgroup ACLs enabled, for the systems the user can see
+        seen = {}
+        for systemUUID, aclUUID, enableTalkGroupACLs in systems:
+            if aclUUID in ACLs:
+                seen[systemUUID] = enableTalkGroupACLs
+                rows.append(
+                    UserVisibility(
+                        user_id=user,
+                        system_id=systemUUID,
+                        allTalkgroups=not enableTalkGroupACLs,
+                        download=not enableTalkGroupACLs,
+                    )
+                )
+
+        talkgroups = {}
+        for aclUUID in talkgroupACLs[user]:
+            for talkgroupUUID, systemUUID in aclTalkgroups[aclUUID]:
+                if seen.get(systemUUID):
+                    download = talkgroups.get(talkgroupUUID, (None, False))[1]
+                    talkgroups[talkgroupUUID] = (
+                        systemUUID,
+                        download or downloadAllowed[aclUUID],
+                    )
+
+        for talkgroupUUID, (systemUUID, download) in talkgroups.items():
+            rows.append(
+                UserVisibility(
+                    user_id=user,
+                    system_id=systemUUID,
+                    talkgroup_id=talkgroupUUID,
+                    download=download,
+                )
+            )
+
+    UserVisibility.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('radio', '0007_transmission_access_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserVisibility',
+            fields=[
+                ('UUID', models.UUIDField(db_index=True, default=uuid.uuid4, primary_key=True, serialize=False, unique=True)),
+                ('allTalkgroups', models.BooleanField(default=False)),
+                ('download', models.BooleanField(default=False)),
+                ('system', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='radio.system')),
+                ('talkgroup', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='radio.talkgroup')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='radio.userprofile')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='uservisibility',
+            constraint=models.UniqueConstraint(fields=('user', 'system', 'talkgroup'), name='unique_user_visibility'),
+        ),
+        migrations.RunPython(build_user_visibility, migrations.RunPython.noop),
+    ]
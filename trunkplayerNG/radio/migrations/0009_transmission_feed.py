@@ -0,0 +1,49 @@
+# Generated by Django 3.2.25 on 2026-10-18 08:21
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('radio', '0008_user_visibility'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransmissionFeed',
+            fields=[
+                ('transmission', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='feed', serialize=False, to='radio.transmission')),
+                ('talkgroupDecimalID', models.IntegerField()),
+                ('talkgroupAlphaTag', models.CharField(blank=True, default='', max_length=30)),
+                ('startTime', models.DateTimeField()),
+                ('endTime', models.DateTimeField(blank=True, null=True)),
+                ('audioFile', models.CharField(max_length=255)),
+                ('units', models.JSONField(default=list)),
+                ('encrypted', models.BooleanField(default=False)),
+                ('emergency', models.BooleanField(default=False)),
+                ('frequency', models.FloatField(default=0.0)),
+                ('length', models.FloatField(default=0.0, null=True)),
+                ('locked', models.BooleanField(default=False)),
+                ('recorder', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='radio.systemrecorder')),
+                ('system', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='radio.system')),
+                ('talkgroup', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='radio.talkgroup')),
+            ],
+            options={
+                'ordering': ['-startTime'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='transmissionfeed',
+            index=models.Index(fields=['startTime', 'transmission'], name='feed_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transmissionfeed',
+            index=models.Index(fields=['talkgroup', '-startTime', '-transmission'], name='feed_talkgroup_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transmissionfeed',
+            index=models.Index(fields=['system', '-startTime', '-transmission'], name='feed_system_idx'),
+        ),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 3.2.25 on 2026-10-18 08:29
+
+import re
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# Copied from radio.helpers.search, so the migration imports no app code
+TOKEN_PATTERN = re.compile(r"\w+")
+MAX_TOKEN_LENGTH = 64
+
+
+def tokenize(*texts) -> list:
+    tokens = {}
+    for text in texts:
+        if text:
+            for token in TOKEN_PATTERN.findall(str(text).lower()):
+                tokens[token[:MAX_TOKEN_LENGTH]] = None
+    return list(tokens)
+
+
+def index_catalog(apps, schema_editor):
+    # Talkgroups and units are small, transcripts are left to RebuildSearchIndex
+    CatalogToken = apps.get_model("radio", "CatalogToken")
+    TalkGroup = apps.get_model("radio", "TalkGroup")
+    Unit = apps.get_model("radio", "Unit")
+
+    for talkgroup in TalkGroup.objects.iterator():
+        CatalogToken.objects.bulk_create(
+            [
+                CatalogToken(token=token, talkgroup_id=talkgroup.UUID)
+                for token in tokenize(
+                    talkgroup.decimalID, talkgroup.alphaTag, talkgroup.description
+                )
+            ]
+        )
+    for unit in Unit.objects.iterator():
+        CatalogToken.objects.bulk_create(
+            [
+                CatalogToken(token=token, unit_id=unit.UUID)
+                for token in tokenize(unit.decimalID, unit.description)
+            ]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('radio', '0010_model_versions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TranscriptToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=64)),
+                ('startTime', models.DateTimeField()),
+                ('system', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='radio.system')),
+                ('talkgroup', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='radio.talkgroup')),
+                ('transmission', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tokens', to='radio.transmission')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CatalogToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(db_index=True, max_length=64)),
+                ('talkgroup', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='tokens', to='radio.talkgroup')),
+                ('unit', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='tokens', to='radio.unit')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='transcripttoken',
+            index=models.Index(fields=['token', 'startTime'], name='transcript_token_time_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='transcripttoken',
+            constraint=models.UniqueConstraint(fields=('token', 'transmission'), name='unique_transcript_token'),
+        ),
+        migrations.RunPython(index_catalog, migrations.RunPython.noop),
+    ]
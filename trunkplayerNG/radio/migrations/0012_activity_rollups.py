@@ -0,0 +1,64 @@
+# Generated by Django 3.2.25 on 2026-10-18 08:32
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('radio', '0011_search_tokens'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UnitActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resolution', models.PositiveIntegerField(choices=[(60, 'Minute'), (3600, 'Hour'), (86400, 'Day')])),
+                ('bucket', models.DateTimeField()),
+                ('calls', models.PositiveIntegerField(default=0)),
+                ('airtime', models.FloatField(default=0.0)),
+                ('emergencies', models.PositiveIntegerField(default=0)),
+                ('encrypted', models.PositiveIntegerField(default=0)),
+                ('compacted', models.BooleanField(default=False)),
+                ('system', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='radio.system')),
+                ('unit', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='radio.unit')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TalkGroupActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resolution', models.PositiveIntegerField(choices=[(60, 'Minute'), (3600, 'Hour'), (86400, 'Day')])),
+                ('bucket', models.DateTimeField()),
+                ('calls', models.PositiveIntegerField(default=0)),
+                ('airtime', models.FloatField(default=0.0)),
+                ('emergencies', models.PositiveIntegerField(default=0)),
+                ('encrypted', models.PositiveIntegerField(default=0)),
+                ('compacted', models.BooleanField(default=False)),
+                ('system', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='radio.system')),
+                ('talkgroup', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='radio.talkgroup')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='unitactivity',
+            index=models.Index(fields=['unit', 'resolution', 'bucket'], name='unit_activity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='unitactivity',
+            index=models.Index(fields=['compacted', 'resolution', 'bucket'], name='unit_activity_compact_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='talkgroupactivity',
+            index=models.Index(fields=['talkgroup', 'resolution', 'bucket'], name='tg_activity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='talkgroupactivity',
+            index=models.Index(fields=['system', 'resolution', 'bucket'], name='tg_activity_system_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='talkgroupactivity',
+            index=models.Index(fields=['compacted', 'resolution', 'bucket'], name='tg_activity_compact_idx'),
+        ),
+    ]
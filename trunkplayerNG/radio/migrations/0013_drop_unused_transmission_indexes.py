@@ -0,0 +1,22 @@
+# Generated by Django 3.2.25 on 2026-10-18 09:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('radio', '0012_activity_rollups'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='transmission',
+            name='tx_system_emergency_idx',
+        ),
+        migrations.AlterField(
+            model_name='transmissionfreq',
+            name='time',
+            field=models.DateTimeField(),
+        ),
+    ]
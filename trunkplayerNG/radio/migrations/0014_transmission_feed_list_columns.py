@@ -0,0 +1,53 @@
+# Generated by Django 3.2.25 on 2026-10-18 09:43
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+def clear_feed(apps, schema_editor):
+    # Rows lack the list columns, RebuildTransmissionFeed --missing writes them
+    TransmissionFeed = apps.get_model("radio", "TransmissionFeed")
+    TransmissionFeed.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('radio', '0013_drop_unused_transmission_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_feed, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='transmissionfeed',
+            name='emergency',
+        ),
+        migrations.RemoveField(
+            model_name='transmissionfeed',
+            name='talkgroupAlphaTag',
+        ),
+        migrations.RemoveField(
+            model_name='transmissionfeed',
+            name='talkgroupDecimalID',
+        ),
+        migrations.AddField(
+            model_name='transmissionfeed',
+            name='frequencys',
+            field=models.JSONField(default=list, encoder=django.core.serializers.json.DjangoJSONEncoder),
+        ),
+        migrations.AddField(
+            model_name='transmissionfeed',
+            name='talkgroupData',
+            field=models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder),
+        ),
+        migrations.AddField(
+            model_name='transmissionfeed',
+            name='transcript',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='transmissionfeed',
+            name='units',
+            field=models.JSONField(default=list, encoder=django.core.serializers.json.DjangoJSONEncoder),
+        ),
+    ]
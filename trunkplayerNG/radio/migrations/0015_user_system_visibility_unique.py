@@ -0,0 +1,35 @@
+# Generated by Django 3.2.25 on 2026-10-18 09:47
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def remove_duplicate_system_rows(apps, schema_editor):
+    # Concurrent rebuilds could insert a system row twice, the rows are identical
+    UserVisibility = apps.get_model("radio", "UserVisibility")
+    systemRows = UserVisibility.objects.filter(talkgroup__isnull=True)
+
+    duplicates = (
+        systemRows.values("user", "system")
+        .annotate(copies=Count("UUID"))
+        .filter(copies__gt=1)
+    )
+    for key in duplicates.iterator():
+        del key["copies"]
+        keep, *extra = systemRows.filter(**key).order_by("UUID")
+        UserVisibility.objects.filter(UUID__in=[row.UUID for row in extra]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('radio', '0014_transmission_feed_list_columns'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_system_rows, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='uservisibility',
+            constraint=models.UniqueConstraint(condition=models.Q(('talkgroup__isnull', True)), fields=('user', 'system'), name='unique_user_system_visibility'),
+        ),
+    ]
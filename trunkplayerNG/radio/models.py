@@ -1,5 +1,6 @@
 import uuid
 
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.db import models
 from django.db.models.fields import NullBooleanField
@@ -107,27 +108,17 @@ class TalkGroup(models.Model):
     encrypted = models.BooleanField(default=False, blank=True)
     agency = models.ManyToManyField(Agency, blank=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["system", "decimalID"], name="unique_talkgroup_decimal_id"
+            )
+        ]
+
     def __str__(self):
         return f"[{self.system.name}] {self.alphaTag}"
 
 
-@receiver(models.signals.post_save, sender=TalkGroup)
-def execute_TalkGroup_dedup_check(sender, instance, created, *args, **kwargs):
-    system = instance.system
-
-    if created:
-        if instance.alphaTag != "":
-            TGs = TalkGroup.objects.filter(
-                system=system, decimalID=instance.decimalID
-            ).exclude(UUID=instance.UUID)
-            TGs.delete()
-        else:
-            if TalkGroup.objects.filter(
-                system=system, decimalID=instance.decimalID
-            ).exclude(alphaTag=""):
-                instance.delete()
-
-
 class SystemForwarder(models.Model):
     UUID = models.UUIDField(
         primary_key=True, default=uuid.uuid4, db_index=True, unique=True
@@ -180,27 +171,17 @@ class Unit(models.Model):
     decimalID = models.IntegerField(db_index=True)
     description = models.CharField(max_length=100, blank=True, null=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["system", "decimalID"], name="unique_unit_decimal_id"
+            )
+        ]
+
     def __str__(self):
         return f"[{self.system.name}] {str(self.decimalID)}"
 
 
-@receiver(models.signals.post_save, sender=Unit)
-def execute_unit_dedup_check(sender, instance, created, *args, **kwargs):
-    system = instance.system
-
-    if created:
-        if instance.description != "":
-            TGs = Unit.objects.filter(
-                system=system, decimalID=instance.decimalID
-            ).exclude(UUID=instance.UUID)
-            TGs.delete()
-        else:
-            if Unit.objects.filter(system=system, decimalID=instance.decimalID).exclude(
-                description=""
-            ):
-                instance.delete()
-
-
 class TransmissionUnit(models.Model):
     UUID = models.UUIDField(
         primary_key=True, default=uuid.uuid4, db_index=True, unique=True
@@ -254,11 +235,173 @@ class Transmission(models.Model):
 
     class Meta:
         ordering = ["-startTime"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["system", "talkgroup", "startTime", "recorder"],
+                name="unique_transmission_natural_key",
+            )
+        ]
+        indexes = [
+            # Keyset pagination position (see radio.pagination)
+            models.Index(fields=["startTime", "UUID"], name="transmission_feed_idx"),
+            # Per talkgroup / system feeds and the system prune
+            models.Index(
+                fields=["talkgroup", "-startTime", "-UUID"],
+                name="tx_talkgroup_feed_idx",
+            ),
+            models.Index(
+                fields=["system", "-startTime", "-UUID"], name="tx_system_feed_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"[{self.system.name}][{self.talkgroup.alphaTag}][{self.startTime}] {self.UUID}"
 
 
+class TransmissionFeed(models.Model):
+    # Denormalized list row of a Transmission, maintained by radio.helpers.feed
+    # when TRANSMISSION_FEED is enabled. The JSON columns hold the nested
+    # TransmissionListSerializer output, so a page renders from this table alone
+    transmission = models.OneToOneField(
+        Transmission, primary_key=True, on_delete=models.CASCADE, related_name="feed"
+    )
+    system = models.ForeignKey(System, on_delete=models.CASCADE)
+    recorder = models.ForeignKey(SystemRecorder, on_delete=models.CASCADE)
+    talkgroup = models.ForeignKey(TalkGroup, on_delete=models.CASCADE)
+    talkgroupData = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    startTime = models.DateTimeField()
+    endTime = models.DateTimeField(null=True, blank=True)
+    audioFile = models.CharField(max_length=255)
+    units = models.JSONField(default=list, encoder=DjangoJSONEncoder)
+    frequencys = models.JSONField(default=list, encoder=DjangoJSONEncoder)
+    encrypted = models.BooleanField(default=False)
+    frequency = models.FloatField(default=0.0)
+    length = models.FloatField(default=0.0, null=True)
+    locked = models.BooleanField(default=False)
+    transcript = models.TextField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-startTime"]
+        indexes = [
+            models.Index(fields=["startTime", "transmission"], name="feed_time_idx"),
+            models.Index(
+                fields=["talkgroup", "-startTime", "-transmission"],
+                name="feed_talkgroup_idx",
+            ),
+            models.Index(
+                fields=["system", "-startTime", "-transmission"],
+                name="feed_system_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"[{self.talkgroup_id}][{self.startTime}] {self.transmission_id}"
+
+
+class TranscriptToken(models.Model):
+    # Inverted index of Transmission transcripts, maintained by radio.helpers.search
+    token = models.CharField(max_length=64)
+    transmission = models.ForeignKey(
+        Transmission, on_delete=models.CASCADE, related_name="tokens"
+    )
+    system = models.ForeignKey(System, on_delete=models.CASCADE)
+    talkgroup = models.ForeignKey(TalkGroup, on_delete=models.CASCADE)
+    startTime = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["token", "startTime"], name="transcript_token_time_idx"
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["token", "transmission"], name="unique_transcript_token"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.token} {self.transmission_id}"
+
+
+class CatalogToken(models.Model):
+    # Inverted index of TalkGroup tags and Unit descriptions, maintained by
+    # radio.helpers.search
+    token = models.CharField(max_length=64, db_index=True)
+    talkgroup = models.ForeignKey(
+        TalkGroup,
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE,
+        related_name="tokens",
+    )
+    unit = models.ForeignKey(
+        Unit, null=True, blank=True, on_delete=models.CASCADE, related_name="tokens"
+    )
+
+    def __str__(self):
+        return f"{self.token} {self.talkgroup_id or self.unit_id}"
+
+
+class ActivityRollup(models.Model):
+    # Pre-aggregated call counters, appended at ingest and merged by the
+    # compact_activity task, see radio.helpers.activity
+    RESOLUTION_OPTS = ((60, "Minute"), (3600, "Hour"), (86400, "Day"))
+
+    system = models.ForeignKey(System, on_delete=models.CASCADE)
+    resolution = models.PositiveIntegerField(choices=RESOLUTION_OPTS)
+    bucket = models.DateTimeField()
+    calls = models.PositiveIntegerField(default=0)
+    airtime = models.FloatField(default=0.0)
+    emergencies = models.PositiveIntegerField(default=0)
+    encrypted = models.PositiveIntegerField(default=0)
+    compacted = models.BooleanField(default=False)
+
+    class Meta:
+        abstract = True
+
+
+class TalkGroupActivity(ActivityRollup):
+    talkgroup = models.ForeignKey(TalkGroup, on_delete=models.CASCADE)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["talkgroup", "resolution", "bucket"],
+                name="tg_activity_idx",
+            ),
+            models.Index(
+                fields=["system", "resolution", "bucket"],
+                name="tg_activity_system_idx",
+            ),
+            models.Index(
+                fields=["compacted", "resolution", "bucket"],
+                name="tg_activity_compact_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"[{self.talkgroup_id}][{self.bucket}] {self.calls}"
+
+
+class UnitActivity(ActivityRollup):
+    unit = models.ForeignKey(Unit, on_delete=models.CASCADE)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["unit", "resolution", "bucket"], name="unit_activity_idx"
+            ),
+            models.Index(
+                fields=["compacted", "resolution", "bucket"],
+                name="unit_activity_compact_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"[{self.unit_id}][{self.bucket}] {self.calls}"
+
+
 class Incident(models.Model):
     UUID = models.UUIDField(
         primary_key=True, default=uuid.uuid4, db_index=True, unique=True
@@ -304,6 +447,47 @@ class TalkGroupACL(models.Model):
         return self.name
 
 
+class UserVisibility(models.Model):
+    # Materialized System/TalkGroup ACLs, maintained by radio.helpers.visibility
+    # A row without a talkgroup marks the system visible, allTalkgroups is set
+    # when the system has talkgroup ACLs disabled
+    UUID = models.UUIDField(
+        primary_key=True, default=uuid.uuid4, db_index=True, unique=True
+    )
+    user = models.ForeignKey(UserProfile, on_delete=models.CASCADE)
+    system = models.ForeignKey(System, on_delete=models.CASCADE)
+    talkgroup = models.ForeignKey(
+        TalkGroup, null=True, blank=True, on_delete=models.CASCADE
+    )
+    allTalkgroups = models.BooleanField(default=False)
+    download = models.BooleanField(default=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "system", "talkgroup"], name="unique_user_visibility"
+            ),
+            # NULLs are distinct in the one above, so system rows need their own
+            models.UniqueConstraint(
+                fields=["user", "system"],
+                condition=models.Q(talkgroup__isnull=True),
+                name="unique_user_system_visibility",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} -> {self.talkgroup_id or self.system_id}"
+
+
+class ModelVersion(models.Model):
+    # Monotonic per-model change counter, bumped by radio.helpers.versions
+    name = models.CharField(max_length=50, primary_key=True)
+    version = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
+
+
 class ScanList(models.Model):
     UUID = models.UUIDField(
         primary_key=True, default=uuid.uuid4, db_index=True, unique=True
@@ -0,0 +1,147 @@
+import base64, uuid
+
+from datetime import datetime, timezone
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class TransmissionCursorPagination(BasePagination):
+    """
+    Keyset pagination over (startTime, pk), newest first
+
+    pk is the Transmission UUID on both Transmission and TransmissionFeed.
+
+    Opted into by sending any of cursor, before or after. Page cost does not
+    depend on how far back the cursor is, unlike LIMIT/OFFSET.
+    """
+
+    cursor_query_param = "cursor"
+    limit_query_param = "limit"
+    max_limit = 100
+
+    @classmethod
+    def requested(cls, request) -> bool:
+        return any(
+            param in request.query_params
+            for param in (cls.cursor_query_param, "before", "after")
+        )
+
+    def get_limit(self, request) -> int:
+        try:
+            limit = int(
+                request.query_params.get(self.limit_query_param, api_settings.PAGE_SIZE)
+            )
+        except ValueError:
+            raise ValidationError({self.limit_query_param: "Must be an integer"})
+        return max(1, min(limit, self.max_limit))
+
+    def get_time(self, request, param: str):
+        value = request.query_params.get(param)
+        if not value:
+            return None
+
+        try:
+            moment = datetime.fromtimestamp(float(value), tz=timezone.utc)
+        except (OverflowError, OSError):
+            raise ValidationError({param: "Out of range"})
+        except ValueError:
+            try:
+                moment = parse_datetime(value)
+            except ValueError:
+                # Well formed but not a real date, like month 13
+                moment = None
+            if moment is None:
+                raise ValidationError({param: "Must be ISO 8601 or a unix timestamp"})
+
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+        return moment
+
+    def encode_cursor(self, direction: str, TX) -> str:
+        position = f"{direction}|{TX.startTime.isoformat()}|{TX.pk}"
+        return base64.urlsafe_b64encode(position.encode()).decode()
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            direction, startTime, UUID = (
+                base64.urlsafe_b64decode(encoded.encode()).decode().split("|")
+            )
+            assert direction in ("older", "newer")
+            return direction, parse_datetime(startTime), uuid.UUID(UUID)
+        except Exception:
+            raise ValidationError({self.cursor_query_param: "Invalid cursor"})
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.limit = self.get_limit(request)
+
+        before = self.get_time(request, "before")
+        if before:
+            queryset = queryset.filter(startTime__lt=before)
+        after = self.get_time(request, "after")
+        if after:
+            queryset = queryset.filter(startTime__gt=after)
+
+        cursor = self.decode_cursor(request)
+        direction = cursor[0] if cursor else "older"
+
+        if direction == "older":
+            queryset = queryset.order_by("-startTime", "-pk")
+            if cursor:
+                queryset = queryset.filter(
+                    Q(startTime__lt=cursor[1])
+                    | Q(startTime=cursor[1], pk__lt=cursor[2])
+                )
+        else:
+            queryset = queryset.order_by("startTime", "pk").filter(
+                Q(startTime__gt=cursor[1]) | Q(startTime=cursor[1], pk__gt=cursor[2])
+            )
+
+        # One extra row tells us whether there is another page in this direction
+        page = list(queryset[: self.limit + 1])
+        more = len(page) > self.limit
+        page = page[: self.limit]
+
+        if direction == "older":
+            self.has_older, self.has_newer = more, cursor is not None
+        else:
+            page.reverse()
+            self.has_older, self.has_newer = True, more
+
+        self.page = page
+        return page
+
+    def get_link(self, direction: str, TX):
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(direction, TX)
+        )
+
+    def get_next_link(self):
+        if not self.page or not self.has_older:
+            return None
+        return self.get_link("older", self.page[-1])
+
+    def get_previous_link(self):
+        if not self.page or not self.has_newer:
+            return None
+        return self.get_link("newer", self.page[0])
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
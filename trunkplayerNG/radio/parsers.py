@@ -0,0 +1,66 @@
+from rest_framework.parsers import BaseParser, FileUploadParser
+
+
+class AudioUploadParser(FileUploadParser):
+    """
+    Parser for raw audio request bodies, streamed through Django's upload handlers
+    """
+
+    media_type = "audio/*"
+
+
+class NDJSONParser(BaseParser):
+    """
+    Parser for newline delimited JSON, yields the raw lines as they are read so
+    that each one can be decoded (and rejected) on its own
+    """
+
+    media_type = "application/x-ndjson"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if stream is None:
+            return iter(())
+        return (line for line in stream if line.strip())
+
+
+class ArchiveUploadParser(FileUploadParser):
+    """
+    Parser for raw zip request bodies, streamed through Django's upload handlers
+
+    A parser matches one media type, the subclasses below take the tar types
+    """
+
+    media_type = "application/zip"
+
+    def get_filename(self, stream, media_type, parser_context):
+        return super().get_filename(stream, media_type, parser_context) or "batch"
+
+
+class TarUploadParser(ArchiveUploadParser):
+    media_type = "application/x-tar"
+
+
+class GzipTarUploadParser(ArchiveUploadParser):
+    media_type = "application/gzip"
+
+
+class LegacyGzipTarUploadParser(ArchiveUploadParser):
+    media_type = "application/x-gzip"
+
+
+class Bzip2TarUploadParser(ArchiveUploadParser):
+    media_type = "application/x-bzip2"
+
+
+class XzTarUploadParser(ArchiveUploadParser):
+    media_type = "application/x-xz"
+
+
+ARCHIVE_UPLOAD_PARSERS = [
+    ArchiveUploadParser,
+    TarUploadParser,
+    GzipTarUploadParser,
+    LegacyGzipTarUploadParser,
+    Bzip2TarUploadParser,
+    XzTarUploadParser,
+]
@@ -211,6 +211,39 @@ class TransmissionListSerializer(serializers.ModelSerializer):
         ]
 
 
+class TransmissionFeedSerializer(serializers.ModelSerializer):
+    # Renders TransmissionListSerializer's shape from the denormalized feed row
+    UUID = serializers.UUIDField(source="transmission_id")
+    audioFile = serializers.SerializerMethodField()
+    talkgroup = serializers.JSONField(source="talkgroupData")
+    units = serializers.JSONField()
+    frequencys = serializers.JSONField()
+
+    class Meta:
+        model = TransmissionFeed
+        fields = [
+            "UUID",
+            "system",
+            "recorder",
+            "startTime",
+            "endTime",
+            "audioFile",
+            "talkgroup",
+            "encrypted",
+            "units",
+            "frequency",
+            "frequencys",
+            "length",
+            "locked",
+            "transcript",
+        ]
+
+    def get_audioFile(self, obj: TransmissionFeed) -> str:
+        if not obj.audioFile:
+            return None
+        return Transmission._meta.get_field("audioFile").storage.url(obj.audioFile)
+
+
 class TransmissionUploadSerializer(serializers.ModelSerializer):
     recorder = serializers.SlugRelatedField(
         read_only=False,
@@ -3,9 +3,11 @@ import socketio
 import logging
 
 from celery import shared_task
+from celery.worker.control import inspect_command
 from asgiref.sync import sync_to_async
 from django.conf import settings
 
+from radio.helpers.activity import _compact_activity
 from radio.helpers.incident import _send_incident, _forward_incident
 from radio.helpers.cleanup import _prune_transmissions
 
@@ -18,9 +20,11 @@ from radio.helpers.notifications import (
 from radio.helpers.transmission import (
     _broadcast_transmission,
     _forward_transmission,
+    _ingest_transmission,
     _send_transmission_to_web,
     _forward_transmission_to_remote_instance,
 )
+from radio.helpers.status import process_stats
 
 if settings.SEND_TELEMETRY:
     from sentry_sdk import capture_exception
@@ -28,6 +32,16 @@ if settings.SEND_TELEMETRY:
 logger = logging.getLogger(__name__)
 
 
+@shared_task(acks_late=True)
+def ingest_transmission(
+    uuid: str, recorder_uuid: str, details: dict, audio_name: str, *args, **kwargs
+) -> None:
+    """
+    Persists a Transmission accepted by the async ingest endpoints
+    """
+    _ingest_transmission(uuid, recorder_uuid, details, audio_name)
+
+
 @shared_task()
 def forward_transmission(data: dict, tg_uuid: str, *args, **kwargs) -> None:
     """
@@ -37,11 +51,13 @@ def forward_transmission(data: dict, tg_uuid: str, *args, **kwargs) -> None:
 
 
 @shared_task()
-def send_transmission_to_web(data: dict, *args, **kwargs) -> None:
+def send_transmission_to_web(
+    data: dict, *args, queued_at: float = None, **kwargs
+) -> None:
     """
     Sends socket.io messages to webclients
     """
-    _send_transmission_to_web(data)
+    _send_transmission_to_web(data, queued_at)
 
 
 @shared_task()
@@ -107,6 +123,14 @@ def prune_tranmissions(*args, **kwargs) -> None:
     _prune_transmissions()
 
 
+@shared_task()
+def compact_activity(*args, **kwargs) -> None:
+    """
+    Merges appended activity rollups and drops expired buckets
+    """
+    _compact_activity()
+
+
 @shared_task
 def send_transmission_notifications(transmission: dict, *args, **kwargs) -> None:
     """
@@ -171,3 +195,11 @@ def broadcast_transmission(event: str, room: str, data: dict) -> None:
     Sends new TX messsage to client
     """
     _broadcast_transmission(event, room, data)
+
+
+@inspect_command()
+def radio_stats(state, **kwargs) -> dict:
+    """
+    Answers worker_stats() with the counters of this worker
+    """
+    return process_stats()
@@ -1,3 +1,1378 @@
-from django.test import TestCase
+import io, json, re, time, uuid, zipfile
 
-# Create your tests here.
+from datetime import datetime, timezone as dt_timezone
+
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Q
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from radio.benchmarks.payloads import FakeRecorder
+from radio.helpers.activity import _compact
+from radio.helpers.alerts import ALERT_VERSIONS, index as alert_index, match_alerts
+from radio.helpers.bulk import archive_items
+from radio.helpers.cache import (
+    ResolutionCache,
+    get_recorder,
+    get_recorder_policy,
+    get_talkgroup,
+    recorder_policies,
+    recorders,
+    systems,
+    talkgroups,
+)
+from radio.helpers.cleanup import _prune_transmissions
+from radio.helpers.delivery import NotificationDispatcher
+from radio.helpers.fanout import fan_out_transmission, routing
+from radio.helpers.feed import rebuild_feed
+from radio.helpers.ingest import _resolve_units, find_duplicates, ingest_transmissions
+from radio.helpers.policy import RecorderPolicy
+from radio.helpers.search import catalog_filter, transcript_matches
+from radio.helpers.transmission import _ingest_transmission
+from radio.helpers.utils import TransmissionDetails, visible_transmissions
+from radio.helpers.versions import _bump, get_versions
+from radio.models import (
+    CatalogToken,
+    ScanList,
+    Scanner,
+    System,
+    SystemACL,
+    SystemRecorder,
+    TalkGroup,
+    TalkGroupACL,
+    TranscriptToken,
+    Transmission,
+    TransmissionFeed,
+    Unit,
+    UnitActivity,
+    UserAlert,
+    UserProfile,
+    UserVisibility,
+)
+from radio.tasks import radio_stats
+from radio.views import ScanListView
+from trunkplayerNG.celery import app
+from users.models import CustomUser
+
+# Savepoint, unit lookup, 5 bulk inserts, 2 activity inserts and the release
+INGEST_QUERIES = 10
+
+
+def clear_caches() -> None:
+    for cache in (recorders, systems, talkgroups, recorder_policies):
+        cache.invalidate()
+
+
+def api_client(siteAdmin: bool = False) -> APIClient:
+    """
+    A client logged in as a new user
+    """
+    user = CustomUser.objects.create(
+        email=f"{uuid.uuid4()}@example.com",
+        userProfile=UserProfile.objects.create(siteAdmin=siteAdmin),
+    )
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+def create_recorder() -> SystemRecorder:
+    """
+    A public system with one enabled recorder
+    """
+    acl = SystemACL.objects.create(name="Test", public=True)
+    system = System.objects.create(name="Test", systemACL=acl)
+    return SystemRecorder.objects.create(system=system, name="Test", enabled=True)
+
+
+# Counters are checked on the first lookup only, not on a slow runner's clock
+@override_settings(
+    TRANSMISSION_FEED=False,
+    ACTIVITY_ROLLUPS=True,
+    RESOLUTION_CACHE_CHECK_SECONDS=3600,
+)
+class IngestQueryCountTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.recorder = create_recorder()
+        # One talkgroup and ten units, so only the first ingest creates them
+        self.fake = FakeRecorder(
+            str(self.recorder.forwarderWebhookUUID), talkgroups=1, unitPool=10
+        )
+
+    def ingest(self, units: int, calls: int = 1) -> list:
+        self.fake.units = units
+        payloads = [
+            (uuid.uuid4(), TransmissionDetails(self.fake.payload()["json"]), "a.m4a")
+            for _ in range(calls)
+        ]
+        return ingest_transmissions(self.recorder, payloads)
+
+    def warm(self) -> None:
+        # Creates the talkgroup and units, then caches the talkgroup once it exists.
+        # TestCase never commits, so run the on_commit stores by hand
+        for _ in range(2):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.ingest(units=10)
+
+    def test_queries_do_not_grow_with_units(self):
+        self.warm()
+
+        with self.assertNumQueries(INGEST_QUERIES):
+            self.ingest(units=1)
+        with self.assertNumQueries(INGEST_QUERIES):
+            self.ingest(units=10)
+
+    def test_queries_do_not_grow_with_calls(self):
+        self.warm()
+
+        with self.assertNumQueries(INGEST_QUERIES):
+            self.ingest(units=5, calls=20)
+        self.assertEqual(Transmission.objects.count(), 22)
+
+    def test_unit_race_lost_keeps_the_version(self):
+        system = self.recorder.system
+        bulk_create = Unit.objects.bulk_create
+
+        def concurrent(NewUnits, **kwargs):
+            # Another ingest stores the same units first
+            bulk_create(
+                [
+                    Unit(UUID=uuid.uuid4(), system=system, decimalID=unit.decimalID)
+                    for unit in NewUnits
+                ]
+            )
+            return bulk_create(NewUnits, **kwargs)
+
+        with mock.patch.object(Unit.objects, "bulk_create", concurrent):
+            with self.captureOnCommitCallbacks(execute=True):
+                units = _resolve_units(system, {1, 2})
+
+        self.assertEqual(set(units), {1, 2})
+        self.assertEqual(get_versions(["Unit"]), {"Unit": 0})
+
+
+@mock.patch("radio.helpers.transmission.new_transmission_dispatch")
+@mock.patch("radio.helpers.transmission.forward_new_transmission")
+class SpooledIngestTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.recorder = create_recorder()
+        self.fake = FakeRecorder(str(self.recorder.forwarderWebhookUUID))
+        self.audioName = default_storage.save("audio/test.m4a", ContentFile(b"m4a"))
+        self.addCleanup(default_storage.delete, self.audioName)
+
+    def ingest(self, UUID: str, jsonx: dict, audioName: str = None) -> None:
+        _ingest_transmission(
+            UUID,
+            str(self.recorder.forwarderWebhookUUID),
+            dict(jsonx),
+            audioName or self.audioName,
+        )
+
+    def test_redelivery_keeps_audio(self, forward, dispatch):
+        UUID, jsonx = str(uuid.uuid4()), self.fake.payload()["json"]
+
+        self.ingest(UUID, jsonx)
+        self.ingest(UUID, jsonx)
+
+        self.assertEqual(Transmission.objects.filter(UUID=UUID).count(), 1)
+        self.assertEqual(dispatch.call_count, 1)
+        self.assertTrue(default_storage.exists(self.audioName))
+
+    def test_reused_uuid_is_already_ingested(self, forward, dispatch):
+        UUID = str(uuid.uuid4())
+        self.ingest(UUID, self.fake.payload()["json"])
+
+        # Another call under the same UUID fails on the primary key
+        otherName = default_storage.save("audio/other.m4a", ContentFile(b"m4a"))
+        self.ingest(UUID, self.fake.payload()["json"], otherName)
+
+        self.assertEqual(Transmission.objects.count(), 1)
+        self.assertEqual(dispatch.call_count, 1)
+        self.assertTrue(default_storage.exists(self.audioName))
+        self.assertFalse(default_storage.exists(otherName))
+
+
+def dispatched(TX: Transmission) -> dict:
+    return {"UUID": str(TX.UUID)}
+
+
+@mock.patch("radio.views.new_transmission_dispatch", side_effect=dispatched)
+@mock.patch("radio.helpers.transmission.forward_new_transmission")
+class TransmissionUploadTests(TestCase):
+    URL = "/api/radio/transmission/upload"
+
+    def setUp(self):
+        clear_caches()
+        self.recorder = create_recorder()
+        self.fake = FakeRecorder(str(self.recorder.forwarderWebhookUUID))
+        self.client = APIClient()
+        self.addCleanup(self.delete_audio)
+
+    def delete_audio(self):
+        for TX in Transmission.objects.all():
+            TX.audioFile.delete(save=False)
+
+    def upload(self, jsonx: dict, **data):
+        return self.client.post(
+            self.URL,
+            {
+                "recorder": str(self.recorder.forwarderWebhookUUID),
+                "json": json.dumps(jsonx),
+                "audioFile": SimpleUploadedFile("call.m4a", b"m4a"),
+                **data,
+            },
+            format="multipart",
+        )
+
+    def assertStored(self, response, jsonx: dict) -> None:
+        self.assertEqual(response.status_code, 200)
+        TX = Transmission.objects.get(UUID=response.data["UUID"])
+        self.assertEqual(TX.recorder, self.recorder)
+        self.assertEqual(TX.talkgroup.decimalID, jsonx["talkgroup"])
+        self.assertEqual(TX.startTime.timestamp(), jsonx["start_time"])
+        self.assertTrue(TX.audioFile.name.endswith(".m4a"))
+        with TX.audioFile.open() as audio:
+            self.assertEqual(audio.read(), b"m4a")
+
+    def test_multipart_upload(self, forward, dispatch):
+        jsonx = self.fake.payload()["json"]
+
+        self.assertStored(self.upload(jsonx), jsonx)
+        self.assertEqual(dispatch.call_count, 1)
+
+    def test_raw_audio_upload(self, forward, dispatch):
+        jsonx = self.fake.payload()["json"]
+
+        response = self.client.post(
+            f"{self.URL}/call.m4a?recorder={self.recorder.forwarderWebhookUUID}",
+            b"m4a",
+            content_type="audio/mp4",
+            HTTP_X_TRUNK_RECORDER_JSON=json.dumps(jsonx),
+        )
+
+        self.assertStored(response, jsonx)
+        self.assertEqual(dispatch.call_count, 1)
+
+    def test_unknown_recorder_is_rejected(self, forward, dispatch):
+        self.recorder.forwarderWebhookUUID = uuid.uuid4()
+        response = self.upload(self.fake.payload()["json"])
+
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(Transmission.objects.exists())
+
+    def test_denied_talkgroup_is_rejected(self, forward, dispatch):
+        jsonx = self.fake.payload()["json"]
+        self.recorder.talkgroupsDenyed.add(
+            TalkGroup.objects.create(
+                system=self.recorder.system, decimalID=jsonx["talkgroup"]
+            )
+        )
+
+        response = self.upload(jsonx)
+
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(Transmission.objects.exists())
+
+    def test_reupload_returns_the_stored_uuid(self, forward, dispatch):
+        jsonx = self.fake.payload()["json"]
+        UUID = self.upload(jsonx).data["UUID"]
+
+        response = self.upload(jsonx)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.data, {"success": True, "UUID": UUID, "duplicate": True}
+        )
+        self.assertEqual(Transmission.objects.count(), 1)
+
+    def test_lost_insert_race_returns_the_stored_uuid(self, forward, dispatch):
+        jsonx = self.fake.payload()["json"]
+        UUID = self.upload(jsonx).data["UUID"]
+
+        # A concurrent upload stored the call after this one's duplicate check
+        checks = []
+
+        def stale_first(recorder, payloads):
+            checks.append(payloads)
+            return find_duplicates(recorder, payloads) if len(checks) > 1 else {}
+
+        with mock.patch("radio.helpers.transmission.find_duplicates", stale_first):
+            response = self.upload(jsonx)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.data, {"success": True, "UUID": UUID, "duplicate": True}
+        )
+        # Checked again after the natural key IntegrityError
+        self.assertEqual(len(checks), 2)
+        self.assertEqual(Transmission.objects.count(), 1)
+
+    def test_client_uuid_is_kept(self, forward, dispatch):
+        UUID = str(uuid.uuid4())
+
+        response = self.upload(self.fake.payload()["json"], UUID=UUID)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["UUID"], UUID)
+        self.assertTrue(Transmission.objects.filter(UUID=UUID).exists())
+
+    def test_invalid_uuid_is_rejected(self, forward, dispatch):
+        response = self.upload(self.fake.payload()["json"], UUID="not-a-uuid")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Transmission.objects.exists())
+
+    def test_taken_uuid_is_a_duplicate(self, forward, dispatch):
+        UUID = str(uuid.uuid4())
+        self.upload(self.fake.payload()["json"], UUID=UUID)
+
+        for asyncIngest in (False, True):
+            with self.subTest(ASYNC_INGEST=asyncIngest), override_settings(
+                ASYNC_INGEST=asyncIngest
+            ), mock.patch("radio.views.ingest_backlogged", return_value=False):
+                # Another call under the same UUID
+                response = self.upload(self.fake.payload()["json"], UUID=UUID)
+
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(
+                response.data, {"success": True, "UUID": UUID, "duplicate": True}
+            )
+        self.assertEqual(Transmission.objects.count(), 1)
+
+
+class ResolutionCacheVersionTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.recorder = create_recorder()
+
+    @override_settings(RESOLUTION_CACHE_CHECK_SECONDS=0)
+    def test_recorder_edit_elsewhere_is_seen(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(get_recorder(self.recorder.forwarderWebhookUUID).enabled)
+
+        # Another process disables it, this one only sees the counter move
+        SystemRecorder.objects.filter(pk=self.recorder.pk).update(enabled=False)
+        _bump("SystemRecorder")
+
+        self.assertFalse(get_recorder(self.recorder.forwarderWebhookUUID).enabled)
+
+    @override_settings(RESOLUTION_CACHE_CHECK_SECONDS=0)
+    def test_talkgroup_delete_elsewhere_is_seen(self):
+        system = self.recorder.system
+        talkgroup = TalkGroup.objects.create(system=system, decimalID=100)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(get_talkgroup(system, 100), talkgroup)
+        self.assertEqual(get_talkgroup(system, 100), talkgroup)
+        misses = talkgroups.misses
+
+        # Another process deletes it, without this process' delete signals
+        CatalogToken.objects.filter(talkgroup=talkgroup).delete()
+        TalkGroup.objects.filter(pk=talkgroup.pk)._raw_delete(connection.alias)
+        _bump("TalkGroup")
+
+        self.assertIsNone(get_talkgroup(system, 100))
+        self.assertEqual(talkgroups.misses, misses + 1)
+
+
+class ArchiveItemsTests(TestCase):
+    def archive(self, **members) -> io.BytesIO:
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as bundle:
+            for name, data in members.items():
+                bundle.writestr(name.replace("_", "."), data)
+        archive.seek(0)
+        return archive
+
+    def test_audio_is_streamed(self):
+        archive = self.archive(call_json=json.dumps({"talkgroup": 1}), call_m4a=b"m4a")
+
+        (item,) = archive_items(archive)
+
+        self.assertEqual(item["name"], "call.m4a")
+        self.assertEqual(item["audioFile"].size, 3)
+        self.assertEqual(item["audioFile"].read(), b"m4a")
+
+    @override_settings(BULK_ARCHIVE_MAX_MEMBER_BYTES=1024)
+    def test_member_cap(self):
+        # Compresses to almost nothing, the header size is what counts
+        archive = self.archive(call_json="{}", call_m4a=b"\0" * 1025)
+
+        with self.assertRaises(ValueError):
+            list(archive_items(archive))
+
+    @override_settings(BULK_ARCHIVE_MAX_BYTES=1024)
+    def test_total_cap(self):
+        archive = self.archive(a_m4a=b"\0" * 600, b_m4a=b"\0" * 600)
+
+        with self.assertRaises(ValueError):
+            list(archive_items(archive))
+
+
+@mock.patch("radio.helpers.bulk.new_transmission_dispatch")
+@mock.patch("radio.helpers.bulk.forward_new_transmission")
+class TransmissionBulkCreateTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.recorder = create_recorder()
+        self.fake = FakeRecorder(str(self.recorder.forwarderWebhookUUID))
+        self.URL = (
+            f"/api/radio/transmission/bulk_create?recorder={self.fake.recorderUUID}"
+        )
+        self.client = APIClient()
+        self.addCleanup(self.delete_audio)
+
+    def delete_audio(self):
+        for TX in Transmission.objects.all():
+            TX.audioFile.delete(save=False)
+
+    def item(self, payload: dict = None) -> dict:
+        return dict(payload or self.fake.payload(), UUID=str(uuid.uuid4()))
+
+    def post(self, items: list):
+        return self.client.post(
+            self.URL,
+            "\n".join(json.dumps(item) for item in items),
+            content_type="application/x-ndjson",
+        )
+
+    def test_json_body_is_not_an_archive(self, forward, dispatch):
+        response = self.client.post(self.URL, [self.item()], format="json")
+
+        self.assertEqual(response.status_code, 415)
+
+    def test_zip_archive(self, forward, dispatch):
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w") as bundle:
+            bundle.writestr("call.json", json.dumps(self.fake.payload()["json"]))
+            bundle.writestr("call.m4a", b"m4a")
+
+        response = self.client.post(
+            self.URL, archive.getvalue(), content_type="application/zip"
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data["success"])
+        self.assertEqual(Transmission.objects.count(), 1)
+
+    def test_repeat_gets_the_stored_uuid(self, forward, dispatch):
+        first = self.item()
+        response = self.post([first, self.item(first)])
+
+        self.assertEqual(
+            [result.get("duplicate", False) for result in response.data["results"]],
+            [False, True],
+        )
+        self.assertEqual(
+            {result["UUID"] for result in response.data["results"]}, {first["UUID"]}
+        )
+        self.assertEqual(Transmission.objects.count(), 1)
+
+    def test_repeat_of_a_failed_item_is_stored(self, forward, dispatch):
+        first = self.item()
+        repeat, other = self.item(first), self.item()
+
+        # The chunk and the first item on its own fail, the rest are stored
+        def failing(recorder, payloads):
+            if str(payloads[0][0]) == first["UUID"]:
+                raise ValueError("broken")
+            return ingest_transmissions(recorder, payloads)
+
+        with mock.patch("radio.helpers.bulk.ingest_transmissions", failing):
+            response = self.post([first, repeat, other])
+
+        results = response.data["results"]
+        self.assertFalse(results[0]["success"])
+        self.assertEqual(
+            results[1], {"index": 1, "success": True, "UUID": repeat["UUID"]}
+        )
+        self.assertEqual(
+            results[2], {"index": 2, "success": True, "UUID": other["UUID"]}
+        )
+        self.assertEqual(
+            set(Transmission.objects.values_list("UUID", flat=True)),
+            {uuid.UUID(repeat["UUID"]), uuid.UUID(other["UUID"])},
+        )
+
+
+class RecorderPolicyTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.recorder = create_recorder()
+        self.system = self.recorder.system
+        self.one, self.two = (
+            TalkGroup.objects.create(system=self.system, decimalID=decimalID)
+            for decimalID in (1, 2)
+        )
+
+    def policy(self) -> RecorderPolicy:
+        return get_recorder_policy(self.recorder)
+
+    def test_empty_allow_list_permits_everything(self):
+        self.assertTrue(self.policy().allows(self.system.pk, 1))
+        self.assertTrue(self.policy().allows(self.system.pk, 999))
+
+    def test_allow_list_is_exclusive(self):
+        self.recorder.talkgroupsAllowed.add(self.one)
+
+        self.assertTrue(self.policy().allows(self.system.pk, 1))
+        self.assertFalse(self.policy().allows(self.system.pk, 2))
+        self.assertFalse(self.policy().allows(self.system.pk, 999))
+
+    def test_denied_wins_over_allowed(self):
+        self.recorder.talkgroupsAllowed.add(self.one, self.two)
+        self.recorder.talkgroupsDenyed.add(self.one)
+
+        self.assertFalse(self.policy().allows(self.system.pk, 1))
+        self.assertTrue(self.policy().allows(self.system.pk, 2))
+
+    def test_edits_invalidate_the_cached_policy(self):
+        self.assertTrue(self.policy().allows(self.system.pk, 1))
+
+        self.recorder.talkgroupsDenyed.add(self.one)
+        self.assertFalse(self.policy().allows(self.system.pk, 1))
+
+        # From the talkgroup side of the M2M
+        self.one.SRTGDeny.remove(self.recorder)
+        self.assertTrue(self.policy().allows(self.system.pk, 1))
+
+        # A renumbered talkgroup is denied under its new decimalID
+        self.recorder.talkgroupsDenyed.add(self.two)
+        self.two.decimalID = 3
+        self.two.save()
+        self.assertTrue(self.policy().allows(self.system.pk, 2))
+        self.assertFalse(self.policy().allows(self.system.pk, 3))
+
+
+class ResolutionCacheTests(TestCase):
+    def test_load_racing_invalidate_is_not_stored(self):
+        cache = ResolutionCache("test")
+
+        def loader():
+            # Saved by another thread while this one was reading
+            cache.invalidate("key")
+            return "stale"
+
+        with self.captureOnCommitCallbacks(execute=True):
+            cache.get("key", loader)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(cache.get("key", lambda: "fresh"), "fresh")
+        self.assertEqual(cache.get("key", lambda: "unused"), "fresh")
+
+
+class TimeParameterTests(TestCase):
+    def setUp(self):
+        self.client = api_client(siteAdmin=True)
+        self.system = create_recorder().system
+
+    def test_out_of_range_is_a_bad_request(self):
+        for value in ("1e20", "inf", "2024-13-45T00:00:00", "nonsense"):
+            with self.subTest(value=value):
+                response = self.client.get(
+                    "/api/radio/transmission/list", {"before": value}
+                )
+                self.assertEqual(response.status_code, 400)
+
+    def test_activity_window_overflow_is_a_bad_request(self):
+        for params in ({"before": "253402300799"}, {"after": "-62135596800"}):
+            with self.subTest(**params):
+                response = self.client.get(
+                    f"/api/radio/activity/system/{self.system.UUID}", params
+                )
+                self.assertEqual(response.status_code, 400)
+
+
+class CursorPaginationTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        recorder = create_recorder()
+        fake = FakeRecorder(str(recorder.forwarderWebhookUUID))
+        payloads = []
+        for talkgroup in fake.talkgroup_ids()[:5]:
+            payload = fake.payload()["json"]
+            payload["talkgroup"] = talkgroup
+            payloads.append((uuid.uuid4(), TransmissionDetails(payload), "a.m4a"))
+        TXs = ingest_transmissions(recorder, payloads)
+        # One talkgroup each, so all five may share a startTime and only the pk
+        # tiebreak orders them
+        startTime = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+        Transmission.objects.update(startTime=startTime)
+        rebuild_feed()
+        self.UUIDs = sorted((str(TX.UUID) for TX in TXs), reverse=True)
+        self.client = api_client(siteAdmin=True)
+
+    def walk(self, URL: str, link: str) -> list:
+        pages = []
+        while URL:
+            response = self.client.get(URL)
+            self.assertEqual(response.status_code, 200)
+            page = json.loads(response.content)
+            pages.append([TX["UUID"] for TX in page["results"]])
+            URL = page[link]
+        return pages
+
+    def test_walks_forward_and_back_across_equal_start_times(self):
+        for feed in (False, True):
+            with self.subTest(feed=feed), override_settings(TRANSMISSION_FEED=feed):
+                older = self.walk(
+                    "/api/radio/transmission/list?cursor=&limit=2", "next"
+                )
+                self.assertEqual(
+                    older, [self.UUIDs[0:2], self.UUIDs[2:4], self.UUIDs[4:]]
+                )
+
+                # Back from the oldest page through the previous links
+                response = self.client.get(
+                    "/api/radio/transmission/list?cursor=&limit=2"
+                )
+                URL = json.loads(response.content)["next"]
+                URL = json.loads(self.client.get(URL).content)["next"]
+                newer = self.walk(URL, "previous")
+                self.assertEqual(newer, list(reversed(older)))
+
+
+class ActivityTests(TestCase):
+    def setUp(self):
+        self.system = create_recorder().system
+        self.system.enableTalkGroupACLs = True
+        self.system.save()
+        self.unit = Unit.objects.create(system=self.system, decimalID=1)
+        self.other = Unit.objects.create(system=self.system, decimalID=2)
+
+    def row(self, unit: Unit, bucket: datetime, compacted: bool = False):
+        return UnitActivity.objects.create(
+            system=self.system,
+            unit=unit,
+            resolution=3600,
+            bucket=bucket,
+            calls=1,
+            compacted=compacted,
+        )
+
+    def test_compact_only_touches_pending_keys(self):
+        bucket = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+        settled = self.row(self.other, bucket, compacted=True)
+        self.row(self.unit, bucket, compacted=True)
+        self.row(self.unit, bucket)
+        self.row(self.unit, bucket)
+
+        self.assertEqual(_compact(UnitActivity, "unit", 3600), 3)
+        self.assertEqual(
+            list(
+                UnitActivity.objects.order_by("unit__decimalID").values_list(
+                    "unit", "calls", "compacted"
+                )
+            ),
+            [(self.unit.UUID, 3, True), (self.other.UUID, 1, True)],
+        )
+        self.assertTrue(UnitActivity.objects.filter(pk=settled.pk).exists())
+
+    def test_unit_activity_needs_every_talkgroup(self):
+        client = api_client()
+        user = client.handler._force_user.userProfile
+        URL = f"/api/radio/activity/unit/{self.unit.UUID}"
+
+        talkgroup = TalkGroup.objects.create(system=self.system, decimalID=1)
+        UserVisibility.objects.update_or_create(
+            user=user,
+            system=self.system,
+            talkgroup=None,
+            defaults={"allTalkgroups": False},
+        )
+        UserVisibility.objects.create(
+            user=user, system=self.system, talkgroup=talkgroup
+        )
+        self.assertEqual(client.get(URL).status_code, 401)
+
+        UserVisibility.objects.filter(user=user, talkgroup__isnull=True).update(
+            allTalkgroups=True
+        )
+        self.assertEqual(client.get(URL).status_code, 200)
+
+
+# Page, agencies, units joined to their Unit and freqs, offset pages count first too
+PAGE_QUERIES = 4
+VIEW_QUERIES = 4
+# The page of TransmissionFeed rows, with nothing loaded per row
+FEED_PAGE_QUERIES = 1
+
+
+@override_settings(TRANSMISSION_FEED=False)
+class TransmissionQueryCountTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        recorder = create_recorder()
+        fake = FakeRecorder(
+            str(recorder.forwarderWebhookUUID), talkgroups=3, unitPool=20
+        )
+        fake.units = 3
+        self.recorder, self.fake = recorder, fake
+        self.TXs = self.ingest(12)
+
+        self.admin = api_client(siteAdmin=True)
+        self.user = api_client()
+        UserVisibility.objects.update_or_create(
+            user=self.user.handler._force_user.userProfile,
+            system=recorder.system,
+            talkgroup=None,
+            defaults={"allTalkgroups": True},
+        )
+
+    def test_full_page(self):
+        for client in (self.admin, self.user):
+            for params, queries in (
+                ({"limit": 10}, PAGE_QUERIES + 1),
+                ({"limit": 10, "before": "9999999999"}, PAGE_QUERIES),
+            ):
+                with self.subTest(admin=client is self.admin, **params):
+                    with self.assertNumQueries(queries):
+                        response = client.get("/api/radio/transmission/list", params)
+                    self.assertEqual(response.status_code, 200)
+
+    def ingest(self, count: int) -> list:
+        return ingest_transmissions(
+            self.recorder,
+            [
+                (
+                    uuid.uuid4(),
+                    TransmissionDetails(self.fake.payload()["json"]),
+                    "a.m4a",
+                )
+                for _ in range(count)
+            ],
+        )
+
+    def assertFeedPage(self):
+        params = {"limit": 10, "before": "9999999999"}
+
+        for client in (self.admin, self.user):
+            with self.subTest(admin=client is self.admin):
+                expected = client.get("/api/radio/transmission/list", params)
+                with override_settings(TRANSMISSION_FEED=True):
+                    with self.assertNumQueries(FEED_PAGE_QUERIES):
+                        response = client.get("/api/radio/transmission/list", params)
+                self.assertEqual(
+                    json.loads(response.content), json.loads(expected.content)
+                )
+
+    def test_feed_renders_the_same_list(self):
+        rebuild_feed()
+        self.assertFeedPage()
+
+    def test_ingest_writes_the_same_feed(self):
+        Transmission.objects.all().delete()
+        with override_settings(TRANSMISSION_FEED=True):
+            self.ingest(12)
+        self.assertEqual(TransmissionFeed.objects.count(), 12)
+        self.assertFeedPage()
+
+    def test_feed_follows_edits(self):
+        rebuild_feed()
+        with override_settings(TRANSMISSION_FEED=True):
+            with self.captureOnCommitCallbacks(execute=True):
+                talkgroup = self.TXs[0].talkgroup
+                talkgroup.alphaTag = "Renamed"
+                talkgroup.save()
+                TX = Transmission.objects.get(pk=self.TXs[1].pk)
+                TX.transcript = "edited"
+                TX.save()
+                unit = self.TXs[2].units.first().unit
+                unit.decimalID += 100000
+                unit.save()
+        self.assertFeedPage()
+
+    def test_transmission_view(self):
+        URL = f"/api/radio/transmission/{self.TXs[0].UUID}"
+
+        with self.assertNumQueries(VIEW_QUERIES):
+            self.assertEqual(self.admin.get(URL).status_code, 200)
+        # Plus the UserVisibility check
+        with self.assertNumQueries(VIEW_QUERIES + 1):
+            self.assertEqual(self.user.get(URL).status_code, 200)
+
+
+def explain(sql: str) -> str:
+    prefix = "EXPLAIN QUERY PLAN " if connection.vendor == "sqlite" else "EXPLAIN "
+    with connection.cursor() as cursor:
+        cursor.execute(prefix + sql)
+        return "\n".join(str(row[-1]) for row in cursor.fetchall())
+
+
+class TransmissionIndexTests(TestCase):
+    """
+    EXPLAINs the queries the transmission views and prune really run
+    """
+
+    # Unique constraints are inline autoindexes on SQLite
+    TOKEN_INDEXES = (
+        "transcript_token_time_idx",
+        "unique_transcript_token",
+        "sqlite_autoindex_radio_transcripttoken",
+    )
+
+    def setUp(self):
+        clear_caches()
+        recorder = create_recorder()
+        self.system = recorder.system
+        self.system.pruneTransmissions = True
+        self.system.save()
+
+        # Offset pages skip the page query when the count is 0
+        with override_settings(TRANSMISSION_FEED=True):
+            fake = FakeRecorder(str(recorder.forwarderWebhookUUID), talkgroups=1)
+            (TX,) = ingest_transmissions(
+                recorder,
+                [(uuid.uuid4(), TransmissionDetails(fake.payload()["json"]), "a.m4a")],
+            )
+        self.talkgroup = TX.talkgroup
+
+        self.admin = api_client(siteAdmin=True)
+        self.user = api_client()
+        UserVisibility.objects.update_or_create(
+            user=self.user.handler._force_user.userProfile,
+            system=self.system,
+            talkgroup=None,
+            defaults={"allTalkgroups": True},
+        )
+
+        if connection.vendor == "postgresql":
+            # Small tables make a sequential scan look cheaper
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+
+    def plans(self, table: str, call) -> str:
+        with CaptureQueriesContext(connection) as queries:
+            call()
+        return "\n".join(
+            explain(query["sql"])
+            for query in queries.captured_queries
+            if query["sql"].startswith("SELECT") and f'"{table}"' in query["sql"]
+        )
+
+    def assertIndexed(self, table: str, call, indexes: tuple = ()) -> None:
+        """
+        Fails on a full scan of table, or if none of indexes is in the plan
+        """
+        plan = self.plans(table, call)
+        self.assertFalse(
+            re.search(rf"(^SCAN|Seq Scan on) {table}\b(?! USING)", plan, re.M),
+            f"Full scan of {table}\n{plan}",
+        )
+        if indexes:
+            self.assertTrue(
+                any(index in plan for index in indexes),
+                f"{table} read without {' or '.join(indexes)}\n{plan}",
+            )
+
+    def check_views(self, table: str, feed: str, talkgroupFeed: str, systemFeed: str):
+        talkgroupURL = f"/api/radio/talkgroup/{self.talkgroup.UUID}/transmissions"
+        before = {"before": str(time.time())}
+
+        for client, params, listIndexes in (
+            (self.admin, {}, (feed,)),
+            (self.admin, before, (feed,)),
+            # The ACL subqueries are OR'd, so SQLite may seek on the plain
+            # foreign key indexes and sort when there is no range to seek
+            (self.user, {}, ()),
+            (self.user, before, (systemFeed, talkgroupFeed)),
+        ):
+            with self.subTest(admin=client is self.admin, **params):
+                self.assertIndexed(
+                    table,
+                    lambda: client.get("/api/radio/transmission/list", params),
+                    listIndexes,
+                )
+                self.assertIndexed(
+                    table, lambda: client.get(talkgroupURL, params), (talkgroupFeed,)
+                )
+                self.assertIndexed(
+                    "radio_transcripttoken",
+                    lambda: client.get(
+                        "/api/radio/search/transmissions",
+                        {"q": "structure fire", **params},
+                    ),
+                    self.TOKEN_INDEXES,
+                )
+
+    @override_settings(TRANSMISSION_FEED=False)
+    def test_transmission_views(self):
+        self.check_views(
+            "radio_transmission",
+            "transmission_feed_idx",
+            "tx_talkgroup_feed_idx",
+            "tx_system_feed_idx",
+        )
+
+    @override_settings(TRANSMISSION_FEED=True)
+    def test_feed_views(self):
+        self.check_views(
+            "radio_transmissionfeed",
+            "feed_time_idx",
+            "feed_talkgroup_idx",
+            "feed_system_idx",
+        )
+
+    def test_prune(self):
+        self.assertIndexed(
+            "radio_transmission", _prune_transmissions, ("tx_system_feed_idx",)
+        )
+
+
+class VisibilityTests(TestCase):
+    def setUp(self):
+        public = SystemACL.objects.create(name="Public", public=True)
+        self.private = SystemACL.objects.create(name="Private", public=False)
+        self.system = System.objects.create(name="One", systemACL=public)
+        self.other = System.objects.create(name="Two", systemACL=public)
+
+        self.user = UserProfile.objects.create()
+        self.member = UserProfile.objects.create()
+        self.private.users.add(self.member)
+
+    def systems(self, user: UserProfile) -> set:
+        return set(
+            UserVisibility.objects.filter(
+                user=user, talkgroup__isnull=True
+            ).values_list("system__name", flat=True)
+        )
+
+    def assertNoRebuild(self, call) -> None:
+        with CaptureQueriesContext(connection) as queries:
+            call()
+        self.assertFalse(
+            [
+                query["sql"]
+                for query in queries.captured_queries
+                if "radio_uservisibility" in query["sql"]
+            ]
+        )
+
+    def test_edit_without_acl_change_skips_rebuild(self):
+        self.system.name = "Renamed"
+        self.assertNoRebuild(self.system.save)
+
+        talkgroup = TalkGroup.objects.create(system=self.system, decimalID=1)
+        talkgroup.alphaTag = "Renamed"
+        self.assertNoRebuild(talkgroup.save)
+
+    def test_acl_change_rebuilds_that_system(self):
+        self.system.systemACL = self.private
+        self.system.save()
+
+        self.assertEqual(self.systems(self.user), {"Two"})
+        self.assertEqual(self.systems(self.member), {"One", "Two"})
+
+        self.private.public = True
+        self.private.save()
+
+        self.assertEqual(self.systems(self.user), {"One", "Two"})
+
+    def test_talkgroup_move(self):
+        self.other.enableTalkGroupACLs = True
+        self.other.save()
+        talkgroup = TalkGroup.objects.create(system=self.system, decimalID=1)
+        acl = TalkGroupACL.objects.create(name="ACL")
+        acl.users.add(self.user)
+        acl.allowedTalkgroups.add(talkgroup)
+
+        talkgroup.system = self.other
+        talkgroup.save()
+
+        self.assertTrue(
+            UserVisibility.objects.filter(
+                user=self.user, system=self.other, talkgroup=talkgroup
+            ).exists()
+        )
+
+    def test_system_row_is_unique(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            UserVisibility.objects.create(user=self.user, system=self.system)
+
+    def test_new_talkgroup_refresh_waits_for_commit(self):
+        recorder = create_recorder()
+        recorder.system.enableTalkGroupACLs = True
+        recorder.system.save()
+        acl = TalkGroupACL.objects.create(name="ACL", defaultNewTalkgroups=True)
+        acl.users.add(self.user)
+        fake = FakeRecorder(str(recorder.forwarderWebhookUUID), talkgroups=1)
+        payload = TransmissionDetails(fake.payload()["json"])
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            with CaptureQueriesContext(connection) as queries:
+                (TX,) = ingest_transmissions(recorder, [(uuid.uuid4(), payload, "a")])
+        # No talkgroup row lock is held by the ingest transaction
+        self.assertFalse(
+            [
+                query["sql"]
+                for query in queries.captured_queries
+                if "FOR UPDATE" in query["sql"]
+                or "radio_uservisibility" in query["sql"]
+            ]
+        )
+
+        for callback in callbacks:
+            callback()
+        self.assertTrue(
+            UserVisibility.objects.filter(
+                user=self.user, talkgroup=TX.talkgroup
+            ).exists()
+        )
+
+
+def acl_filtered_transmissions(user: UserProfile) -> set:
+    """
+    The per system loop the transmission lists used before visible_transmissions
+    """
+    ACLs = SystemACL.objects.filter(Q(users=user) | Q(public=True))
+    visible = set()
+    for system in System.objects.filter(systemACL__in=ACLs).distinct():
+        TXs = Transmission.objects.filter(system=system)
+        if system.enableTalkGroupACLs:
+            TXs = TXs.filter(
+                talkgroup__in=TalkGroupACL.objects.filter(users=user).values(
+                    "allowedTalkgroups"
+                )
+            )
+        visible.update(TXs.values_list("UUID", flat=True))
+    return visible
+
+
+class VisibleTransmissionsTests(TestCase):
+    def setUp(self):
+        public = SystemACL.objects.create(name="Public", public=True)
+        private = SystemACL.objects.create(name="Private", public=False)
+        self.open = System.objects.create(name="Open", systemACL=public)
+        self.restricted = System.objects.create(name="Restricted", systemACL=private)
+        self.talkgroupOnly = System.objects.create(
+            name="Talkgroup ACLs", systemACL=public, enableTalkGroupACLs=True
+        )
+
+        self.user = UserProfile.objects.create()
+        self.member = UserProfile.objects.create()
+        private.users.add(self.member)
+
+        start = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+        self.talkgroups = {}
+        for system in (self.open, self.restricted, self.talkgroupOnly):
+            recorder = SystemRecorder.objects.create(system=system, name=system.name)
+            for decimalID in (1, 2):
+                talkgroup = TalkGroup.objects.create(system=system, decimalID=decimalID)
+                self.talkgroups[system.name, decimalID] = talkgroup
+                Transmission.objects.create(
+                    system=system,
+                    recorder=recorder,
+                    talkgroup=talkgroup,
+                    startTime=start,
+                    audioFile="audio/test.m4a",
+                )
+
+        acl = TalkGroupACL.objects.create(name="One")
+        acl.allowedTalkgroups.add(self.talkgroups["Talkgroup ACLs", 1])
+        acl.users.add(self.user)
+
+    def visible(self, user: UserProfile) -> set:
+        return set(visible_transmissions(user).values_list("UUID", flat=True))
+
+    def test_matches_the_acl_filter(self):
+        for user in (self.user, self.member):
+            with self.subTest(member=user is self.member):
+                self.assertEqual(self.visible(user), acl_filtered_transmissions(user))
+
+    def test_scopes(self):
+        talkgroups = {
+            (TX.system.name, TX.talkgroup.decimalID)
+            for TX in visible_transmissions(self.user)
+        }
+        # Every talkgroup of the open system, one of the talkgroup ACL system
+        self.assertEqual(talkgroups, {("Open", 1), ("Open", 2), ("Talkgroup ACLs", 1)})
+
+        # The restricted system, and no talkgroup ACL grant
+        talkgroups = {
+            (TX.system.name, TX.talkgroup.decimalID)
+            for TX in visible_transmissions(self.member)
+        }
+        self.assertEqual(
+            talkgroups, {("Open", 1), ("Open", 2), ("Restricted", 1), ("Restricted", 2)}
+        )
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        recorder = create_recorder()
+        self.system = recorder.system
+        self.talkgroup = TalkGroup.objects.create(
+            system=self.system, decimalID=1200, alphaTag="Fire Dispatch"
+        )
+        self.TXs = {}
+        for offset, transcript in enumerate(
+            ("engine five respond", "engine five cancel", "medic five respond")
+        ):
+            self.TXs[transcript] = Transmission.objects.create(
+                system=self.system,
+                recorder=recorder,
+                talkgroup=self.talkgroup,
+                startTime=datetime(2024, 1, 1, 0, 0, offset, tzinfo=dt_timezone.utc),
+                audioFile="audio/test.m4a",
+                transcript=transcript,
+            )
+
+    def matches(self, query: str) -> set:
+        return {
+            TX.transcript
+            for TX in Transmission.objects.filter(UUID__in=transcript_matches(query))
+        }
+
+    def test_every_token_must_match(self):
+        self.assertEqual(
+            self.matches("five respond"), {"engine five respond", "medic five respond"}
+        )
+        self.assertEqual(self.matches("Engine, FIVE respond"), {"engine five respond"})
+        self.assertEqual(self.matches("engine medic"), set())
+
+    def test_catalog_prefixes(self):
+        talkgroups = TalkGroup.objects.filter(system=self.system)
+        other = TalkGroup.objects.create(
+            system=self.system, decimalID=1300, alphaTag="Fire Tac"
+        )
+
+        self.assertEqual(
+            set(catalog_filter(talkgroups, "fir", "talkgroup")),
+            {self.talkgroup, other},
+        )
+        self.assertEqual(
+            set(catalog_filter(talkgroups, "fire disp", "talkgroup")), {self.talkgroup}
+        )
+        self.assertEqual(set(catalog_filter(talkgroups, "13", "talkgroup")), {other})
+        self.assertEqual(set(catalog_filter(talkgroups, "ire", "talkgroup")), set())
+
+    def test_tokens_follow_transcript_edits(self):
+        TX = self.TXs["engine five cancel"]
+
+        TX.transcript = "ladder two respond"
+        TX.save()
+        self.assertEqual(self.matches("engine cancel"), set())
+        self.assertEqual(self.matches("ladder respond"), {"ladder two respond"})
+
+        TX.transcript = ""
+        TX.save()
+        self.assertEqual(self.matches("ladder"), set())
+        self.assertFalse(TranscriptToken.objects.filter(transmission=TX).exists())
+
+        self.TXs["medic five respond"].delete()
+        self.assertEqual(self.matches("five respond"), {"engine five respond"})
+        self.assertFalse(TranscriptToken.objects.filter(token="medic").exists())
+
+    def test_catalog_follows_edits(self):
+        self.talkgroup.alphaTag = "Police Main"
+        self.talkgroup.save()
+        talkgroups = TalkGroup.objects.all()
+
+        self.assertEqual(set(catalog_filter(talkgroups, "fire", "talkgroup")), set())
+        self.assertEqual(
+            set(catalog_filter(talkgroups, "pol", "talkgroup")), {self.talkgroup}
+        )
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.owner = api_client()
+        self.other = api_client()
+        scanList = ScanList.objects.create(
+            owner=self.owner.handler._force_user.userProfile,
+            name="Private",
+            communityShared=False,
+        )
+        self.URL = f"/api/radio/scanlist/{scanList.UUID}"
+
+    def etag(self, client: APIClient) -> str:
+        view = ScanListView()
+        view.versions = get_versions(view.get_version_names())
+        request = mock.Mock(get_full_path=lambda: self.URL)
+        profile = client.handler._force_user.userProfile
+        return f'"{view.get_version_token(request, str(profile.UUID))}"'
+
+    def test_owner_gets_not_modified(self):
+        etag = self.owner.get(self.URL)["ETag"]
+        self.assertEqual(
+            self.owner.get(self.URL, HTTP_IF_NONE_MATCH=etag).status_code, 304
+        )
+
+    def test_access_is_checked_before_the_tag(self):
+        response = self.other.get(self.URL, HTTP_IF_NONE_MATCH=self.etag(self.other))
+        self.assertEqual(response.status_code, 401)
+
+
+class IngestStatusTests(TestCase):
+    @override_settings(INGEST_BACKLOG_CACHE_SECONDS=0)
+    @mock.patch(
+        "radio.views.ingest_backlog", return_value={"messages": 0, "consumers": 0}
+    )
+    def test_worker_stats_are_collected(self, backlog):
+        replies = [{"celery@one": radio_stats(None)}, {"celery@two": radio_stats(None)}]
+        with mock.patch.object(
+            app.control, "broadcast", return_value=replies
+        ) as broadcast:
+            response = api_client(siteAdmin=True).get(
+                "/api/radio/transmission/ingest/status"
+            )
+
+        self.assertEqual(broadcast.call_args.args[0], "radio_stats")
+        self.assertEqual(set(response.data["workers"]), {"celery@one", "celery@two"})
+        self.assertEqual(
+            set(response.data["workers"]["celery@one"]), set(response.data["process"])
+        )
+
+
+@override_settings(ROUTING_INDEX_CHECK_SECONDS=3600)
+class RoutingIndexTests(TestCase):
+    def setUp(self):
+        system = create_recorder().system
+        self.talkgroup = TalkGroup.objects.create(system=system, decimalID=1)
+        owner = api_client().handler._force_user.userProfile
+        self.scanList = ScanList.objects.create(owner=owner, name="Scan")
+        self.scanner = Scanner.objects.create(owner=owner, name="Scanner")
+        routing.build()
+
+    def rooms(self) -> set:
+        return set(routing.rooms(self.talkgroup.UUID))
+
+    def test_link_edits_rebuild_the_index(self):
+        own = f"tx_{self.talkgroup.UUID}"
+        scanList = f"tx_{self.scanList.UUID}"
+        scanner = f"tx_{self.scanner.UUID}"
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.scanList.talkgroups.add(self.talkgroup)
+            self.scanner.scanlists.add(self.scanList)
+        self.assertEqual(self.rooms(), {own, scanList, scanner})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.talkgroup.scanlist_set.clear()
+        self.assertEqual(self.rooms(), {own})
+        self.assertEqual(routing.versions, get_versions(["ScanList", "Scanner"]))
+
+    def test_transmission_reaches_only_its_rooms(self):
+        other = TalkGroup.objects.create(system=self.talkgroup.system, decimalID=2)
+        otherList = ScanList.objects.create(owner=self.scanList.owner, name="Other")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.scanList.talkgroups.add(self.talkgroup)
+            self.scanner.scanlists.add(self.scanList)
+            otherList.talkgroups.add(other)
+
+        data = {"UUID": str(uuid.uuid4()), "talkgroup": str(self.talkgroup.UUID)}
+        with mock.patch("radio.helpers.fanout.emit") as emit:
+            self.assertEqual(fan_out_transmission(data), 3)
+
+        self.assertEqual(
+            {call.kwargs["room"] for call in emit.call_args_list},
+            {
+                f"tx_{self.talkgroup.UUID}",
+                f"tx_{self.scanList.UUID}",
+                f"tx_{self.scanner.UUID}",
+            },
+        )
+        for call in emit.call_args_list:
+            self.assertEqual(call.args, (call.kwargs["room"], data))
+
+
+@override_settings(ALERT_INDEX_CHECK_SECONDS=3600)
+class AlertIndexTests(TestCase):
+    def setUp(self):
+        system = create_recorder().system
+        self.talkgroup = TalkGroup.objects.create(system=system, decimalID=1)
+        self.unit = Unit.objects.create(system=system, decimalID=100)
+        self.other = Unit.objects.create(system=system, decimalID=200)
+        user = UserProfile.objects.create()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.talkgroupAlert = UserAlert.objects.create(user=user, name="TG")
+            self.talkgroupAlert.talkgroups.add(self.talkgroup)
+            self.unitAlert = UserAlert.objects.create(user=user, name="Unit")
+            self.unitAlert.units.add(self.unit, self.other)
+        alert_index.invalidate()
+
+    def match(self, emergency: bool = False) -> list:
+        return [
+            (kind, alert.name, units)
+            for kind, alert, units in match_alerts(
+                self.talkgroup.UUID, [self.other.UUID, self.unit.UUID], emergency
+            )
+        ]
+
+    def test_talkgroup_and_unit_alerts_fire(self):
+        self.assertEqual(
+            self.match(),
+            [
+                ("Talkgroup", "TG", []),
+                ("Unit", "Unit", [str(self.other.UUID), str(self.unit.UUID)]),
+            ],
+        )
+
+    def test_edit_bumps_the_version_and_rebuilds(self):
+        self.match()
+        version = get_versions(ALERT_VERSIONS)
+        rebuilds = alert_index.rebuilds
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.talkgroupAlert.emergencyOnly = True
+            self.talkgroupAlert.save()
+
+        self.assertEqual(
+            get_versions(ALERT_VERSIONS)["UserAlert"], version["UserAlert"] + 1
+        )
+        self.assertEqual(
+            self.match(),
+            [("Unit", "Unit", [str(self.other.UUID), str(self.unit.UUID)])],
+        )
+        self.assertEqual(alert_index.rebuilds, rebuilds + 1)
+        self.assertEqual(len(self.match(emergency=True)), 2)
+
+    def test_edit_elsewhere_is_seen_through_the_version(self):
+        self.match()
+
+        # Another process unlinks the unit, this one only sees the counter move
+        UserAlert.units.through.objects.filter(unit=self.unit).delete()
+        _bump("UserAlert")
+        with override_settings(ALERT_INDEX_CHECK_SECONDS=0):
+            self.assertEqual(self.match()[1], ("Unit", "Unit", [str(self.other.UUID)]))
+
+
+class NotificationDispatcherTests(TestCase):
+    def setUp(self):
+        self.dispatcher = NotificationDispatcher()
+        self.dispatcher._start()
+
+    def hit(self, alert: str = "alert") -> None:
+        self.dispatcher.submit(("user", alert), "json://localhost", "T", "B", False)
+
+    @override_settings(NOTIFICATION_COALESCE_SECONDS=0)
+    def test_failed_submit_keeps_no_slot(self):
+        self.dispatcher.pool.shutdown()
+        with self.assertRaises(RuntimeError):
+            self.hit()
+        self.assertEqual(self.dispatcher.inflight, 0)
+
+    @override_settings(NOTIFICATION_COALESCE_SECONDS=0.01)
+    def test_flusher_survives_a_failed_delivery(self):
+        with mock.patch.object(
+            self.dispatcher, "_deliver", side_effect=[RuntimeError("boom"), None]
+        ) as deliver:
+            self.hit("one")
+            self.hit("two")
+            deadline = time.monotonic() + 5
+            while deliver.call_count < 2 and time.monotonic() < deadline:
+                time.sleep(0.01)
+        self.assertEqual(deliver.call_count, 2)
+
+    def test_flush_leaves_a_running_pool(self):
+        pool = self.dispatcher.pool
+        self.dispatcher.flush()
+        self.assertIsNot(self.dispatcher.pool, pool)
+        self.assertIsNone(self.dispatcher.pool.submit(lambda: None).result())
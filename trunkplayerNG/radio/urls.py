@@ -128,11 +128,62 @@ urlpatterns = [
         views.TransmissionCreate.as_view(),
         name="transmission_create",
     ),
+    path(
+        "transmission/ingest/status",
+        views.TransmissionIngestStatus.as_view(),
+        name="transmission_ingest_status",
+    ),
+    path(
+        "transmission/bulk_create",
+        views.TransmissionBulkCreate.as_view(),
+        name="transmission_bulk_create",
+    ),
+    path(
+        "transmission/upload",
+        views.TransmissionUpload.as_view(),
+        name="transmission_upload",
+    ),
+    path(
+        "transmission/upload/<str:filename>",
+        views.TransmissionUpload.as_view(),
+        name="transmission_upload_raw",
+    ),
     path(
         "transmission/<uuid:UUID>",
         views.TransmissionView.as_view(),
         name="transmission_view",
     ),
+    path(
+        "search/transmissions",
+        views.SearchTransmissionList.as_view(),
+        name="search_transmissions",
+    ),
+    path(
+        "search/talkgroups",
+        views.SearchTalkGroupList.as_view(),
+        name="search_talkgroups",
+    ),
+    path("search/units", views.SearchUnitList.as_view(), name="search_units"),
+    path(
+        "activity/system/<uuid:UUID>",
+        views.SystemActivity.as_view(),
+        name="activity_system",
+    ),
+    path(
+        "activity/system/<uuid:UUID>/talkgroups",
+        views.SystemTalkGroupActivity.as_view(),
+        name="activity_system_talkgroups",
+    ),
+    path(
+        "activity/talkgroup/<uuid:UUID>",
+        views.TalkGroupActivityView.as_view(),
+        name="activity_talkgroup",
+    ),
+    path(
+        "activity/unit/<uuid:UUID>",
+        views.UnitActivityView.as_view(),
+        name="activity_unit",
+    ),
     path("incident/list", views.IncidentList.as_view(), name="incident_list"),
     path(
         "incident/create", views.IncidentCreate.as_view(), name="incident_create"
@@ -179,6 +230,9 @@ urlpatterns = [
     path(
         "scanlist/create", views.ScanListCreate.as_view(), name="scanlist_create"
     ),
+    path(
+        "scanlist/routing", views.ScanListRouting.as_view(), name="scanlist_routing"
+    ),
     path(
         "scanlist/<uuid:UUID>", views.ScanListView.as_view(), name="scanlist_view"
     ),
@@ -1,15 +1,22 @@
+import base64
+import hashlib
+import json
 import logging
 from re import T
 
 from django.conf import settings
+from django.core.cache import caches
 from rest_framework.settings import api_settings
 from rest_framework.views import APIView
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.response import Response
 
+from django.core.files.base import ContentFile
 from django.http import Http404, HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
 from django.db.models import Q
-from rest_framework.parsers import JSONParser
+from rest_framework.parsers import JSONParser, MultiPartParser
 from rest_framework import status
 
 from drf_yasg import openapi
@@ -18,15 +25,49 @@ import sentry_sdk
 
 from radio.models import *
 from radio.serializers import *
-from radio.tasks import import_radio_refrence, send_transmission_to_web
+from radio.tasks import import_radio_refrence
 
-from radio.helpers.transmission import new_transmission_handler
+from radio.helpers.activity import (
+    RESOLUTIONS,
+    activity_series,
+    activity_window,
+    busiest_talkgroups,
+)
+from radio.helpers.bulk import archive_items, bulk_transmission_handler
+from radio.helpers.feed import feed_enabled
+from radio.helpers.versions import VISIBILITY, get_versions
+from radio.helpers.cache import get_recorder
+from radio.helpers.fanout import routing_index
+from radio.helpers.ingest import DuplicateTransmission
+from radio.helpers.search import catalog_filter, tokenize, transcript_matches
+from radio.helpers.status import process_stats, worker_stats
+from radio.helpers.transmission import (
+    audio_file_name,
+    ingest_backlog,
+    new_transmission_dispatch,
+    new_transmission_handler,
+    spool_transmission_handler,
+    upload_transmission_handler,
+)
 from radio.helpers.utils import (
+    user_allowed_to_access_transmission,
     user_allowed_to_download_transmission,
     get_user_allowed_systems,
     get_user_allowed_talkgroups,
+    transmission_list_queryset,
+    transmission_queryset,
+    visible_transmissions,
+)
+from radio.helpers.visibility import (
+    acl_scope,
+    unrestricted_systems,
+    user_can_view,
+    visible_systems,
+    visible_talkgroups,
 )
 
+from radio.pagination import TransmissionCursorPagination
+from radio.parsers import ARCHIVE_UPLOAD_PARSERS, AudioUploadParser, NDJSONParser
 from radio.permission import (
     FeederFree,
     IsSAOrReadOnly,
@@ -65,14 +106,70 @@ def transmission_download(request, uuid):
 
     return response
 
+def ingest_backlogged() -> bool:
+    return ingest_backlog()["messages"] >= settings.ASYNC_INGEST_MAX_BACKLOG
+
+
+def ingest_backlogged_response() -> Response:
+    return Response(
+        "Ingest queue is full, retry later",
+        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={"Retry-After": "5"},
+    )
+
+
+def spool_transmission_response(
+    recorderUUID: str, jsonx: dict, audioFile, UUID: str = None
+) -> Response:
+    """
+    Queues a Transmission for the ingest workers, or refuses it while backlogged
+    """
+    if ingest_backlogged():
+        return ingest_backlogged_response()
+
+    UUID = spool_transmission_handler(recorderUUID, jsonx, audioFile, UUID)
+    return Response(
+        {"success": True, "UUID": UUID, "queued": True},
+        status=status.HTTP_202_ACCEPTED,
+    )
+
+
+CURSOR_PARAMETERS = [
+    openapi.Parameter(
+        "cursor",
+        openapi.IN_QUERY,
+        type=openapi.TYPE_STRING,
+        description="Keyset page cursor, send empty for the newest page",
+    ),
+    openapi.Parameter(
+        "before",
+        openapi.IN_QUERY,
+        type=openapi.TYPE_STRING,
+        description="Only transmissions before this time (ISO 8601 or unix)",
+    ),
+    openapi.Parameter(
+        "after",
+        openapi.IN_QUERY,
+        type=openapi.TYPE_STRING,
+        description="Only transmissions after this time (ISO 8601 or unix)",
+    ),
+]
+
+
 class PaginationMixin(object):
+    cursor_pagination_class = None
+
     @property
     def paginator(self):
         """
         The paginator instance associated with the view, or `None`.
         """
         if not hasattr(self, "_paginator"):
-            if self.pagination_class is None:
+            if self.cursor_pagination_class and self.cursor_pagination_class.requested(
+                self.request
+            ):
+                self._paginator = self.cursor_pagination_class()
+            elif self.pagination_class is None:
                 self._paginator = None
             else:
                 self._paginator = self.pagination_class()
@@ -95,6 +192,149 @@ class PaginationMixin(object):
         assert self.paginator is not None
         return self.paginator.get_paginated_response(data)
 
+    def get_page_response(self, data):
+        """
+        Cursor pages carry their links, offset pages stay a bare list
+        """
+        if isinstance(self.paginator, TransmissionCursorPagination):
+            return self.get_paginated_response(data)
+        return Response(data)
+
+
+class NotModified(Exception):
+    pass
+
+
+class ConditionalGetMixin(object):
+    """
+    ETag/If-None-Match for GETs, answered before the handler queries or serializes
+
+    The tag hashes the path (query string included), the user's ACL scope and the
+    ModelVersion counters of etag_models, so it changes whenever any of them do.
+    """
+
+    etag_models = []
+    etag_acl_scoped = True
+
+    def get_etag_scope(self, request) -> str:
+        user: UserProfile = getattr(request.user, "userProfile", None)
+        if user is None:
+            return "anonymous"
+        if user.siteAdmin:
+            return "admin"
+        return str(user.UUID)
+
+    def get_version_names(self) -> list:
+        names = list(self.etag_models)
+        if self.etag_acl_scoped:
+            names.append(VISIBILITY)
+        return names
+
+    def get_version_token(self, request, scope: str) -> str:
+        token = "|".join(
+            [
+                self.__class__.__name__,
+                request.get_full_path(),
+                scope,
+                *(f"{name}:{version}" for name, version in self.versions.items()),
+            ]
+        )
+        return hashlib.sha1(token.encode()).hexdigest()
+
+    def has_conditional_access(self, request, *args, **kwargs) -> bool:
+        """
+        Object level access checks of the handler, run before a tag is answered
+        """
+        return True
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+
+        self.etag = None
+        if request.method not in ("GET", "HEAD") or not self.etag_models:
+            return
+
+        self.versions = get_versions(self.get_version_names())
+        self.etag = f'"{self.get_version_token(request, self.get_etag_scope(request))}"'
+        if self.etag in parse_etags(request.META.get("HTTP_IF_NONE_MATCH", "")):
+            # Denied requests fall through to the handler and its error response
+            if self.has_conditional_access(request, *args, **kwargs):
+                raise NotModified()
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return Response(status=status.HTTP_304_NOT_MODIFIED)
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+
+        if getattr(self, "etag", None) and response.status_code in (200, 304):
+            response["ETag"] = self.etag
+            # Tags differ per user, shared caches must not reuse them
+            response["Cache-Control"] = "private, no-cache"
+            patch_vary_headers(response, ["Authorization", "Cookie"])
+        return response
+
+
+class CachedResponse(Exception):
+    def __init__(self, data) -> None:
+        self.data = data
+
+
+class ResponseCacheMixin(ConditionalGetMixin):
+    """
+    Serves GETs from the "responses" cache, with the ETag handling on top
+
+    Keyed on the path, the ACL scope (shared by users holding the same ACLs) and
+    the etag_models counters, so writes invalidate by moving to a new key.
+    """
+
+    def get_cache_scope(self, request) -> str:
+        if not self.etag_acl_scoped:
+            return "all"
+        return acl_scope(
+            getattr(request.user, "userProfile", None), self.versions[VISIBILITY]
+        )
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+
+        self.cache_key = None
+        if request.method != "GET" or not self.etag_models:
+            return
+
+        token = self.get_version_token(request, self.get_cache_scope(request))
+        self.cache_key = f"response:{token}"
+        data = caches["responses"].get(self.cache_key)
+        if data is not None:
+            raise CachedResponse(data)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, CachedResponse):
+            self.cache_key = None
+            response = Response(exc.data)
+            response["X-Cache"] = "HIT"
+            return response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if getattr(self, "cache_key", None) and response.status_code == 200:
+            caches["responses"].set(
+                self.cache_key, response.data, settings.RESPONSE_CACHE_TIMEOUT
+            )
+            response["X-Cache"] = "MISS"
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+def serialize_transmission_list(page) -> list:
+    """
+    Serializes a page of transmission_list_queryset()
+    """
+    if feed_enabled():
+        return TransmissionFeedSerializer(page, many=True).data
+    return TransmissionListSerializer(page, many=True).data
+
 
 class UserAlertList(APIView, PaginationMixin):
     queryset = UserAlert.objects.all()
@@ -436,11 +676,12 @@ class SystemACLView(APIView):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class SystemList(APIView, PaginationMixin):
+class SystemList(ResponseCacheMixin, APIView, PaginationMixin):
     queryset = System.objects.all()
     serializer_class = SystemSerializer
     permission_classes = [IsSAOrReadOnly]
     pagination_class = api_settings.DEFAULT_PAGINATION_CLASS
+    etag_models = ["System", "SystemACL"]
 
     @swagger_auto_schema(tags=["System"])
     def get(self, request, format=None):
@@ -758,11 +999,13 @@ class SystemForwarderView(APIView):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class CityList(APIView, PaginationMixin):
+class CityList(ResponseCacheMixin, APIView, PaginationMixin):
     queryset = City.objects.all()
     serializer_class = CitySerializer
     permission_classes = [IsSAOrReadOnly]
     pagination_class = api_settings.DEFAULT_PAGINATION_CLASS
+    etag_models = ["City"]
+    etag_acl_scoped = False
 
     @swagger_auto_schema(tags=["City"])
     def get(self, request, format=None):
@@ -859,11 +1102,13 @@ class CityView(APIView):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class AgencyList(APIView, PaginationMixin):
+class AgencyList(ResponseCacheMixin, APIView, PaginationMixin):
     queryset = Agency.objects.all()
     serializer_class = AgencyViewListSerializer
     permission_classes = [IsSAOrReadOnly]
     pagination_class = api_settings.DEFAULT_PAGINATION_CLASS
+    etag_models = ["Agency", "City"]
+    etag_acl_scoped = False
 
     @swagger_auto_schema(tags=["Agency"])
     def get(self, request, format=None):
@@ -966,11 +1211,12 @@ class AgencyView(APIView):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class TalkGroupList(APIView, PaginationMixin):
+class TalkGroupList(ResponseCacheMixin, APIView, PaginationMixin):
     queryset = TalkGroup.objects.all()
     serializer_class = TalkGroupViewListSerializer
     permission_classes = [IsSAOrReadOnly]
     pagination_class = api_settings.DEFAULT_PAGINATION_CLASS
+    etag_models = ["TalkGroup", "Agency", "City"]
 
     @swagger_auto_schema(tags=["TalkGroup"])
     def get(self, request, format=None):
@@ -978,11 +1224,9 @@ class TalkGroupList(APIView, PaginationMixin):
         if user.siteAdmin:
             AllowedTalkgroups = TalkGroup.objects.all()
         else:
-            systemUUIDs, systems = get_user_allowed_systems(user.UUID)
-
-            AllowedTalkgroups = []
-            for system in systems:
-                AllowedTalkgroups.extend(get_user_allowed_talkgroups(system, user.UUID))
+            AllowedTalkgroups = visible_talkgroups(user.UUID).order_by(
+                "system", "decimalID"
+            )
 
         page = self.paginate_queryset(AllowedTalkgroups)
         if page is not None:
@@ -1061,13 +1305,7 @@ class TalkGroupView(APIView):
             serializer = TalkGroupViewListSerializer(talkGroup)
             return Response(serializer.data)
         else:
-            systemUUIDs, systems = get_user_allowed_systems(user.UUID)
-
-            AllowedTalkgroups = []
-            for system in systems:
-                AllowedTalkgroups.extend(get_user_allowed_talkgroups(system, user.UUID))
-
-            if not talkGroup in AllowedTalkgroups:
+            if not user_can_view(user.UUID, talkGroup.system_id, talkGroup.UUID):
                 return Response(status=status.HTTP_401_UNAUTHORIZED)
 
         serializer = TalkGroupViewListSerializer(talkGroup)
@@ -1128,6 +1366,7 @@ class TalkGroupTransmissionList(APIView, PaginationMixin):
     serializer_class = TransmissionListSerializer
     permission_classes = [IsSAOrReadOnly]
     pagination_class = api_settings.DEFAULT_PAGINATION_CLASS
+    cursor_pagination_class = TransmissionCursorPagination
 
     def get_object(self, UUID):
         try:
@@ -1135,28 +1374,22 @@ class TalkGroupTransmissionList(APIView, PaginationMixin):
         except UserProfile.DoesNotExist:
             raise Http404
 
-    @swagger_auto_schema(tags=["Transmission"])
+    @swagger_auto_schema(tags=["Transmission"], manual_parameters=CURSOR_PARAMETERS)
     def get(self, request, UUID, format=None):
         user: UserProfile = request.user.userProfile
         TalkGroupX: TalkGroup = self.get_object(UUID)
 
-        Transmissions = Transmission.objects.filter(talkgroup=TalkGroupX)
+        Transmissions = visible_transmissions(
+            user, transmission_list_queryset()
+        ).filter(talkgroup=TalkGroupX)
 
         if not user.siteAdmin:
-            SystemX: System = TalkGroupX.system
-            systemUUIDs, systems = get_user_allowed_systems(user.UUID)
-            talkgroupsAllowed = get_user_allowed_talkgroups(SystemX, user.UUID)
-
-            if not SystemX in systems:
-                return Response(status=status.HTTP_401_UNAUTHORIZED)
-
-            if not TalkGroupX in talkgroupsAllowed:
+            if not user_can_view(user.UUID, TalkGroupX.system_id, TalkGroupX.UUID):
                 return Response(status=status.HTTP_401_UNAUTHORIZED)
 
         page = self.paginate_queryset(Transmissions)
         if page is not None:
-            serializer = TransmissionListSerializer(page, many=True)
-            return Response(serializer.data)
+            return self.get_page_response(serialize_transmission_list(page))
 
 
 class TalkGroupACLList(APIView):
@@ -1407,11 +1640,12 @@ class SystemRecorderView(APIView):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class UnitList(APIView, PaginationMixin):
+class UnitList(ResponseCacheMixin, APIView, PaginationMixin):
     queryset = Unit.objects.all()
     serializer_class = UnitSerializer
     permission_classes = [IsSAOrReadOnly]
     pagination_class = api_settings.DEFAULT_PAGINATION_CLASS
+    etag_models = ["Unit"]
 
     @swagger_auto_schema(tags=["Unit"])
     def get(self, request, format=None):
@@ -1533,22 +1767,11 @@ class TransmissionUnitList(APIView):
     def get(self, request, UUID, format=None):
         user: UserProfile = request.user.userProfile
 
-        TransmissionX: Transmission = Transmission.objects.get(UUID=UUID)
+        TransmissionX: Transmission = transmission_queryset().get(UUID=UUID)
         Units = TransmissionX.units.all()
 
         if not user.siteAdmin:
-            systemUUIDs, systems = get_user_allowed_systems(user.UUID)
-            if TransmissionX.system in systems:
-                SystemX: System = TransmissionX.system
-
-                if not SystemX in systems:
-                    return Response(status=status.HTTP_401_UNAUTHORIZED)
-
-                if SystemX.enableTalkGroupACLs:
-                    talkgroupsAllowed = get_user_allowed_talkgroups(SystemX, user.UUID)
-                    if not TransmissionX.talkgroup in talkgroupsAllowed:
-                        return Response(status=status.HTTP_401_UNAUTHORIZED)
-            else:
+            if not user_allowed_to_access_transmission(TransmissionX, user.UUID):
                 return Response(status=status.HTTP_401_UNAUTHORIZED)
 
         serializer = TransmissionUnitSerializer(Units, many=True)
@@ -1625,20 +1848,11 @@ class TransmissionFreqList(APIView):
     def get(self, request, UUID, format=None):
         user: UserProfile = request.user.userProfile
 
-        TransmissionX: Transmission = Transmission.objects.get(UUID=UUID)
+        TransmissionX: Transmission = transmission_queryset().get(UUID=UUID)
         Freqs = TransmissionX.frequencys.all()
 
         if not user.siteAdmin:
-            systemUUIDs, systems = get_user_allowed_systems(user.UUID)
-            if TransmissionX.system in systems:
-                SystemX: System = TransmissionX.system
-                if not SystemX in systems:
-                    return Response(status=status.HTTP_401_UNAUTHORIZED)
-                if SystemX.enableTalkGroupACLs:
-                    talkgroupsAllowed = get_user_allowed_talkgroups(SystemX, user.UUID)
-                    if not TransmissionX.talkgroup in talkgroupsAllowed:
-                        return Response(status=status.HTTP_401_UNAUTHORIZED)
-            else:
+            if not user_allowed_to_access_transmission(TransmissionX, user.UUID):
                 return Response(status=status.HTTP_401_UNAUTHORIZED)
 
         serializer = TransmissionFreqSerializer(Freqs, many=True)
@@ -1669,38 +1883,17 @@ class TransmissionList(APIView, PaginationMixin):
     serializer_class = TransmissionListSerializer
     permission_classes = [IsSAOrReadOnly]
     pagination_class = api_settings.DEFAULT_PAGINATION_CLASS
+    cursor_pagination_class = TransmissionCursorPagination
     filter_backends = []
-    @swagger_auto_schema(tags=["Transmission"])
+    @swagger_auto_schema(tags=["Transmission"], manual_parameters=CURSOR_PARAMETERS)
     def get(self, request, format=None):
         user: UserProfile = request.user.userProfile
 
-        if user.siteAdmin:
-            AllowedTransmissions = Transmission.objects.all()
-        else:
-            systemUUIDs, systems = get_user_allowed_systems(user.UUID)
-            AllowedTransmissions = []
-
-            for system in systems:
-                if system.enableTalkGroupACLs:
-                    TGAllowed = get_user_allowed_talkgroups(system, user.UUID)
-                    AllowedTransmissions.extend(
-                        Transmission.objects.filter(
-                            system=system, talkgroup__in=TGAllowed
-                        )
-                    )
-                else:
-                    AllowedTransmissions.extend(
-                        Transmission.objects.filter(system=system)
-                    )
-
-        # AllowedTransmissions = sorted(
-        #     AllowedTransmissions, key=lambda instance: instance.startTime, reverse=True
-        # )
+        AllowedTransmissions = visible_transmissions(user, transmission_list_queryset())
 
         page = self.paginate_queryset(AllowedTransmissions)
         if page is not None:
-            serializer = TransmissionListSerializer(page, many=True)
-            return Response(serializer.data)
+            return self.get_page_response(serialize_transmission_list(page))
 
 
 class TransmissionCreate(APIView):
@@ -1731,61 +1924,206 @@ class TransmissionCreate(APIView):
         ),
     )
     def post(self, request, format=None):
-        from radio.tasks import send_transmission_notifications
-
         data = JSONParser().parse(request)
 
-        if not SystemRecorder.objects.filter(forwarderWebhookUUID=data["recorder"]):
+        if not get_recorder(data["recorder"]):
             return Response(
                 "Not allowed to post this talkgroup",
                 status=status.HTTP_401_UNAUTHORIZED,
             )
 
         try:
-            Callback = new_transmission_handler(data)
+            if settings.ASYNC_INGEST:
+                audioFile = ContentFile(
+                    base64.b64decode(data["audioFile"]),
+                    name=audio_file_name(data["name"]),
+                )
+                return spool_transmission_response(
+                    data["recorder"], data["json"], audioFile, data.get("UUID")
+                )
+
+            TX: Transmission = new_transmission_handler(data)
 
-            if not Callback:
+            if not TX:
                 return Response(
                     "Not allowed to post this talkgroup",
                     status=status.HTTP_401_UNAUTHORIZED,
                 )
 
-            Callback["UUID"] = uuid.uuid4()
+            TXData = new_transmission_dispatch(TX)
+            return Response({"success": True, "UUID": TXData["UUID"]})
+        except DuplicateTransmission as e:
+            return Response({"success": True, "UUID": e.UUID, "duplicate": True})
+        except Exception as e:
+            if settings.SEND_TELEMETRY:
+                sentry_sdk.set_context("add_tx_data", {"recorder": data["recorder"]})
+                sentry_sdk.capture_exception(e)
+            return Response(str(e), status=status.HTTP_400_BAD_REQUEST)
+
+
+class TransmissionUpload(APIView):
+    queryset = Transmission.objects.all()
+    serializer_class = TransmissionSerializer
+    permission_classes = [FeederFree]
+    parser_classes = [MultiPartParser, AudioUploadParser]
+
+    @swagger_auto_schema(
+        tags=["Transmission"],
+        manual_parameters=[
+            openapi.Parameter(
+                "recorder",
+                openapi.IN_FORM,
+                type=openapi.TYPE_STRING,
+                description="Recorder Key (query parameter for raw audio bodies)",
+            ),
+            openapi.Parameter(
+                "json",
+                openapi.IN_FORM,
+                type=openapi.TYPE_STRING,
+                description="Trunk-Recorder JSON (X-Trunk-Recorder-JSON header for raw audio bodies)",
+            ),
+            openapi.Parameter(
+                "audioFile",
+                openapi.IN_FORM,
+                type=openapi.TYPE_FILE,
+                description="Audio File",
+            ),
+        ],
+    )
+    def post(self, request, filename=None, format=None):
+        if "audioFile" in request.FILES:
+            recorderUUID = request.data.get("recorder")
+            jsonx = request.data.get("json")
+            audio = request.FILES["audioFile"]
+        else:
+            recorderUUID = request.query_params.get("recorder")
+            jsonx = request.headers.get("X-Trunk-Recorder-JSON")
+            audio = request.FILES.get("file")
+
+        if not recorderUUID or not jsonx or not audio:
+            return Response(
+                "recorder, json and audio are required",
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-            recorderX: SystemRecorder = SystemRecorder.objects.get(
-                forwarderWebhookUUID=Callback["recorder"]
+        if not get_recorder(recorderUUID):
+            return Response(
+                "Not allowed to post this talkgroup",
+                status=status.HTTP_401_UNAUTHORIZED,
             )
-            Callback["system"] = str(recorderX.system.UUID)
 
-            TX = TransmissionUploadSerializer(data=Callback, partial=True)
+        try:
+            audio.name = audio_file_name(audio.name)
 
-            if TX.is_valid(raise_exception=True):
-                TX.save()
-                socket_data = {"UUID":TX.data["UUID"], "talkgroup": TX.data["talkgroup"]}
-                send_transmission_to_web.delay(socket_data, Callback["talkgroup"])
-                send_transmission_notifications.delay(TX.data)
-                return Response({"success": True, "UUID": Callback["UUID"]})
-            else:
-                Response(TX.errors)
+            if settings.ASYNC_INGEST:
+                return spool_transmission_response(
+                    recorderUUID, json.loads(jsonx), audio, request.data.get("UUID")
+                )
+
+            TX: Transmission = upload_transmission_handler(
+                recorderUUID, json.loads(jsonx), audio, UUID=request.data.get("UUID")
+            )
+
+            if not TX:
+                return Response(
+                    "Not allowed to post this talkgroup",
+                    status=status.HTTP_401_UNAUTHORIZED,
+                )
+
+            TXData = new_transmission_dispatch(TX)
+            return Response({"success": True, "UUID": TXData["UUID"]})
+        except DuplicateTransmission as e:
+            return Response({"success": True, "UUID": e.UUID, "duplicate": True})
+        except Exception as e:
+            if settings.SEND_TELEMETRY:
+                sentry_sdk.set_context("add_tx_data", {"recorder": recorderUUID})
+                sentry_sdk.capture_exception(e)
+            return Response(str(e), status=status.HTTP_400_BAD_REQUEST)
+
+
+class TransmissionBulkCreate(APIView):
+    queryset = Transmission.objects.all()
+    serializer_class = TransmissionSerializer
+    permission_classes = [FeederFree]
+    parser_classes = [NDJSONParser, *ARCHIVE_UPLOAD_PARSERS]
+
+    @swagger_auto_schema(
+        tags=["Transmission"],
+        manual_parameters=[
+            openapi.Parameter(
+                "recorder",
+                openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                description="Recorder Key",
+            ),
+        ],
+        operation_description="Body is NDJSON of /transmission/create payloads, or a tar/zip of <call>.json and <call>.<audio> pairs",
+    )
+    def post(self, request, format=None):
+        recorderUUID = request.query_params.get("recorder")
+
+        if not recorderUUID or not get_recorder(recorderUUID):
+            return Response(
+                "Not allowed to post this talkgroup",
+                status=status.HTTP_401_UNAUTHORIZED,
+            )
+
+        if settings.ASYNC_INGEST and ingest_backlogged():
+            return ingest_backlogged_response()
+
+        # Outside the try, an unsupported body type is a 415 not a 400
+        if "file" in request.FILES:
+            items = archive_items(request.FILES["file"])
+        else:
+            items = request.data
+
+        try:
+            results = bulk_transmission_handler(recorderUUID, items)
+            return Response(
+                {
+                    "success": all(result["success"] for result in results),
+                    "results": results,
+                },
+                status=(
+                    status.HTTP_202_ACCEPTED
+                    if settings.ASYNC_INGEST
+                    else status.HTTP_200_OK
+                ),
+            )
         except Exception as e:
             if settings.SEND_TELEMETRY:
-                sentry_sdk.set_context("add_tx_data", {
-                    "data": data,
-                    "Callback": Callback,
-                    "TX": TX,
-                    "recorder": recorderX,
-                })
+                sentry_sdk.set_context("add_tx_data", {"recorder": recorderUUID})
                 sentry_sdk.capture_exception(e)
             return Response(str(e), status=status.HTTP_400_BAD_REQUEST)
 
 
+class TransmissionIngestStatus(APIView):
+    queryset = Transmission.objects.all()
+    permission_classes = [IsSiteAdmin]
+
+    @swagger_auto_schema(tags=["Transmission"])
+    def get(self, request, format=None):
+        backlog = ingest_backlog()
+        return Response(
+            {
+                "async": settings.ASYNC_INGEST,
+                "backlog": backlog["messages"],
+                "consumers": backlog["consumers"],
+                "maxBacklog": settings.ASYNC_INGEST_MAX_BACKLOG,
+                # This web process, then each worker, where tasks emit and deliver
+                "process": process_stats(),
+                "workers": worker_stats(),
+            }
+        )
+
+
 class TransmissionView(APIView):
     queryset = Transmission.objects.all()
     serializer_class = TransmissionSerializer
 
     def get_object(self, UUID):
         try:
-            return Transmission.objects.get(UUID=UUID)
+            return transmission_queryset().get(UUID=UUID)
         except UserProfile.DoesNotExist:
             raise Http404
 
@@ -1795,14 +2133,8 @@ class TransmissionView(APIView):
         user: UserProfile = request.user.userProfile
 
         if not user.siteAdmin:
-            systemUUIDs, systems = get_user_allowed_systems(user.UUID)
-            if not TransmissionX.system in systems:
+            if not user_allowed_to_access_transmission(TransmissionX, user.UUID):
                 return Response(status=status.HTTP_401_UNAUTHORIZED)
-            SystemX: System = TransmissionX.system
-            if SystemX.enableTalkGroupACLs:
-                talkgroupsAllowed = get_user_allowed_talkgroups(SystemX, user.UUID)
-                if not TransmissionX.talkgroup in talkgroupsAllowed:
-                    return Response(status=status.HTTP_401_UNAUTHORIZED)
 
         serializer = TransmissionSerializer(TransmissionX)
         return Response(serializer.data)
@@ -1818,6 +2150,292 @@ class TransmissionView(APIView):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+SEARCH_PARAMETERS = [
+    openapi.Parameter(
+        "q",
+        openapi.IN_QUERY,
+        type=openapi.TYPE_STRING,
+        required=True,
+        description="Words that must all match",
+    ),
+]
+
+
+class SearchTransmissionList(APIView, PaginationMixin):
+    queryset = Transmission.objects.all()
+    serializer_class = TransmissionListSerializer
+    permission_classes = [IsSAOrReadOnly]
+    pagination_class = api_settings.DEFAULT_PAGINATION_CLASS
+    cursor_pagination_class = TransmissionCursorPagination
+
+    @swagger_auto_schema(
+        tags=["Search"],
+        manual_parameters=SEARCH_PARAMETERS
+        + CURSOR_PARAMETERS
+        + [
+            openapi.Parameter(
+                "system",
+                openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                description="System UUID",
+            ),
+            openapi.Parameter(
+                "talkgroup",
+                openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                description="TalkGroup UUID",
+            ),
+        ],
+    )
+    def get(self, request, format=None):
+        user: UserProfile = request.user.userProfile
+        query = request.query_params.get("q", "")
+        if not tokenize(query):
+            return Response("Missing search query", status=status.HTTP_400_BAD_REQUEST)
+
+        # The time range also bounds the token scan, not just the page
+        pagination = TransmissionCursorPagination()
+        matches = transcript_matches(
+            query,
+            after=pagination.get_time(request, "after"),
+            before=pagination.get_time(request, "before"),
+        )
+
+        Transmissions = visible_transmissions(
+            user, transmission_list_queryset()
+        ).filter(pk__in=matches)
+        for param in ("system", "talkgroup"):
+            if request.query_params.get(param):
+                try:
+                    UUID = uuid.UUID(request.query_params[param])
+                except ValueError:
+                    return Response(
+                        f"Invalid {param} UUID", status=status.HTTP_400_BAD_REQUEST
+                    )
+                Transmissions = Transmissions.filter(**{param: UUID})
+
+        page = self.paginate_queryset(Transmissions)
+        if page is not None:
+            return self.get_page_response(serialize_transmission_list(page))
+
+
+class SearchTalkGroupList(APIView, PaginationMixin):
+    queryset = TalkGroup.objects.all()
+    serializer_class = TalkGroupViewListSerializer
+    permission_classes = [IsSAOrReadOnly]
+    pagination_class = api_settings.DEFAULT_PAGINATION_CLASS
+
+    @swagger_auto_schema(tags=["Search"], manual_parameters=SEARCH_PARAMETERS)
+    def get(self, request, format=None):
+        user: UserProfile = request.user.userProfile
+        query = request.query_params.get("q", "")
+        if not tokenize(query):
+            return Response("Missing search query", status=status.HTTP_400_BAD_REQUEST)
+
+        if user.siteAdmin:
+            AllowedTalkgroups = TalkGroup.objects.all()
+        else:
+            AllowedTalkgroups = visible_talkgroups(user.UUID)
+
+        TalkGroups = catalog_filter(AllowedTalkgroups, query, "talkgroup").order_by(
+            "system", "decimalID"
+        )
+
+        page = self.paginate_queryset(TalkGroups)
+        if page is not None:
+            serializer = TalkGroupViewListSerializer(page, many=True)
+            return Response(serializer.data)
+
+
+class SearchUnitList(APIView, PaginationMixin):
+    queryset = Unit.objects.all()
+    serializer_class = UnitSerializer
+    permission_classes = [IsSAOrReadOnly]
+    pagination_class = api_settings.DEFAULT_PAGINATION_CLASS
+
+    @swagger_auto_schema(tags=["Search"], manual_parameters=SEARCH_PARAMETERS)
+    def get(self, request, format=None):
+        user: UserProfile = request.user.userProfile
+        query = request.query_params.get("q", "")
+        if not tokenize(query):
+            return Response("Missing search query", status=status.HTTP_400_BAD_REQUEST)
+
+        if user.siteAdmin:
+            Units = Unit.objects.all()
+        else:
+            systemUUIDs, systems = get_user_allowed_systems(user.UUID)
+            Units = Unit.objects.filter(system__in=systemUUIDs)
+
+        Units = catalog_filter(Units, query, "unit").order_by("system", "decimalID")
+
+        page = self.paginate_queryset(Units)
+        if page is not None:
+            serializer = UnitSerializer(page, many=True)
+            return Response(serializer.data)
+
+
+ACTIVITY_PARAMETERS = [
+    openapi.Parameter(
+        "resolution",
+        openapi.IN_QUERY,
+        type=openapi.TYPE_STRING,
+        enum=list(RESOLUTIONS),
+        description="Bucket size, hour by default",
+    ),
+    openapi.Parameter(
+        "after",
+        openapi.IN_QUERY,
+        type=openapi.TYPE_STRING,
+        description="First bucket (ISO 8601 or unix), defaults to a recent window",
+    ),
+    openapi.Parameter(
+        "before",
+        openapi.IN_QUERY,
+        type=openapi.TYPE_STRING,
+        description="Last bucket (ISO 8601 or unix), defaults to now",
+    ),
+]
+
+
+class ActivityMixin(object):
+    """
+    Reads the bucket size and time range of an activity query
+    """
+
+    def get_window(self, request) -> tuple:
+        name = request.query_params.get("resolution", "hour")
+        if name not in RESOLUTIONS:
+            raise ValidationError({"resolution": f"One of {', '.join(RESOLUTIONS)}"})
+
+        pagination = TransmissionCursorPagination()
+        try:
+            after, before = activity_window(
+                RESOLUTIONS[name],
+                pagination.get_time(request, "after"),
+                pagination.get_time(request, "before"),
+            )
+        except ValueError as e:
+            raise ValidationError({"after": str(e)})
+        return name, RESOLUTIONS[name], after, before
+
+    def get_activity_response(self, request, rows) -> Response:
+        name, resolution, after, before = self.get_window(request)
+        return Response(
+            {
+                "resolution": name,
+                "after": after,
+                "before": before,
+                "buckets": activity_series(rows, resolution, after, before),
+            }
+        )
+
+
+class SystemActivity(ActivityMixin, APIView):
+    queryset = TalkGroupActivity.objects.all()
+
+    @swagger_auto_schema(tags=["Activity"], manual_parameters=ACTIVITY_PARAMETERS)
+    def get(self, request, UUID, format=None):
+        user: UserProfile = request.user.userProfile
+        rows = TalkGroupActivity.objects.filter(system_id=UUID)
+
+        if not user.siteAdmin:
+            if not visible_systems(user.UUID).filter(UUID=UUID).exists():
+                return Response(status=status.HTTP_401_UNAUTHORIZED)
+            rows = rows.filter(talkgroup__in=visible_talkgroups(user.UUID))
+
+        return self.get_activity_response(request, rows)
+
+
+class SystemTalkGroupActivity(ActivityMixin, APIView):
+    queryset = TalkGroupActivity.objects.all()
+
+    @swagger_auto_schema(
+        tags=["Activity"],
+        manual_parameters=ACTIVITY_PARAMETERS
+        + [
+            openapi.Parameter(
+                "limit",
+                openapi.IN_QUERY,
+                type=openapi.TYPE_INTEGER,
+                description="Talkgroups to return, 10 by default",
+            )
+        ],
+    )
+    def get(self, request, UUID, format=None):
+        user: UserProfile = request.user.userProfile
+        rows = TalkGroupActivity.objects.filter(system_id=UUID)
+
+        if not user.siteAdmin:
+            if not visible_systems(user.UUID).filter(UUID=UUID).exists():
+                return Response(status=status.HTTP_401_UNAUTHORIZED)
+            rows = rows.filter(talkgroup__in=visible_talkgroups(user.UUID))
+
+        try:
+            limit = max(1, min(int(request.query_params.get("limit", 10)), 100))
+        except ValueError:
+            raise ValidationError({"limit": "Must be an integer"})
+
+        name, resolution, after, before = self.get_window(request)
+        return Response(
+            {
+                "resolution": name,
+                "after": after,
+                "before": before,
+                "talkgroups": busiest_talkgroups(
+                    rows, resolution, after, before, limit
+                ),
+            }
+        )
+
+
+class TalkGroupActivityView(ActivityMixin, APIView):
+    queryset = TalkGroupActivity.objects.all()
+
+    def get_object(self, UUID):
+        try:
+            return TalkGroup.objects.get(UUID=UUID)
+        except TalkGroup.DoesNotExist:
+            raise Http404
+
+    @swagger_auto_schema(tags=["Activity"], manual_parameters=ACTIVITY_PARAMETERS)
+    def get(self, request, UUID, format=None):
+        user: UserProfile = request.user.userProfile
+        TalkGroupX: TalkGroup = self.get_object(UUID)
+
+        if not user.siteAdmin:
+            if not user_can_view(user.UUID, TalkGroupX.system_id, TalkGroupX.UUID):
+                return Response(status=status.HTTP_401_UNAUTHORIZED)
+
+        return self.get_activity_response(
+            request, TalkGroupActivity.objects.filter(talkgroup=TalkGroupX)
+        )
+
+
+class UnitActivityView(ActivityMixin, APIView):
+    queryset = UnitActivity.objects.all()
+
+    def get_object(self, UUID):
+        try:
+            return Unit.objects.get(UUID=UUID)
+        except Unit.DoesNotExist:
+            raise Http404
+
+    @swagger_auto_schema(tags=["Activity"], manual_parameters=ACTIVITY_PARAMETERS)
+    def get(self, request, UUID, format=None):
+        user: UserProfile = request.user.userProfile
+        UnitX: Unit = self.get_object(UUID)
+
+        # Unit rollups are not split by talkgroup, so talkgroup ACLs would leak
+        if not user.siteAdmin:
+            systems = unrestricted_systems(user.UUID)
+            if not systems.filter(UUID=UnitX.system_id).exists():
+                return Response(status=status.HTTP_401_UNAUTHORIZED)
+
+        return self.get_activity_response(
+            request, UnitActivity.objects.filter(unit=UnitX)
+        )
+
+
 class IncidentList(APIView, PaginationMixin):
     queryset = Incident.objects.all()
     serializer_class = IncidentSerializer
@@ -2065,11 +2683,13 @@ class IncidentView(APIView):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class ScanListList(APIView, PaginationMixin):
+class ScanListList(ConditionalGetMixin, APIView, PaginationMixin):
     queryset = ScanList.objects.all()
     serializer_class = ScanListSerializer
     permission_classes = [IsSAOrReadOnly]
     pagination_class = api_settings.DEFAULT_PAGINATION_CLASS
+    etag_models = ["ScanList"]
+    etag_acl_scoped = False
 
     @swagger_auto_schema(tags=["ScanList"])
     def get(self, request, format=None):
@@ -2087,11 +2707,13 @@ class ScanListList(APIView, PaginationMixin):
             return Response(serializer.data)
 
 
-class ScanListPersonalList(APIView, PaginationMixin):
+class ScanListPersonalList(ConditionalGetMixin, APIView, PaginationMixin):
     queryset = ScanList.objects.all()
     serializer_class = ScanListSerializer
     permission_classes = [IsSAOrReadOnly]
     pagination_class = api_settings.DEFAULT_PAGINATION_CLASS
+    etag_models = ["ScanList"]
+    etag_acl_scoped = False
 
     @swagger_auto_schema(tags=["ScanList"])
     def get(self, request, format=None):
@@ -2104,11 +2726,13 @@ class ScanListPersonalList(APIView, PaginationMixin):
             return Response(serializer.data)
 
 
-class ScanListUserList(APIView, PaginationMixin):
+class ScanListUserList(ConditionalGetMixin, APIView, PaginationMixin):
     queryset = ScanList.objects.all()
     serializer_class = ScanListSerializer
     permission_classes = [IsSAOrReadOnly]
     pagination_class = api_settings.DEFAULT_PAGINATION_CLASS
+    etag_models = ["ScanList"]
+    etag_acl_scoped = False
 
     @swagger_auto_schema(tags=["ScanList"])
     def get(self, request, USER_UUID, format=None):
@@ -2176,10 +2800,12 @@ class ScanListCreate(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class ScanListView(APIView):
+class ScanListView(ConditionalGetMixin, APIView):
     queryset = ScanList.objects.all()
     serializer_class = ScanListSerializer
     permission_classes = [IsUser]
+    etag_models = ["ScanList"]
+    etag_acl_scoped = False
 
     def get_object(self, UUID):
         try:
@@ -2187,14 +2813,23 @@ class ScanListView(APIView):
         except UserProfile.DoesNotExist:
             raise Http404
 
+    def can_view(self, user: UserProfile, ScanListX: ScanList) -> bool:
+        return (
+            user.siteAdmin
+            or ScanListX.owner == user
+            or ScanListX.public
+            or ScanListX.communityShared
+        )
+
+    def has_conditional_access(self, request, UUID, format=None) -> bool:
+        return self.can_view(request.user.userProfile, self.get_object(UUID))
+
     @swagger_auto_schema(tags=["ScanList"])
     def get(self, request, UUID, format=None):
         ScanListX: ScanList = self.get_object(UUID)
         user: UserProfile = request.user.userProfile
-        if not user.siteAdmin:
-            if not ScanListX.owner == user:
-                if not ScanListX.public and not ScanListX.communityShared:
-                    return Response(status=status.HTTP_401_UNAUTHORIZED)
+        if not self.can_view(user, ScanListX):
+            return Response(status=status.HTTP_401_UNAUTHORIZED)
 
         serializer = ScanListSerializer(ScanListX)
         return Response(serializer.data)
@@ -2256,6 +2891,7 @@ class ScanListTransmissionList(APIView, PaginationMixin):
     serializer_class = TransmissionListSerializer
     permission_classes = [IsSAOrReadOnly]
     pagination_class = api_settings.DEFAULT_PAGINATION_CLASS
+    cursor_pagination_class = TransmissionCursorPagination
 
     def get_object(self, UUID):
         try:
@@ -2263,42 +2899,55 @@ class ScanListTransmissionList(APIView, PaginationMixin):
         except UserProfile.DoesNotExist:
             raise Http404
 
-    @swagger_auto_schema(tags=["Transmission"])
+    @swagger_auto_schema(tags=["Transmission"], manual_parameters=CURSOR_PARAMETERS)
     def get(self, request, UUID, format=None):
         user: UserProfile = request.user.userProfile
         ScanListX: ScanList = self.get_object(UUID)
 
         Talkgroups = ScanListX.talkgroups.all()
-        Transmissions = Transmission.objects.filter(talkgroup__in=Talkgroups)
-        AllowedTransmissions = []
-
-        if user.siteAdmin:
-            AllowedTransmissions = Transmissions
-        else:
-            systemUUIDs, systems = get_user_allowed_systems(user.UUID)
-            for system in systems:
-                if system.enableTalkGroupACLs:
-                    TGAllowed = get_user_allowed_talkgroups(system, user.UUID)
-                    AllowedTransmissions.extend(Transmissions.filter(
-                            system=system, talkgroup__in=TGAllowed
-                        )
-                    )
-                else:
-                    AllowedTransmissions.extend(
-                        Transmissions.filter(system=system)
-                    )
+        AllowedTransmissions = visible_transmissions(
+            user, transmission_list_queryset()
+        ).filter(talkgroup__in=Talkgroups)
 
         page = self.paginate_queryset(AllowedTransmissions)
         if page is not None:
-            serializer = TransmissionListSerializer(page, many=True)
-            return Response(serializer.data)
+            return self.get_page_response(serialize_transmission_list(page))
+
+
+class ScanListRouting(APIView):
+    queryset = ScanList.objects.all()
+    permission_classes = [IsSiteAdmin]
+
+    @swagger_auto_schema(
+        tags=["ScanList"],
+        manual_parameters=[
+            openapi.Parameter(
+                "talkgroup",
+                openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                description="Only show the rooms of this talkgroup UUID",
+            ),
+        ],
+    )
+    def get(self, request, format=None):
+        talkgroupUUID = request.query_params.get("talkgroup")
+        if talkgroupUUID is not None:
+            try:
+                talkgroupUUID = uuid.UUID(talkgroupUUID)
+            except ValueError:
+                raise ValidationError({"talkgroup": "Must be a UUID"})
+
+        # This process's index, built from the same tables the workers read
+        return Response(routing_index(talkgroupUUID))
 
 
-class ScannerList(APIView, PaginationMixin):
+class ScannerList(ConditionalGetMixin, APIView, PaginationMixin):
     queryset = Scanner.objects.all()
     serializer_class = ScannerSerializer
     permission_classes = [IsSAOrReadOnly]
     pagination_class = api_settings.DEFAULT_PAGINATION_CLASS
+    etag_models = ["Scanner"]
+    etag_acl_scoped = False
 
     @swagger_auto_schema(tags=["Scanner"])
     def get(self, request, format=None):
@@ -2365,10 +3014,12 @@ class ScannerCreate(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class ScannerView(APIView):
+class ScannerView(ConditionalGetMixin, APIView):
     queryset = Scanner.objects.all()
     serializer_class = ScannerSerializer
     permission_classes = [IsUser]
+    etag_models = ["Scanner"]
+    etag_acl_scoped = False
 
     def get_object(self, UUID):
         try:
@@ -2376,14 +3027,23 @@ class ScannerView(APIView):
         except UserProfile.DoesNotExist:
             raise Http404
 
+    def can_view(self, user: UserProfile, ScannerX: Scanner) -> bool:
+        return (
+            user.siteAdmin
+            or ScannerX.owner == user
+            or ScannerX.public
+            or ScannerX.communityShared
+        )
+
+    def has_conditional_access(self, request, UUID, format=None) -> bool:
+        return self.can_view(request.user.userProfile, self.get_object(UUID))
+
     @swagger_auto_schema(tags=["Scanner"])
     def get(self, request, UUID, format=None):
         ScannerX: Scanner = self.get_object(UUID)
         user: UserProfile = request.user.userProfile
-        if not user.siteAdmin:
-            if not ScannerX.owner == user:
-                if not ScannerX.public and not ScannerX.communityShared:
-                    return Response(status=status.HTTP_401_UNAUTHORIZED)
+        if not self.can_view(user, ScannerX):
+            return Response(status=status.HTTP_401_UNAUTHORIZED)
         serializer = ScannerSerializer(Scanner)
         return Response(serializer.data)
 
@@ -2444,6 +3104,7 @@ class ScannerTransmissionList(APIView, PaginationMixin):
     serializer_class = TransmissionListSerializer
     permission_classes = [IsSAOrReadOnly]
     pagination_class = api_settings.DEFAULT_PAGINATION_CLASS
+    cursor_pagination_class = TransmissionCursorPagination
 
     def get_object(self, UUID):
         try:
@@ -2451,43 +3112,19 @@ class ScannerTransmissionList(APIView, PaginationMixin):
         except UserProfile.DoesNotExist:
             raise Http404
 
-    @swagger_auto_schema(tags=["Transmission"])
+    @swagger_auto_schema(tags=["Transmission"], manual_parameters=CURSOR_PARAMETERS)
     def get(self, request, UUID, format=None):
         user: UserProfile = request.user.userProfile
         ScannerX: Scanner = self.get_object(UUID)
-        systemUUIDs, systems = get_user_allowed_systems(user.UUID)
-
-        AllowedTransmissions = []
-        ScanListTalkgroups = []
-        Transmissions = []
-
-        ScanListTalkgroups = ScannerX.scanlists.all().values_list('talkgroups',flat=True)
-        ScanListTalkgroups = list(dict.fromkeys(ScanListTalkgroups))
-        Transmissions = Transmission.objects.filter(talkgroup__in=ScanListTalkgroups)
-
-        if not user.siteAdmin:
-            acl_systems = Transmissions.filter(system__enableTalkGroupACLs=True, system__in=systems).values_list('system', flat=True)
-            non_acl_systems = Transmissions.filter(system__enableTalkGroupACLs=False, system__in=systems).values_list('system', flat=True)
 
-            non_acl_systems = list(dict.fromkeys(non_acl_systems))
-            acl_systems = list(dict.fromkeys(acl_systems))
-
-            talkgroupsAllowed = [] 
-            talkgroupsAllowed.extend(TalkGroup.objects.filter(system__UUID__in=non_acl_systems))
-
-            for system in acl_systems:            
-                system_object = System.objects.get(UUID=system)
-                user_allowed_talkgroups = get_user_allowed_talkgroups(system_object, user.UUID)
-                talkgroupsAllowed.extend(user_allowed_talkgroups)
-
-            AllowedTransmissions = Transmissions.filter(talkgroup__in=talkgroupsAllowed)
-        else:
-            AllowedTransmissions = Transmissions
+        ScanListTalkgroups = ScannerX.scanlists.values("talkgroups")
+        AllowedTransmissions = visible_transmissions(
+            user, transmission_list_queryset()
+        ).filter(talkgroup__in=ScanListTalkgroups)
 
         page = self.paginate_queryset(AllowedTransmissions)
         if page is not None:
-            serializer = TransmissionListSerializer(page, many=True)
-            return Response(serializer.data)
+            return self.get_page_response(serialize_transmission_list(page))
 
 
 class GlobalAnnouncementList(APIView, PaginationMixin):
@@ -20,4 +20,9 @@ app.conf.beat_schedule = {
         "schedule": 3600.0,
         "args": None,
     },
+    "compact-activity": {
+        "task": "radio.tasks.compact_activity",
+        "schedule": 60.0,
+        "args": None,
+    },
 }
@@ -48,6 +48,78 @@ ALLOWED_HOSTS = os.environ.get("DJANGO_ALLOWED_HOSTS", default="*").split(" ")
 
 DATA_UPLOAD_MAX_NUMBER_FIELDS = 10240
 
+# Accept transmissions with a 202 and persist them on the radio_ingest queue
+ASYNC_INGEST = os.getenv("ASYNC_INGEST", "False").lower() in ("true", "1", "t")
+ASYNC_INGEST_MAX_BACKLOG = int(os.getenv("ASYNC_INGEST_MAX_BACKLOG", "5000"))
+INGEST_BACKLOG_CACHE_SECONDS = float(os.getenv("INGEST_BACKLOG_CACHE_SECONDS", "2"))
+# How long the ingest status endpoint waits for celery workers to report stats
+WORKER_STATS_TIMEOUT = float(os.getenv("WORKER_STATS_TIMEOUT", "1"))
+RESOLUTION_CACHE_TTL = float(os.getenv("RESOLUTION_CACHE_TTL", "300"))
+# How often cached recorders and their policies are checked against recorder
+# edits made in other processes
+RESOLUTION_CACHE_CHECK_SECONDS = float(
+    os.getenv("RESOLUTION_CACHE_CHECK_SECONDS", "2")
+)
+BULK_INGEST_CHUNK_SIZE = int(os.getenv("BULK_INGEST_CHUNK_SIZE", "100"))
+# Uncompressed size limits of a bulk tar/zip upload, per member and in total
+BULK_ARCHIVE_MAX_MEMBER_BYTES = int(
+    os.getenv("BULK_ARCHIVE_MAX_MEMBER_BYTES", str(64 * 1024 * 1024))
+)
+BULK_ARCHIVE_MAX_BYTES = int(
+    os.getenv("BULK_ARCHIVE_MAX_BYTES", str(1024 * 1024 * 1024))
+)
+
+# Serve transmission lists from the denormalized TransmissionFeed table
+# Run RebuildTransmissionFeed after turning this on
+TRANSMISSION_FEED = os.getenv("TRANSMISSION_FEED", "False").lower() in ("true", "1", "t")
+
+# Broker publish retries of the shared socket.io emitter, and how long a task
+# waits for a pooled producer
+SOCKETIO_EMIT_RETRIES = int(os.getenv("SOCKETIO_EMIT_RETRIES", "3"))
+SOCKETIO_EMIT_TIMEOUT = float(os.getenv("SOCKETIO_EMIT_TIMEOUT", "5"))
+
+# How often a process checks whether ScanLists/Scanners changed elsewhere and its
+# talkgroup -> room routing index needs a rebuild
+ROUTING_INDEX_CHECK_SECONDS = float(os.getenv("ROUTING_INDEX_CHECK_SECONDS", "2"))
+
+# Same for the index of enabled UserAlerts used to match new Transmissions
+ALERT_INDEX_CHECK_SECONDS = float(os.getenv("ALERT_INDEX_CHECK_SECONDS", "2"))
+
+# Apprise hits of one user's alert within this many seconds go out as one digest
+# (0 sends each hit), sent by NOTIFICATION_WORKERS threads per process. Digests
+# past NOTIFICATION_QUEUE_SIZE waiting on those threads are dropped. Open digests
+# are held in memory, a worker crash loses them
+NOTIFICATION_COALESCE_SECONDS = float(os.getenv("NOTIFICATION_COALESCE_SECONDS", "10"))
+NOTIFICATION_WORKERS = int(os.getenv("NOTIFICATION_WORKERS", "8"))
+NOTIFICATION_QUEUE_SIZE = int(os.getenv("NOTIFICATION_QUEUE_SIZE", "1000"))
+
+# Per talkgroup/unit call counters in minute, hour and day buckets, merged by the
+# compact-activity beat task which also drops minute/hour buckets past retention
+ACTIVITY_ROLLUPS = os.getenv("ACTIVITY_ROLLUPS", "True").lower() in ("true", "1", "t")
+ACTIVITY_MINUTE_RETENTION_HOURS = int(
+    os.getenv("ACTIVITY_MINUTE_RETENTION_HOURS", "48")
+)
+ACTIVITY_HOUR_RETENTION_DAYS = int(os.getenv("ACTIVITY_HOUR_RETENTION_DAYS", "90"))
+
+# Catalog responses (talkgroups, systems, units, ...) are cached here, in process
+# memory by default or shared through redis://... (needs django-redis)
+RESPONSE_CACHE_URL = os.getenv("RESPONSE_CACHE_URL", "")
+RESPONSE_CACHE_TIMEOUT = int(os.getenv("RESPONSE_CACHE_TIMEOUT", "300"))
+
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "responses": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "responses",
+        "OPTIONS": {"MAX_ENTRIES": 5000},
+    },
+}
+if RESPONSE_CACHE_URL.startswith(("redis://", "rediss://")):
+    CACHES["responses"] = {
+        "BACKEND": "django_redis.cache.RedisCache",
+        "LOCATION": RESPONSE_CACHE_URL,
+    }
+
 INSTALLED_APPS = [
     "radio",
     "users",
@@ -298,6 +370,11 @@ CELERY_QUEUES = (
         routing_key="radio_alerts",
         queue_arguments={"x-max-priority": 10},
     ),
+    Queue(
+        "radio_ingest",
+        Exchange("radio_ingest"),
+        routing_key="radio_ingest",
+    ),
     Queue(
         "RR_IMPORT",
         Exchange("RR_IMPORT"),
@@ -316,6 +393,7 @@ CELERY_TASK_ROUTES = {
     "radio.tasks.dispatch_web_notification": {"queue": "radio_alerts"},
     "radio.tasks.publish_user_notification": {"queue": "radio_alerts"},
     "radio.tasks.broadcast_transmission": {"queue": "radio_tx"},
+    "radio.tasks.ingest_transmission": {"queue": "radio_ingest"},
 }
 CELERY_TASK_DEFAULT_QUEUE = "default"
 CELERY_TASK_DEFAULT_EXCHANGE = "default"
@@ -48,7 +48,6 @@ def createUserProfile(sender, instance: CustomUser, **kwargs):
     for acl in TalkGroupACL.objects.filter(defaultNewUsers=True):
         acl: TalkGroupACL
         acl.users.add(UP)
-        acl.save()
 
     instance.userProfile = UP
     instance.save()